@@ -2,14 +2,19 @@ import shutil
 import os
 import bpy
 import arm.utils
+import arm.log as log
+import arm.lib.asset_registry as asset_registry
 
-assets = []
+assets = asset_registry.AssetRegistry()
 khafile_defs = []
 khafile_defs_last = []
-embedded_data = []
-shaders = []
-shaders_last = []
-shader_datas = []
+embedded_data = asset_registry.AssetRegistry()
+shaders = asset_registry.AssetRegistry()
+shaders_last = asset_registry.AssetRegistry()
+shader_datas = asset_registry.AssetRegistry()
+asset_references = [] # Files emitted to khafile, set by finalize
+asset_diff = ([], [], []) # Added, removed and changed assets since previous build
+same_content_reported = set() # Groups of equal assets already warned about
 
 def reset():
     global assets
@@ -19,18 +24,18 @@ def reset():
     global shaders
     global shaders_last
     global shader_datas
-    assets = []
+    global asset_references
+    assets = asset_registry.AssetRegistry()
     khafile_defs_last = khafile_defs
     khafile_defs = []
-    embedded_data = []
+    embedded_data = asset_registry.AssetRegistry()
     shaders_last = shaders
-    shaders = []
-    shader_datas = []
+    shaders = asset_registry.AssetRegistry()
+    shader_datas = asset_registry.AssetRegistry()
+    asset_references = []
 
 def add(file):
-    global assets
-    if file not in assets:
-        assets.append(file)
+    assets.add(file)
 
 def add_khafile_def(d):
     global khafile_defs
@@ -38,20 +43,34 @@ def add_khafile_def(d):
         khafile_defs.append(d)
 
 def add_embedded_data(file):
-    global embedded_data
-    if file not in embedded_data:
-        embedded_data.append(file)
+    embedded_data.add(file)
 
 def add_shader(file):
-    global shaders
-    global shaders_last
-    if file not in shaders:
-        shaders.append(file)
+    shaders.add(file)
 
 def add_shader_data(file):
-    global shader_datas
-    if file not in shader_datas:
-        shader_datas.append(file)
+    shader_datas.add(file)
+
+def finalize():
+    # Hashes written assets, merges duplicates and diffs the result against previous build
+    global asset_references
+    global asset_diff
+    manifest_path = arm.utils.get_fp_build() + '/compiled/assets.json'
+    last = asset_registry.load_manifest(manifest_path)
+    assets.scan(last)
+    asset_references, duplicates = assets.unique()
+    manifest = assets.manifest()
+    asset_diff = asset_registry.diff(last, manifest)
+    asset_registry.save_manifest(manifest_path, manifest)
+    groups = [names for names in assets.same_content() if tuple(names) not in same_content_reported]
+    if len(groups) > 0:
+        log.warn('Assets with equal content - ' + '; '.join([', '.join(names) for names in groups]))
+        same_content_reported.update([tuple(names) for names in groups])
+    if bpy.data.worlds['Arm'].arm_profile_build:
+        added, removed, changed = asset_diff
+        print('Assets: ' + str(len(asset_references)) + ' files, ' + str(len(duplicates)) + ' duplicates merged, ' + \
+              str(len(added)) + ' added, ' + str(len(changed)) + ' changed, ' + str(len(removed)) + ' removed')
+    return asset_references
 
 def add_shader2(dir_name, data_name):
     add_shader_data(arm.utils.build_dir() + '/compiled/Shaders/' + dir_name + '/' + data_name + '.arm')
@@ -72,6 +91,16 @@ def invalidate_shader_cache(self, context):
     if os.path.isdir(fp + '/compiled/ShaderRaws'):
         shutil.rmtree(fp + '/compiled/ShaderRaws')
 
+def invalidate_compiled_glsl(self, context):
+    # compiled.glsl constant changed, pass variants are rebuilt from their dependencies at build time
+    # Material shaders are not tracked, recompile them next time
+    global invalidate_enabled
+    if invalidate_enabled == False:
+        return
+    fp = arm.utils.get_fp_build()
+    if os.path.isdir(fp + '/compiled/ShaderRaws'):
+        shutil.rmtree(fp + '/compiled/ShaderRaws')
+
 def invalidate_compiled_data(self, context):
     global invalidate_enabled
     if invalidate_enabled == False:
@@ -12,12 +12,24 @@
 
 import os
 import bpy
+import json
+import hashlib
 import math
+import copy
+import numpy
 from mathutils import *
 import time
 import subprocess
 import shutil
+import contextlib
+import collections
 import arm.utils
+import arm.lib.armpack
+import arm.lib.mesh_utils as mesh_utils
+import arm.lib.mesh_export as mesh_export
+import arm.lib.mesh_simplify as mesh_simplify
+import arm.lib.anim_compress as anim_compress
+import arm.lib.profiler as profiler
 import arm.write_probes as write_probes
 import arm.assets as assets
 import arm.log as log
@@ -89,45 +101,6 @@ class Vertex:
             other.loop_indices = indices
         return eq
 
-class ExportVertex:
-    __slots__ = ("hash", "vertex_index", "face_index", "position", "normal", "color", "texcoord0", "texcoord1")
-
-    def __init__(self):
-        self.color = [1.0, 1.0, 1.0]
-        self.texcoord0 = [0.0, 0.0]
-        self.texcoord1 = [0.0, 0.0]
-
-    def __eq__(self, v):
-        if self.hash != v.hash:
-            return False
-        if self.position != v.position:
-            return False
-        if self.normal != v.normal:
-            return False
-        if self.texcoord0 != v.texcoord0:
-            return False
-        if self.color != v.color:
-            return False
-        if self.texcoord1 != v.texcoord1:
-            return False
-        return True
-
-    def Hash(self):
-        h = hash(self.position[0])
-        h = h * 21737 + hash(self.position[1])
-        h = h * 21737 + hash(self.position[2])
-        h = h * 21737 + hash(self.normal[0])
-        h = h * 21737 + hash(self.normal[1])
-        h = h * 21737 + hash(self.normal[2])
-        h = h * 21737 + hash(self.color[0])
-        h = h * 21737 + hash(self.color[1])
-        h = h * 21737 + hash(self.color[2])
-        h = h * 21737 + hash(self.texcoord0[0])
-        h = h * 21737 + hash(self.texcoord0[1])
-        h = h * 21737 + hash(self.texcoord1[0])
-        h = h * 21737 + hash(self.texcoord1[1])
-        self.hash = h
-
 class ArmoryExporter:
     '''Export to Armory format'''
 
@@ -143,82 +116,6 @@ class ArmoryExporter:
     def write_vector3d(self, vector):
         return [vector[0], vector[1], vector[2]]
 
-    def write_va2d(self, vertexArray, attrib):
-        va = []
-        count = len(vertexArray)
-        k = 0
-
-        lineCount = count >> 3
-        for i in range(lineCount):
-            for j in range(7):
-                va += self.write_vector2d(getattr(vertexArray[k], attrib))
-                k += 1
-
-            va += self.write_vector2d(getattr(vertexArray[k], attrib))
-            k += 1
-
-        count &= 7
-        if count != 0:
-            for j in range(count - 1):
-                va += self.write_vector2d(getattr(vertexArray[k], attrib))
-                k += 1
-
-            va += self.write_vector2d(getattr(vertexArray[k], attrib))
-
-        return va
-
-    def write_va3d(self, vertex_array, attrib):
-        va = []
-        count = len(vertex_array)
-        k = 0
-
-        lineCount = count >> 3
-        for i in range(lineCount):
-
-            for j in range(7):
-                va += self.write_vector3d(getattr(vertex_array[k], attrib))
-                k += 1
-
-            va += self.write_vector3d(getattr(vertex_array[k], attrib))
-            k += 1
-
-        count &= 7
-        if count != 0:
-            for j in range(count - 1):
-                va += self.write_vector3d(getattr(vertex_array[k], attrib))
-                k += 1
-
-            va += self.write_vector3d(getattr(vertex_array[k], attrib))
-
-        return va
-
-    def write_triangle(self, triangle_index, index_table):
-        i = triangle_index * 3
-        return [index_table[i], index_table[i + 1], index_table[i + 2]]
-
-    def write_triangle_array(self, count, index_table):
-        va = []
-        triangle_index = 0
-
-        line_count = count >> 4
-        for i in range(line_count):
-
-            for j in range(15):
-                va += self.write_triangle(triangle_index, index_table)
-                triangle_index += 1
-
-            va += self.write_triangle(triangle_index, index_table)
-            triangle_index += 1
-
-        count &= 15
-        if count != 0:
-            for j in range(count - 1):
-                va += self.write_triangle(triangle_index, index_table)
-                triangle_index += 1
-            va += self.write_triangle(triangle_index, index_table)
-
-        return va
-
     def get_meshes_file_path(self, object_id, compressed=False):
         index = self.filepath.rfind('/')
         mesh_fp = self.filepath[:(index + 1)] + 'meshes/'
@@ -261,11 +158,31 @@ class ArmoryExporter:
             return shape_keys
         return None
 
+    def add_node(self, bobject, btype, struct_name):
+        # Registers object or bone, keeping name and type indexes in sync with bobjectArray
+        old = self.bobjectArray.get(bobject)
+        if old != None:
+            self.bobjectTypes[old["objectType"]].pop(bobject, None)
+        self.bobjectArray[bobject] = {"objectType" : btype, "structName" : struct_name}
+        if bobject.name not in self.bobjectNames: # First registered wins, as with linear search
+            self.bobjectNames[bobject.name] = bobject
+        self.bobjectTypes.setdefault(btype, collections.OrderedDict())[bobject] = True
+
+    def set_node_type(self, bobject, btype):
+        ref = self.bobjectArray[bobject]
+        self.bobjectTypes[ref["objectType"]].pop(bobject, None)
+        ref["objectType"] = btype
+        self.bobjectTypes.setdefault(btype, collections.OrderedDict())[bobject] = True
+
+    def nodes_of_type(self, btype):
+        return list(self.bobjectTypes.get(btype, ()))
+
     def find_node(self, name):
-        for bobject_ref in self.bobjectArray.items():
-            if bobject_ref[0].name == name:
-                return bobject_ref
-        return None
+        self.node_lookups += 1
+        bobject = self.bobjectNames.get(name)
+        if bobject == None:
+            return None
+        return (bobject, self.bobjectArray[bobject])
 
     @staticmethod
     def classify_animation_curve(fcurve):
@@ -343,210 +260,51 @@ class ArmoryExporter:
         return ((ArmoryExporter.animation_keys_different(fcurve)) or (ArmoryExporter.animation_tangents_nonzero(fcurve)))
 
     @staticmethod
-    def calc_tangent(v0, v1, v2, uv0, uv1, uv2):
-        deltaPos1 = v1 - v0
-        deltaPos2 = v2 - v0
-        deltaUV1 = uv1 - uv0
-        deltaUV2 = uv2 - uv0
-        
-        d = (deltaUV1.x * deltaUV2.y - deltaUV1.y * deltaUV2.x)
-        if d != 0:
-            r = 1.0 / d
-        else:
-            r = 1.0
-        tangent = (deltaPos1 * deltaUV2.y - deltaPos2 * deltaUV1.y) * r
-        # bitangent = (deltaPos2 * deltaUV1.x - deltaPos1 * deltaUV2.x) * r
-        return tangent
-
-    @staticmethod
-    def deindex_mesh(mesh, material_table):
-        # This function deindexes all vertex positions, colors, and texcoords.
-        # Three separate ExportVertex structures are created for each triangle.
-        vertexArray = mesh.vertices
-        export_vertex_array = []
-        face_index = 0
-
-        for face in mesh.tessfaces:
-            k1 = face.vertices[0]
-            k2 = face.vertices[1]
-            k3 = face.vertices[2]
-
-            v1 = vertexArray[k1]
-            v2 = vertexArray[k2]
-            v3 = vertexArray[k3]
-
-            exportVertex = ExportVertex()
-            exportVertex.vertex_index = k1
-            exportVertex.face_index = face_index
-            exportVertex.position = v1.co
-            exportVertex.normal = v1.normal if (face.use_smooth) else face.normal
-            export_vertex_array.append(exportVertex)
-
-            exportVertex = ExportVertex()
-            exportVertex.vertex_index = k2
-            exportVertex.face_index = face_index
-            exportVertex.position = v2.co
-            exportVertex.normal = v2.normal if (face.use_smooth) else face.normal
-            export_vertex_array.append(exportVertex)
-
-            exportVertex = ExportVertex()
-            exportVertex.vertex_index = k3
-            exportVertex.face_index = face_index
-            exportVertex.position = v3.co
-            exportVertex.normal = v3.normal if (face.use_smooth) else face.normal
-            export_vertex_array.append(exportVertex)
-
-            material_table.append(face.material_index)
-
-            if len(face.vertices) == 4:
-                k1 = face.vertices[0]
-                k2 = face.vertices[2]
-                k3 = face.vertices[3]
-
-                v1 = vertexArray[k1]
-                v2 = vertexArray[k2]
-                v3 = vertexArray[k3]
-
-                exportVertex = ExportVertex()
-                exportVertex.vertex_index = k1
-                exportVertex.face_index = face_index
-                exportVertex.position = v1.co
-                exportVertex.normal = v1.normal if (face.use_smooth) else face.normal
-                export_vertex_array.append(exportVertex)
-
-                exportVertex = ExportVertex()
-                exportVertex.vertex_index = k2
-                exportVertex.face_index = face_index
-                exportVertex.position = v2.co
-                exportVertex.normal = v2.normal if (face.use_smooth) else face.normal
-                export_vertex_array.append(exportVertex)
-
-                exportVertex = ExportVertex()
-                exportVertex.vertex_index = k3
-                exportVertex.face_index = face_index
-                exportVertex.position = v3.co
-                exportVertex.normal = v3.normal if (face.use_smooth) else face.normal
-                export_vertex_array.append(exportVertex)
-
-                material_table.append(face.material_index)
-
-            face_index += 1
-
-        color_count = len(mesh.tessface_vertex_colors)
-        if color_count > 0:
-            colorFace = mesh.tessface_vertex_colors[0].data
-            vertex_index = 0
-            face_index = 0
-
-            for face in mesh.tessfaces:
-                cf = colorFace[face_index]
-                export_vertex_array[vertex_index].color = cf.color1
-                vertex_index += 1
-                export_vertex_array[vertex_index].color = cf.color2
-                vertex_index += 1
-                export_vertex_array[vertex_index].color = cf.color3
-                vertex_index += 1
-
-                if len(face.vertices) == 4:
-                    export_vertex_array[vertex_index].color = cf.color1
-                    vertex_index += 1
-                    export_vertex_array[vertex_index].color = cf.color3
-                    vertex_index += 1
-                    export_vertex_array[vertex_index].color = cf.color4
-                    vertex_index += 1
-
-                face_index += 1
-
-        texcoordCount = len(mesh.tessface_uv_textures)
-        if texcoordCount > 0:
-            texcoordFace = mesh.tessface_uv_textures[0].data
-            vertex_index = 0
-            face_index = 0
-
-            for face in mesh.tessfaces:
-                tf = texcoordFace[face_index]
-                export_vertex_array[vertex_index].texcoord0 = [tf.uv1[0], 1.0 - tf.uv1[1]] # Reverse TCY
-                vertex_index += 1
-                export_vertex_array[vertex_index].texcoord0 = [tf.uv2[0], 1.0 - tf.uv2[1]]
-                vertex_index += 1
-                export_vertex_array[vertex_index].texcoord0 = [tf.uv3[0], 1.0 - tf.uv3[1]]
-                vertex_index += 1
-
-                if len(face.vertices) == 4:
-                    export_vertex_array[vertex_index].texcoord0 = [tf.uv1[0], 1.0 - tf.uv1[1]]
-                    vertex_index += 1
-                    export_vertex_array[vertex_index].texcoord0 = [tf.uv3[0], 1.0 - tf.uv3[1]]
-                    vertex_index += 1
-                    export_vertex_array[vertex_index].texcoord0 = [tf.uv4[0], 1.0 - tf.uv4[1]]
-                    vertex_index += 1
-
-                face_index += 1
-
-            if texcoordCount > 1:
-                texcoordFace = mesh.tessface_uv_textures[1].data
-                vertex_index = 0
-                face_index = 0
-
-                for face in mesh.tessfaces:
-                    tf = texcoordFace[face_index]
-                    export_vertex_array[vertex_index].texcoord1 = [tf.uv1[0], 1.0 - tf.uv1[1]]
-                    vertex_index += 1
-                    export_vertex_array[vertex_index].texcoord1 = [tf.uv2[0], 1.0 - tf.uv2[1]]
-                    vertex_index += 1
-                    export_vertex_array[vertex_index].texcoord1 = [tf.uv3[0], 1.0 - tf.uv3[1]]
-                    vertex_index += 1
-
-                    if len(face.vertices) == 4:
-                        export_vertex_array[vertex_index].texcoord1 = [tf.uv1[0], 1.0 - tf.uv1[1]]
-                        vertex_index += 1
-                        export_vertex_array[vertex_index].texcoord1 = [tf.uv3[0], 1.0 - tf.uv3[1]]
-                        vertex_index += 1
-                        export_vertex_array[vertex_index].texcoord1 = [tf.uv4[0], 1.0 - tf.uv4[1]]
-                        vertex_index += 1
-
-                    face_index += 1
-
-        for ev in export_vertex_array:
-            ev.Hash()
-
-        return export_vertex_array
-
-    @staticmethod
-    def unify_vertices(export_vertex_array, indexTable):    
-        # This function looks for identical vertices having exactly the same position, normal,
-        # color, and texcoords. Duplicate vertices are unified, and a new index table is returned.
-        bucketCount = len(export_vertex_array) >> 3
-        if bucketCount > 1:
-            # Round down to nearest power of two.
-            while True:
-                count = bucketCount & (bucketCount - 1)
-                if count == 0:
-                    break
-                bucketCount = count
-        else:
-            bucketCount = 1
-
-        hashTable = [[] for i in range(bucketCount)]
-        unifiedVA = []
-
-        for i in range(len(export_vertex_array)):
-            ev = export_vertex_array[i]
-            bucket = ev.hash & (bucketCount - 1)
-            
-            index = -1
-            for b in hashTable[bucket]:
-                if export_vertex_array[b] == ev:
-                    index = b
-                    break
-            
-            if index < 0:
-                indexTable.append(len(unifiedVA))
-                unifiedVA.append(ev)
-                hashTable[bucket].append(i)
-            else:
-                indexTable.append(indexTable[index])
-
-        return unifiedVA
+    def deindex_mesh_columns(mesh):
+        # Deindexes all vertex positions, normals, colors and texcoords into flat arrays.
+        # Returns one row of position, normal, color and texcoords per corner,
+        # source vertex index of each corner and material index of each triangle.
+        num_faces = len(mesh.tessfaces)
+        face_vertices = numpy.zeros(num_faces * 4, dtype=numpy.int32)
+        mesh.tessfaces.foreach_get('vertices_raw', face_vertices)
+        face_vertices = face_vertices.reshape(-1, 4)
+        face_of_corner, slot = mesh_utils.triangulate_tessfaces(face_vertices)
+        vertex_index = face_vertices[face_of_corner, slot]
+
+        num_verts = len(mesh.vertices)
+        co = numpy.zeros(num_verts * 3, dtype=numpy.float32)
+        mesh.vertices.foreach_get('co', co)
+        vertex_normal = numpy.zeros(num_verts * 3, dtype=numpy.float32)
+        mesh.vertices.foreach_get('normal', vertex_normal)
+        face_normal = numpy.zeros(num_faces * 3, dtype=numpy.float32)
+        mesh.tessfaces.foreach_get('normal', face_normal)
+        smooth = numpy.zeros(num_faces, dtype=bool)
+        mesh.tessfaces.foreach_get('use_smooth', smooth)
+        material_index = numpy.zeros(num_faces, dtype=numpy.int32)
+        mesh.tessfaces.foreach_get('material_index', material_index)
+
+        columns = []
+        columns.append(co.reshape(-1, 3)[vertex_index])
+        columns.append(numpy.where(smooth[face_of_corner, None], vertex_normal.reshape(-1, 3)[vertex_index], face_normal.reshape(-1, 3)[face_of_corner]))
+
+        if len(mesh.tessface_vertex_colors) > 0:
+            color_data = mesh.tessface_vertex_colors[0].data
+            colors = numpy.zeros((num_faces, 4, 3), dtype=numpy.float32)
+            for i in range(4):
+                c = numpy.zeros(num_faces * 3, dtype=numpy.float32)
+                color_data.foreach_get('color' + str(i + 1), c)
+                colors[:, i] = c.reshape(-1, 3)
+            columns.append(colors[face_of_corner, slot])
+
+        for layer in mesh.tessface_uv_textures[:2]:
+            uvs = numpy.zeros(num_faces * 8, dtype=numpy.float32)
+            layer.data.foreach_get('uv_raw', uvs)
+            uv = uvs.reshape(-1, 4, 2)[face_of_corner, slot].astype(numpy.float64)
+            uv[:, 1] = 1.0 - uv[:, 1] # Reverse TCY
+            columns.append(uv)
+
+        rows = numpy.hstack(columns).astype(numpy.float64)
+        return rows, vertex_index, material_index[face_of_corner[::3]]
 
     def export_bone(self, armature, bone, scene, o, action):
         bobjectRef = self.bobjectArray.get(bone)
@@ -608,6 +366,8 @@ class ArmoryExporter:
 
             scene.frame_set(self.endFrame)
             tracko['values'] += self.write_matrix(bobject.matrix_local)
+            if ArmoryExporter.option_compress_animation:
+                tracko = anim_compress.compact_track(tracko['target'], tracko['times'], tracko['values'], ArmoryExporter.option_compress_tolerance)
             o['animation']['tracks'] = [tracko]
 
         scene.frame_set(currentFrame, currentSubframe)
@@ -621,23 +381,45 @@ class ArmoryExporter:
             end_frame = self.endFrame
         return begin_frame, end_frame
 
-    def export_bone_sampled_animation(self, poseBone, scene, o, action):
-        # This function exports bone animation as full 4x4 matrices for each frame.
+    def sample_skeleton(self, armature, scene, action):
+        # Walks the action frame range once and captures local matrices of all pose bones
         currentFrame = scene.frame_current
         currentSubframe = scene.frame_subframe
 
         # Frame range
         begin_frame, end_frame = self.get_action_framerange(action)
+        frame_count = end_frame - begin_frame + 1
+
+        pose_bones = armature.pose.bones
+        values = numpy.zeros((len(pose_bones), frame_count, 16))
+        rest = [poseBone.matrix.copy() for poseBone in pose_bones]
+        animated = [False] * len(pose_bones)
+
+        for f in range(frame_count):
+            scene.frame_set(begin_frame + f)
+            for b, poseBone in enumerate(pose_bones):
+                # Bone is animated if it moves before end frame
+                if f < frame_count - 1 and animated[b] == False and ArmoryExporter.matrices_different(rest[b], poseBone.matrix):
+                    animated[b] = True
+                parent = poseBone.parent
+                if parent:
+                    values[b, f] = self.write_matrix(parent.matrix.inverted() * poseBone.matrix)
+                else:
+                    values[b, f] = self.write_matrix(poseBone.matrix)
 
-        animationFlag = False
-        m1 = poseBone.matrix.copy()
+        scene.frame_set(currentFrame, currentSubframe)
 
-        for i in range(begin_frame, end_frame):
-            scene.frame_set(i)
-            m2 = poseBone.matrix
-            if ArmoryExporter.matrices_different(m1, m2):
-                animationFlag = True
-                break
+        self.bone_samples = {}
+        for b, poseBone in enumerate(pose_bones):
+            self.bone_samples[poseBone.name] = (animated[b], values[b])
+
+    def export_bone_sampled_animation(self, poseBone, scene, o, action):
+        # This function exports bone animation as full 4x4 matrices for each frame.
+        # Matrices were captured for all bones at once by sample_skeleton
+        animationFlag, values = self.bone_samples[poseBone.name]
+
+        # Frame range
+        begin_frame, end_frame = self.get_action_framerange(action)
 
         if animationFlag:
             o['animation'] = {}
@@ -650,28 +432,12 @@ class ArmoryExporter:
 
             tracko['times'].append((end_frame * self.frameTime))
 
-            tracko['values'] = []
-
-            parent = poseBone.parent
-            if parent:
-                for i in range(begin_frame, end_frame):
-                    scene.frame_set(i)
-                    tracko['values'] += self.write_matrix(parent.matrix.inverted() * poseBone.matrix)
-
-                scene.frame_set(end_frame)
-                tracko['values'] += self.write_matrix(parent.matrix.inverted() * poseBone.matrix)
+            if ArmoryExporter.option_compress_animation:
+                tracko = anim_compress.compact_track(tracko['target'], tracko['times'], values, ArmoryExporter.option_compress_tolerance)
             else:
-                for i in range(begin_frame, end_frame):
-                    scene.frame_set(i)
-                    tracko['values'] += self.write_matrix(poseBone.matrix)
-
-                scene.frame_set(end_frame)
-                tracko['values'] += self.write_matrix(poseBone.matrix)
+                tracko['values'] = values.ravel().tolist() # Continuos array of matrix transforms
             o['animation']['tracks'] = [tracko]
 
-        scene.frame_set(currentFrame, currentSubframe)
-
-
     def export_key_times(self, fcurve):
         keyo = []
         keyCount = len(fcurve.keyframe_points)
@@ -1075,7 +841,7 @@ class ArmoryExporter:
             
     def process_bone(self, bone):
         if ArmoryExporter.export_all_flag or bone.select:
-            self.bobjectArray[bone] = {"objectType" : NodeTypeBone, "structName" : bone.name}
+            self.add_node(bone, NodeTypeBone, bone.name)
 
         for subbobject in bone.children:
             self.process_bone(subbobject)
@@ -1087,7 +853,7 @@ class ArmoryExporter:
             if ArmoryExporter.option_mesh_only and btype != NodeTypeMesh:
                 return
 
-            self.bobjectArray[bobject] = {"objectType" : btype, "structName" : self.asset_name(bobject)}
+            self.add_node(bobject, btype, self.asset_name(bobject))
 
             if bobject.parent_type == "BONE":
                 boneSubbobjectArray = self.boneParentArray.get(bobject.parent_bone)
@@ -1108,15 +874,18 @@ class ArmoryExporter:
                 self.process_bobject(subbobject)
 
     def process_skinned_meshes(self):
-        for bobjectRef in self.bobjectArray.items():
-            if bobjectRef[1]["objectType"] == NodeTypeMesh:
-                armature = bobjectRef[0].find_armature()
-                if armature:
-                    for bone in armature.data.bones:
-                        boneRef = self.find_node(bone.name)
-                        if boneRef:
-                            # If an object is used as a bone, then we force its type to be a bone
-                            boneRef[1]["objectType"] = NodeTypeBone
+        armatures = set()
+        for bobject in self.nodes_of_type(NodeTypeMesh):
+            if self.bobjectArray[bobject]["objectType"] != NodeTypeMesh: # Turned into bone meanwhile
+                continue
+            armature = bobject.find_armature()
+            if armature and armature.data not in armatures:
+                armatures.add(armature.data) # Bones of shared armature are resolved once
+                for bone in armature.data.bones:
+                    boneRef = self.find_node(bone.name)
+                    if boneRef:
+                        # If an object is used as a bone, then we force its type to be a bone
+                        self.set_node_type(boneRef[0], NodeTypeBone)
 
     def export_bone_transform(self, armature, bone, scene, o, action):
         curveArray = self.collect_bone_animation(armature, bone.name)
@@ -1223,6 +992,10 @@ class ArmoryExporter:
         if self.preprocess_object(bobject) == False:
             return
 
+        # Exported as part of a static batch or instanced object
+        if bobject in self.batched_objects or bobject in self.instanced_objects:
+            return
+
         bobjectRef = self.bobjectArray.get(bobject)
         if bobjectRef:
             type = bobjectRef["objectType"]
@@ -1246,7 +1019,7 @@ class ArmoryExporter:
             if bobject.mobile == False:
                 o['mobile'] = False
 
-            if bobject.dupli_type == 'GROUP' and bobject.dupli_group != None:
+            if bobject.dupli_type == 'GROUP' and bobject.dupli_group != None and bobject.dupli_group not in self.instanced_dupli_groups:
                 o['group_ref'] = bobject.dupli_group.name
 
             if ArmoryExporter.option_spawn_all_layers == False:
@@ -1264,13 +1037,19 @@ class ArmoryExporter:
                 objname = self.asset_name(objref)
 
             # Lods
-            if bobject.type == 'MESH' and hasattr(objref, 'my_lodlist') and len(objref.my_lodlist) > 0:
+            if bobject.type == 'MESH' and hasattr(objref, 'my_lodlist') and len(objref.my_lodlist) > 0 and objref.lod_generate and bobject.find_armature() != None:
+                # Lod list holds no objects to reference
+                log.warn(bobject.name + ' - generated lods are not supported for skinned meshes, use lod objects instead')
+            elif bobject.type == 'MESH' and hasattr(objref, 'my_lodlist') and len(objref.my_lodlist) > 0:
                 o['lods'] = []
-                for l in objref.my_lodlist:
+                for level, l in enumerate(objref.my_lodlist):
                     if l.enabled_prop == False:
                         continue
                     lod = {}
-                    lod['object_ref'] = l.name
+                    if self.has_generated_lods(bobject):
+                        lod['data_ref'] = self.get_lod_data_ref(objref, arm.utils.safestr(objname), level)
+                    else:
+                        lod['object_ref'] = l.name
                     lod['screen_size'] = l.screen_size_prop
                     o['lods'].append(lod)
                 if objref.lod_material:
@@ -1412,6 +1191,11 @@ class ArmoryExporter:
                     fp = self.get_meshes_file_path('bones_' + armatureid + '_' + action.name, compressed=self.is_compress(bdata))
                     assets.add(fp)
                     if bdata.data_cached == False or not os.path.exists(fp):
+                        # Bones are sampled only if export_bone_transform will write animation
+                        self.bone_samples = {}
+                        if ArmoryExporter.sample_animation_flag or len(action.fcurves) > 0:
+                            with profiler.span(action.name, 'action'):
+                                self.sample_skeleton(bobject, scene, action)
                         bones = []
                         for bone in bdata.bones:
                             if not bone.parent:
@@ -1439,7 +1223,7 @@ class ArmoryExporter:
                 if subbobject.parent_type != "BONE":
                     self.export_object(subbobject, scene, None, o)
 
-    def export_skin_quality(self, bobject, armature, export_vertex_array, o):
+    def export_skin_quality(self, bobject, armature, vertex_indices, o):
         # This function exports all skinning data, which includes the skeleton
         # and per-vertex bone influence data
         oskin = {}
@@ -1477,61 +1261,34 @@ class ArmoryExporter:
             oskel['transforms'].append(self.write_matrix(armature.matrix_world * bone_array[i].matrix_local))
 
         # Export the per-vertex bone influence data
-        group_remap = []
-
-        for group in bobject.vertex_groups:
-            group_name = group.name
-            for i in range(bone_count):
-                if bone_array[i].name == group_name:
-                    group_remap.append(i)
-                    break
-            else:
-                group_remap.append(-1)
-
-        bone_count_array = []
-        bone_index_array = []
-        bone_weight_array = []
-
-        warn_bones = False
-        mesh_vertex_array = bobject.data.vertices
-        for ev in export_vertex_array:
-            bone_count = 0
-            total_weight = 0.0
-            bone_values = []
-            for element in mesh_vertex_array[ev.vertex_index].groups:
-                bone_index = group_remap[element.group]
-                bone_weight = element.weight
-                if bone_index >= 0 and bone_weight != 0.0:
-                    bone_values.append((bone_weight, bone_index))
-                    total_weight += bone_weight
-                    bone_count += 1
-
-            if bone_count > 4: # Four bones max
-                bone_count = 4
-                bone_values = bone_values[:4]
-                warn_bones = True
-            bone_count_array.append(bone_count)
-
-            # Take highest weights
-            for bv in reversed(sorted(bone_values)):
-                bone_index_array.append(bv[1])
-                bone_weight_array.append(bv[0])
-            if total_weight != 0.0:
-                normalizer = 1.0 / total_weight
-                for i in range(0, bone_count):
-                    bone_weight_array[-i] *= normalizer
-
-        if warn_bones:
+        bone_index = {}
+        for i in range(bone_count):
+            bone_index[bone_array[i].name] = i
+        group_remap = [bone_index.get(group.name, -1) for group in bobject.vertex_groups]
+
+        # Gather weights once per mesh vertex, export vertices are gathered from the result
+        vertex_of = []
+        bone_of = []
+        weight_of = []
+        for v in bobject.data.vertices:
+            for element in v.groups:
+                vertex_of.append(v.index)
+                bone_of.append(group_remap[element.group])
+                weight_of.append(element.weight)
+        bones, weights, dropped = mesh_utils.skin_influences(vertex_of, bone_of, weight_of, len(bobject.data.vertices))
+        if dropped > 0:
             log.warn(bobject.name + ' - more than 4 bones influence single vertex - taking highest weights')
 
-        # Write the bone count array. There is one entry per vertex.
-        oskin['bone_count_array'] = bone_count_array
+        vertex_indices = numpy.asarray(vertex_indices, dtype=numpy.int64)
+
+        # Write the bone count array. There is one entry per vertex, four influences each with unused ones zero weighted.
+        oskin['bone_count_array'] = [4] * len(vertex_indices)
 
-        # Write the bone index array. The number of entries is the sum of the bone counts for all vertices.
-        oskin['bone_index_array'] = bone_index_array
+        # Write the bone index array, four entries per vertex.
+        oskin['bone_index_array'] = bones[vertex_indices].ravel().tolist()
 
-        # Write the bone weight array. The number of entries is the sum of the bone counts for all vertices.
-        oskin['bone_weight_array'] = bone_weight_array
+        # Write the bone weight array, four entries per vertex.
+        oskin['bone_weight_array'] = weights[vertex_indices].ravel().tolist()
 
     # def export_skin_fast(self, bobject, armature, vert_list, o):
     #     oskin = {}
@@ -1569,73 +1326,16 @@ class ArmoryExporter:
     #     oskin['bone_index_array'] = bone_index_array
     #     oskin['bone_weight_array'] = bone_weight_array
 
-    def calc_tangents(self, posa, nora, uva, ia):
-        triangle_count = int(len(ia) / 3)
-        vertex_count = int(len(posa) / 3)
-        tangents = [0] * vertex_count * 3
-        # bitangents = [0] * vertex_count * 3
-        for i in range(0, triangle_count):
-            i0 = ia[i * 3 + 0]
-            i1 = ia[i * 3 + 1]
-            i2 = ia[i * 3 + 2]
-            # TODO: Slow
-            v0 = Vector((posa[i0 * 3 + 0], posa[i0 * 3 + 1], posa[i0 * 3 + 2]))
-            v1 = Vector((posa[i1 * 3 + 0], posa[i1 * 3 + 1], posa[i1 * 3 + 2]))
-            v2 = Vector((posa[i2 * 3 + 0], posa[i2 * 3 + 1], posa[i2 * 3 + 2]))
-            uv0 = Vector((uva[i0 * 2 + 0], uva[i0 * 2 + 1]))
-            uv1 = Vector((uva[i1 * 2 + 0], uva[i1 * 2 + 1]))
-            uv2 = Vector((uva[i2 * 2 + 0], uva[i2 * 2 + 1]))
-            
-            tangent = ArmoryExporter.calc_tangent(v0, v1, v2, uv0, uv1, uv2)
-            
-            tangents[i0 * 3 + 0] += tangent.x
-            tangents[i0 * 3 + 1] += tangent.y
-            tangents[i0 * 3 + 2] += tangent.z
-            tangents[i1 * 3 + 0] += tangent.x
-            tangents[i1 * 3 + 1] += tangent.y
-            tangents[i1 * 3 + 2] += tangent.z
-            tangents[i2 * 3 + 0] += tangent.x
-            tangents[i2 * 3 + 1] += tangent.y
-            tangents[i2 * 3 + 2] += tangent.z
-            # bitangents[i0 * 3 + 0] += bitangent.x
-            # bitangents[i0 * 3 + 1] += bitangent.y
-            # bitangents[i0 * 3 + 2] += bitangent.z
-            # bitangents[i1 * 3 + 0] += bitangent.x
-            # bitangents[i1 * 3 + 1] += bitangent.y
-            # bitangents[i1 * 3 + 2] += bitangent.z
-            # bitangents[i2 * 3 + 0] += bitangent.x
-            # bitangents[i2 * 3 + 1] += bitangent.y
-            # bitangents[i2 * 3 + 2] += bitangent.z
-        
-        # Orthogonalize
-        for i in range(0, vertex_count):
-            # Slow
-            t = Vector((tangents[i * 3], tangents[i * 3 + 1], tangents[i * 3 + 2]))
-            # b = Vector((bitangents[i * 3], bitangents[i * 3 + 1], bitangents[i * 3 + 2]))
-            n = Vector((nora[i * 3], nora[i * 3 + 1], nora[i * 3 + 2]))
-            v = t - n * n.dot(t)
-            v.normalize()
-            # Calculate handedness
-            # cnv = n.cross(v)
-            # if cnv.dot(b) < 0.0:
-                # v = v * -1.0
-            tangents[i * 3] = v.x
-            tangents[i * 3 + 1] = v.y
-            tangents[i * 3 + 2] = v.z
-        return tangents
+    def calc_tangents(self, posa, nora, uva, index_arrays):
+        ias = [ia['values'] for ia in index_arrays]
+        return mesh_utils.calc_tangents(posa, nora, uva, ias).tolist()
 
     def write_mesh(self, bobject, fp, o):
         # One mesh data per file
         if ArmoryExporter.option_mesh_per_file:
-            mesh_obj = {}
-            mesh_obj['mesh_datas'] = [o]
-            arm.utils.write_arm(fp, mesh_obj)
-
+            mesh_export.write_mesh(fp, o, ArmoryExporter.option_minimize)
             bobject.data.mesh_cached = True
-            if bobject.type != 'FONT' and bobject.type != 'META':
-                bobject.data.mesh_cached_verts = len(bobject.data.vertices)
-                bobject.data.mesh_cached_edges = len(bobject.data.edges)
-        else:
+        else: # Not streamed, packed with the scene, option_mesh_per_file is currently always set
             self.output['mesh_datas'].append(o)
 
     def make_va(self, attrib, size, values):
@@ -1763,7 +1463,7 @@ class ArmoryExporter:
         
         # Make tangents
         if has_tang:
-            tanga_vals = self.calc_tangents(pa['values'], na['values'], ta['values'], o['index_arrays'][0]['values'])
+            tanga_vals = self.calc_tangents(pa['values'], na['values'], ta['values'], o['index_arrays'])
             tanga = self.make_va('tang', 3, tanga_vals)
             o['vertex_arrays'].append(tanga)
 
@@ -1779,6 +1479,7 @@ class ArmoryExporter:
 
         # Check if mesh is using instanced rendering
         is_instanced, instance_offsets = self.object_process_instancing(bobject, objectRef[1]["objectTable"])
+        instance_transforms = self.instanced_meshes.get(bobject.data)
 
         # No export necessary
         if ArmoryExporter.option_mesh_per_file:
@@ -1787,10 +1488,9 @@ class ArmoryExporter:
             if bobject.data.sdfgen:
                 sdf_path = fp.replace('/mesh_', '/sdf_')
                 assets.add(sdf_path)
-            if self.object_is_mesh_cached(bobject) == True and os.path.exists(fp):
-                return
-
-        print('Exporting mesh ' + self.asset_name(bobject.data))
+            if self.has_generated_lods(bobject):
+                for level in range(len(bobject.data.my_lodlist)):
+                    assets.add(self.get_meshes_file_path('mesh_' + self.get_lod_id(oid, level), compressed=self.is_compress(bobject.data)))
 
         o = {}
         o['name'] = oid
@@ -1851,58 +1551,6 @@ class ArmoryExporter:
         # Apply all modifiers to create a new mesh with tessfaces
         exportMesh = bobject.to_mesh(scene, apply_modifiers, "RENDER", True, False)
 
-        if exportMesh == None:
-            log.warn(oid + ' was not exported')
-            return
-
-        if len(exportMesh.uv_layers) > 2:
-            log.warn(oid + ' exceeds maximum of 2 UV Maps supported')
-
-        # Process meshes
-        if ArmoryExporter.option_optimize_mesh:
-            vert_list = self.export_mesh_quality(exportMesh, bobject, fp, o)
-            if armature:
-                self.export_skin_quality(bobject, armature, vert_list, o)
-        else:
-            vert_list = self.export_mesh_fast(exportMesh, bobject, fp, o)
-            if armature:
-                self.export_skin_quality(bobject, armature, vert_list, o)
-                # self.export_skin_fast(bobject, armature, vert_list, o)
-
-        # Save aabb
-        for va in o['vertex_arrays']:
-            if va['attrib'].startswith('pos'):
-                positions = va['values']
-                stride = 0
-                ar = va['attrib'].split('_')
-                for a in ar:
-                    if a == 'pos' or a == 'nor' or a == 'col' or a == 'tang':
-                        stride += 3
-                    elif a == 'tex' or a == 'tex1':
-                        stride += 2
-                    elif a == 'bone' or a == 'weight':
-                        stride += 4
-                aabb_min = [-0.01, -0.01, -0.01]
-                aabb_max = [0.01, 0.01, 0.01]
-                i = 0
-                while i < len(positions):
-                    if positions[i] > aabb_max[0]:
-                        aabb_max[0] = positions[i];
-                    if positions[i + 1] > aabb_max[1]:
-                        aabb_max[1] = positions[i + 1];
-                    if positions[i + 2] > aabb_max[2]:
-                        aabb_max[2] = positions[i + 2];
-                    if positions[i] < aabb_min[0]:
-                        aabb_min[0] = positions[i];
-                    if positions[i + 1] < aabb_min[1]:
-                        aabb_min[1] = positions[i + 1];
-                    if positions[i + 2] < aabb_min[2]:
-                        aabb_min[2] = positions[i + 2];
-                    i += stride;
-                if hasattr(bobject.data, 'mesh_aabb'):
-                    bobject.data.mesh_aabb = [abs(aabb_min[0]) + abs(aabb_max[0]), abs(aabb_min[1]) + abs(aabb_max[1]), abs(aabb_min[2]) + abs(aabb_max[2])]
-                break
-
         # Restore the morph state
         if shapeKeys:
             bobject.active_shape_key_index = activeShapeKeyIndex
@@ -1913,9 +1561,27 @@ class ArmoryExporter:
 
             mesh.update()
 
+        if exportMesh == None:
+            log.warn(oid + ' was not exported')
+            return
+
+        # No export necessary
+        if ArmoryExporter.option_mesh_per_file:
+            digest = self.mesh_digest(exportMesh, bobject, armature, instance_offsets if instance_transforms == None else instance_transforms)
+            if self.object_is_mesh_cached(bobject, fp, digest):
+                bpy.data.meshes.remove(exportMesh)
+                return
+
+        print('Exporting mesh ' + self.asset_name(bobject.data))
+
+        if len(exportMesh.uv_layers) > 2:
+            log.warn(oid + ' exceeds maximum of 2 UV Maps supported')
+
         # Save offset data for instanced rendering
         if is_instanced == True:
             o['instance_offsets'] = instance_offsets
+        if instance_transforms != None:
+            o['instance_transforms'] = instance_transforms
 
         # Export usage
         if bobject.data.dynamic_usage:
@@ -1924,7 +1590,45 @@ class ArmoryExporter:
         if bobject.data.sdfgen:
             o['sdf_ref'] = 'sdf_' + oid
 
+        # Interleaved vertex buffer layout, sdf generator reads separate arrays
+        structure = None
+        if ArmoryExporter.option_interleave_mesh and not bobject.data.sdfgen:
+            structure = self.get_vertex_structure(exportMesh)
+
+        # Process meshes
+        if ArmoryExporter.option_optimize_mesh:
+            job = self.extract_mesh_quality(exportMesh)
+            # Index building and writing continues in worker process, skinning and sdf need the result here
+            if self.mesh_pool != None and not armature and not bobject.data.sdfgen and not self.has_generated_lods(bobject):
+                future = self.mesh_pool.submit(mesh_export.export_mesh_job, fp, o, job, ArmoryExporter.option_minimize, structure, ArmoryExporter.option_compress_mesh, ArmoryExporter.option_vertex_cache, ArmoryExporter.option_cluster_size)
+                self.mesh_futures.append((bobject, o['name'], fp, digest, future))
+                return
+            vertex_indices = mesh_export.build_mesh_quality(o, job)
+        else:
+            vert_list = self.export_mesh_fast(exportMesh, bobject, fp, o)
+            vertex_indices = [v.vertex_index for v in vert_list]
+            # self.export_skin_fast(bobject, armature, vert_list, o)
+
+        if ArmoryExporter.option_vertex_cache:
+            order, acmr = mesh_export.optimize_vertex_order(o, ArmoryExporter.option_cluster_size)
+            self.report_acmr(o['name'], acmr)
+            vertex_indices = [vertex_indices[i] for i in order]
+
+        if armature:
+            self.export_skin_quality(bobject, armature, vertex_indices, o)
+
+        # Save aabb
+        aabb = mesh_export.calc_mesh_aabb(o)
+        if aabb != None and hasattr(bobject.data, 'mesh_aabb'):
+            bobject.data.mesh_aabb = aabb
+
+        if self.has_generated_lods(bobject):
+            self.export_mesh_lods(bobject, oid, o, structure)
+
+        self.finish_mesh_data(o, structure, not bobject.data.sdfgen)
         self.write_mesh(bobject, fp, o)
+        if ArmoryExporter.option_mesh_per_file:
+            self.mesh_cache[os.path.basename(fp)] = digest
 
         if bobject.data.sdfgen:
             # Copy input
@@ -1943,38 +1647,59 @@ class ArmoryExporter:
             os.remove('out.bin')
             os.remove(sdfgen_path + '/krom/mesh.arm')
 
-    def export_mesh_quality(self, exportMesh, bobject, fp, o):
-        # Triangulate mesh and remap vertices to eliminate duplicates
-        material_table = []
-        export_vertex_array = ArmoryExporter.deindex_mesh(exportMesh, material_table)
-        triangleCount = len(material_table)
+    def finish_mesh_data(self, o, structure, compress=True):
+        # Last steps on built mesh data before it is written
+        if ArmoryExporter.option_cluster_size > 0:
+            mesh_export.cluster_mesh(o, ArmoryExporter.option_cluster_size)
+        # Interleaved float buffer keeps full precision vertex data, only indices are narrowed
+        if ArmoryExporter.option_compress_mesh and compress:
+            mesh_export.compress_mesh(o, ArmoryExporter.option_minimize, structure == None)
+        if structure != None:
+            mesh_export.interleave_vertex_arrays(o, structure, ArmoryExporter.option_minimize)
 
-        indexTable = []
-        unifiedVA = ArmoryExporter.unify_vertices(export_vertex_array, indexTable)
+    def has_generated_lods(self, bobject):
+        # Lods simplified from mesh data, skinned meshes use lod objects only
+        return bobject.data.lod_generate and len(bobject.data.my_lodlist) > 0 and bobject.find_armature() == None
 
-        # Write the position array
-        o['vertex_arrays'] = []
-        pa = self.make_va('pos', 3, self.write_va3d(unifiedVA, "position"))
-        o['vertex_arrays'].append(pa)
-        
-        # Write the normal array
-        na = self.make_va('nor', 3, self.write_va3d(unifiedVA, "normal"))
-        o['vertex_arrays'].append(na)
+    def get_triangle_count(self, o):
+        return sum([len(ia['values']) // 3 for ia in o['index_arrays']])
 
-        # Write the color array if it exists
-        color_count = len(exportMesh.tessface_vertex_colors)
-        if self.get_export_vcols(exportMesh) == True and color_count > 0:
-            ca = self.make_va('col', 3, self.write_va3d(unifiedVA, "color"))
-            o['vertex_arrays'].append(ca)
+    def get_lod_id(self, oid, level):
+        return oid + '_LOD' + str(level + 1)
 
-        # Write the texcoord arrays
-        texcoordCount = len(exportMesh.tessface_uv_textures)
-        if self.get_export_uvs(exportMesh) == True and texcoordCount > 0:
-            ta = self.make_va('tex', 2, self.write_va2d(unifiedVA, "texcoord0"))
-            o['vertex_arrays'].append(ta)
-            if texcoordCount > 1:
-                ta2 = self.make_va('tex1', 2, self.write_va2d(unifiedVA, "texcoord1"))
-                o['vertex_arrays'].append(ta2)
+    def get_lod_data_ref(self, objref, oid, level):
+        lod_id = self.get_lod_id(oid, level)
+        if ArmoryExporter.option_mesh_per_file:
+            ext = '.zip' if self.is_compress(objref) else ''
+            return 'mesh_' + lod_id + ext + '/' + lod_id
+        return lod_id
+
+    def export_mesh_lods(self, bobject, oid, o, structure):
+        # Each level is simplified from the previous one by arm_lod_gen_ratio
+        ratio = bpy.data.worlds['Arm'].arm_lod_gen_ratio
+        lod_o = o
+        for level in range(len(bobject.data.my_lodlist)):
+            target = int(self.get_triangle_count(lod_o) * ratio)
+            lod_o = mesh_simplify.simplify(lod_o, ratio)
+            if self.get_triangle_count(lod_o) > target:
+                log.warn(bobject.name + ' - lod ' + str(level + 1) + ' reduced to ' + str(self.get_triangle_count(lod_o)) + ' triangles, target was ' + str(target))
+            lod_o['name'] = self.get_lod_id(oid, level)
+            # Written data is a copy, next level is simplified from unprocessed lod_o
+            out = copy.deepcopy(lod_o)
+            self.finish_mesh_data(out, structure)
+            fp = self.get_meshes_file_path('mesh_' + lod_o['name'], compressed=self.is_compress(bobject.data))
+            self.write_mesh(bobject, fp, out)
+
+    def extract_mesh_quality(self, exportMesh):
+        # Triangulate mesh, vertices are unified later by build_mesh_quality
+        # Gathers everything export_mesh_job needs from bpy, exportMesh is removed afterwards
+        job = {}
+        job['rows'], job['vertex_index'], job['material_table'] = ArmoryExporter.deindex_mesh_columns(exportMesh)
+        job['has_col'] = len(exportMesh.tessface_vertex_colors) > 0
+        job['export_vcols'] = self.get_export_vcols(exportMesh)
+        job['uv_count'] = len(exportMesh.tessface_uv_textures)
+        job['export_uvs'] = self.get_export_uvs(exportMesh)
+        job['export_tangents'] = self.has_tangents(exportMesh)
 
         # If there are multiple morph targets, export them here
         # if shapeKeys:
@@ -2020,53 +1745,9 @@ class ArmoryExporter:
 
         #       bpy.data.meshes.remove(morphMesh)
 
-        # Write the index arrays
-        o['index_arrays'] = []
-
-        maxMaterialIndex = 0
-        for i in range(len(material_table)):
-            index = material_table[i]
-            if index > maxMaterialIndex:
-                maxMaterialIndex = index
-
-        if maxMaterialIndex == 0:
-            # There is only one material, so write a single index array.
-            ia = {}
-            ia['size'] = 3
-            ia['values'] = self.write_triangle_array(triangleCount, indexTable)
-            ia['material'] = 0
-            o['index_arrays'].append(ia)
-        else:
-            # If there are multiple material indexes, then write a separate index array for each one.
-            materialTriangleCount = [0 for i in range(maxMaterialIndex + 1)]
-            for i in range(len(material_table)):
-                materialTriangleCount[material_table[i]] += 1
-
-            for m in range(maxMaterialIndex + 1):
-                if materialTriangleCount[m] != 0:
-                    materialIndexTable = []
-                    for i in range(len(material_table)):
-                        if material_table[i] == m:
-                            k = i * 3
-                            materialIndexTable.append(indexTable[k])
-                            materialIndexTable.append(indexTable[k + 1])
-                            materialIndexTable.append(indexTable[k + 2])
-
-                    ia = {}
-                    ia['size'] = 3
-                    ia['values'] = self.write_triangle_array(materialTriangleCount[m], materialIndexTable)
-                    ia['material'] = m
-                    o['index_arrays'].append(ia)   
-
-        # Export tangents
-        if self.has_tangents(exportMesh):
-            tanga_vals = self.calc_tangents(pa['values'], na['values'], ta['values'], o['index_arrays'][0]['values'])  
-            tanga = self.make_va('tang', 3, tanga_vals)
-            o['vertex_arrays'].append(tanga)
-
         # Delete the new mesh that we made earlier
         bpy.data.meshes.remove(exportMesh)
-        return unifiedVA
+        return job
 
     def export_lamp(self, objectRef):
         # This function exports a single lamp object
@@ -2276,7 +1957,8 @@ class ArmoryExporter:
             mat_users = self.materialToObjectDict
             mat_armusers = self.materialToArmObjectDict
             rid = ArmoryExporter.renderpath_id
-            sd, rpasses = make_material.parse(material, o, mat_users, mat_armusers, rid)
+            with profiler.span(material.name, 'material'):
+                sd, rpasses = make_material.parse(material, o, mat_users, mat_armusers, rid)
 
             if 'translucent' in rpasses:
                 transluc_used = True
@@ -2413,9 +2095,366 @@ class ArmoryExporter:
                 self.export_camera(objectRef)
             for objectRef in self.speakerArray.items():
                 self.export_speaker(objectRef)
-        for objectRef in self.meshArray.items():
-            self.output['mesh_datas'] = [];
-            self.do_export_mesh(objectRef, scene)
+        self.load_mesh_cache()
+        self.acmr_total = [0.0, 0.0, 0]
+        self.start_mesh_pool()
+        try:
+            for objectRef in self.meshArray.items():
+                self.output['mesh_datas'] = [];
+                with profiler.span(objectRef[1]["structName"], 'mesh'):
+                    self.do_export_mesh(objectRef, scene)
+            for batch in self.static_batches:
+                with profiler.span(batch['name'], 'mesh'):
+                    self.export_static_batch_mesh(batch, scene)
+            with profiler.span('Mesh workers'):
+                self.finish_mesh_pool()
+        finally:
+            self.stop_mesh_pool()
+        if self.acmr_total[2] > 0:
+            print('Meshes - ACMR {0:.3f} -> {1:.3f}'.format(self.acmr_total[0] / self.acmr_total[2], self.acmr_total[1] / self.acmr_total[2]))
+        self.save_mesh_cache()
+
+    def start_mesh_pool(self):
+        # Meshes are extracted from bpy on the main thread, then built and written in worker processes
+        # Experimental and off by default, only slowdowns (0.8x, 0.88x) have been measured so far
+        self.mesh_pool = None
+        self.mesh_futures = []
+        if not ArmoryExporter.option_parallel_mesh or not ArmoryExporter.option_optimize_mesh or not ArmoryExporter.option_mesh_per_file:
+            return
+        self.mesh_pool_stack = contextlib.ExitStack()
+        self.mesh_pool = self.mesh_pool_stack.enter_context(arm.utils.process_pool())
+
+    def report_acmr(self, name, acmr):
+        # Cache miss ratio of optimized vertex order, totals are weighted by index count
+        before, after, index_count = acmr
+        if index_count == 0:
+            return
+        print('Mesh ' + name + ' - ACMR {0:.3f} -> {1:.3f}'.format(before, after))
+        self.acmr_total[0] += before * index_count
+        self.acmr_total[1] += after * index_count
+        self.acmr_total[2] += index_count
+
+    def finish_mesh_pool(self):
+        if self.mesh_pool == None:
+            return
+        for bobject, name, fp, digest, future in self.mesh_futures:
+            aabb, acmr = future.result()
+            if acmr != None:
+                self.report_acmr(name, acmr)
+            if aabb != None and hasattr(bobject.data, 'mesh_aabb'):
+                bobject.data.mesh_aabb = aabb
+            bobject.data.mesh_cached = True
+            self.mesh_cache[os.path.basename(fp)] = digest
+
+    def stop_mesh_pool(self):
+        # Also reached if export failed, meshes not yet started are dropped and running ones are waited for
+        if self.mesh_pool == None:
+            return
+        for bobject, name, fp, digest, future in self.mesh_futures:
+            future.cancel()
+        self.mesh_pool_stack.close() # Waits for running meshes
+        self.mesh_pool = None
+        self.mesh_futures = []
+
+    def is_static_mesh(self, bobject, spawned=True):
+        # Static meshes without anything moving or referencing them individually
+        # Group members are checked with spawned False, these are usually kept on hidden layers
+        if bobject.type != 'MESH' or bobject.mobile or bobject.parent != None or len(bobject.children) > 0:
+            return False
+        if not self.preprocess_object(bobject) or bobject.hide_render or not bobject.game_visible:
+            return False
+        if spawned:
+            if bobject not in self.bobjectTypes.get(NodeTypeMesh, ()) or not bobject.spawn:
+                return False
+            if ArmoryExporter.option_spawn_all_layers == False and not any(bobject.layers[l] for l in self.active_layers):
+                return False
+        if bobject.animation_data != None or bobject.find_armature() != None or bobject.rigid_body != None:
+            return False
+        if len(bobject.my_traitlist) > 0 or len(bobject.constraints) > 0 or len(bobject.particle_systems) > 0:
+            return False
+        if bobject.dupli_type != 'NONE' or bobject.instanced_children or bobject.override_material:
+            return False
+        if len(bobject.material_slots) == 0:
+            return False
+        for slot in bobject.material_slots:
+            if slot.material == None or slot.material.decal:
+                return False
+        if len(bobject.data.my_lodlist) > 0 or bobject.data.dynamic_usage or bobject.data.sdfgen:
+            return False
+        # Mirrored transforms would flip winding
+        return bobject.matrix_world.determinant() > 0.0
+
+    def is_static_batchable(self, bobject):
+        if bobject in self.instanced_objects or not self.is_static_mesh(bobject) or len(bobject.material_slots) != 1:
+            return False
+        # Group members are spawned by name through group_ref, unless the group is replaced by instancing
+        for group in bobject.users_group:
+            if group not in self.instanced_dupli_groups:
+                return False
+        return True
+
+    def collect_instances(self):
+        # Objects sharing mesh data and materials, including dupli group members, are replaced
+        # by a single object drawing all of them instanced with full transforms
+        self.instance_groups = []
+        self.instanced_objects = set()
+        self.instanced_meshes = {}
+        self.instanced_dupli_groups = set()
+        if not ArmoryExporter.option_auto_instancing:
+            return
+
+        empties = {} # Dupli group - empties instancing it
+        for bobject in self.scene.objects:
+            if bobject.dupli_type == 'GROUP' and bobject.dupli_group != None and bobject in self.bobjectArray and self.preprocess_object(bobject):
+                if bobject.dupli_group not in empties:
+                    empties[bobject.dupli_group] = []
+                empties[bobject.dupli_group].append(bobject)
+
+        # Mesh data drawn by any object which can not be instanced
+        blocked = set()
+        for bobject in self.scene.objects:
+            if bobject.type != 'MESH' or bobject.data == None or bobject not in self.bobjectArray or not self.preprocess_object(bobject):
+                continue
+            if len(bobject.modifiers) > 0 or not self.is_static_mesh(bobject, False): # Instances share the evaluated mesh
+                blocked.add(bobject.data)
+            elif not self.is_static_mesh(bobject) and len(bobject.users_group) == 0: # Not spawned, may be added later
+                blocked.add(bobject.data)
+
+        # Groups are instanced only if all of their meshes are, otherwise members are spawned by the group as before
+        while True:
+            groups = set()
+            for group in empties:
+                if all(self.is_static_mesh(m, False) and len(m.modifiers) == 0 and m.data not in blocked for m in group.objects):
+                    groups.add(group)
+                else:
+                    blocked.update([m.data for m in group.objects if m.type == 'MESH'])
+            instances, rejected = self.find_instances(groups, empties, blocked)
+            if len(rejected) == 0:
+                break
+            blocked.update(rejected)
+
+        self.instanced_dupli_groups = groups
+        for mesh in sorted(instances, key=lambda m: m.name):
+            users = instances[mesh]
+            bmin = None
+            bmax = None
+            for bobject, matrix in users:
+                for c in bobject.bound_box:
+                    p = matrix * Vector(c)
+                    if bmin == None:
+                        bmin = p.copy()
+                        bmax = p.copy()
+                    for i in range(3):
+                        bmin[i] = min(bmin[i], p[i])
+                        bmax[i] = max(bmax[i], p[i])
+            center = (bmin + bmax) / 2.0
+            # Position, rotation quaternion (x, y, z, w) and scale relative to instanced object
+            transforms = []
+            for bobject, matrix in users:
+                loc, rot, scale = (Matrix.Translation(-center) * matrix).decompose()
+                transforms += [loc.x, loc.y, loc.z, rot.x, rot.y, rot.z, rot.w, scale.x, scale.y, scale.z]
+                self.instanced_objects.add(bobject)
+            self.instanced_meshes[mesh] = transforms
+            instance_group = {}
+            instance_group['name'] = arm.utils.safestr(self.asset_name(mesh)) + '_instanced'
+            instance_group['mesh'] = mesh
+            instance_group['object'] = users[0][0]
+            instance_group['center'] = center
+            instance_group['dimensions'] = list(bmax - bmin)
+            self.instance_groups.append(instance_group)
+
+    def find_instances(self, groups, empties, blocked):
+        # Returns world matrix of each instance by mesh data, and meshes which can not be instanced
+        instances = {}
+        for group in groups:
+            for empty in empties[group]:
+                for m in group.objects:
+                    matrix = empty.matrix_world * Matrix.Translation(-group.dupli_offset) * m.matrix_world
+                    instances.setdefault(m.data, []).append((m, matrix))
+        grouped = set(instances.keys())
+        for bobject in self.scene.objects:
+            if bobject.type == 'MESH' and bobject.data not in blocked and self.is_static_mesh(bobject):
+                instances.setdefault(bobject.data, []).append((bobject, bobject.matrix_world))
+
+        rejected = set()
+        for mesh in list(instances.keys()):
+            users = instances[mesh]
+            materials = [tuple([slot.material for slot in u[0].material_slots]) for u in users]
+            if any(m != materials[0] for m in materials): # Instances are drawn with a single material set
+                if mesh in grouped:
+                    rejected.add(mesh)
+                del instances[mesh]
+            elif len(users) < 2 and mesh not in grouped:
+                del instances[mesh]
+        return instances, rejected
+
+    def export_instanced_object(self, instance_group):
+        # Object drawing all instances of mesh, placed in instances center
+        bobject = instance_group['object']
+        mesh = instance_group['mesh']
+        o = {}
+        o['traits'] = []
+        o['type'] = 'mesh_object'
+        o['name'] = instance_group['name']
+        o['mobile'] = False
+        if not mesh in self.meshArray:
+            self.meshArray[mesh] = {"structName" : self.asset_name(mesh), "objectTable" : [bobject]}
+        oid = arm.utils.safestr(self.meshArray[mesh]["structName"])
+        if ArmoryExporter.option_mesh_per_file:
+            ext = '.zip' if self.is_compress(mesh) else ''
+            o['data_ref'] = 'mesh_' + oid + ext + '/' + oid
+        else:
+            o['data_ref'] = oid
+        o['material_refs'] = []
+        for i in range(len(bobject.material_slots)):
+            material = bobject.material_slots[i].material
+            self.export_material_ref(bobject, material, i, o)
+            if material in self.materialToObjectDict:
+                self.materialToObjectDict[material].append(bobject)
+                self.materialToArmObjectDict[material].append(o)
+            else:
+                self.materialToObjectDict[material] = [bobject]
+                self.materialToArmObjectDict[material] = [o]
+        o['transform'] = {}
+        o['transform']['values'] = self.write_matrix(Matrix.Translation(instance_group['center']))
+        o['dimensions'] = instance_group['dimensions']
+        self.output['objects'].append(o)
+
+    def collect_static_batches(self):
+        # Groups batchable objects by material, vertex structure and spatial cell, groups of a single object are left as is
+        self.static_batches = []
+        self.batched_objects = set()
+        if not ArmoryExporter.option_static_batching:
+            return
+        cell_size = ArmoryExporter.option_batch_cell_size
+        groups = {}
+        for bobject in self.scene.objects:
+            if not self.is_static_batchable(bobject):
+                continue
+            corners = [bobject.matrix_world * Vector(c) for c in bobject.bound_box]
+            center = sum(corners, Vector()) / 8.0
+            cell = (math.floor(center.x / cell_size), math.floor(center.y / cell_size), math.floor(center.z / cell_size))
+            key = (bobject.material_slots[0].material.name, cell, self.get_batch_structure(bobject.data))
+            if key not in groups:
+                groups[key] = []
+            groups[key].append((bobject.name, bobject, corners))
+        for key in sorted(groups):
+            group = sorted(groups[key], key=lambda g: g[0])
+            if len(group) < 2:
+                continue
+            bmin = Vector(group[0][2][0])
+            bmax = Vector(group[0][2][0])
+            for name, bobject, corners in group:
+                for c in corners:
+                    for i in range(3):
+                        bmin[i] = min(bmin[i], c[i])
+                        bmax[i] = max(bmax[i], c[i])
+                self.batched_objects.add(bobject)
+            batch = {}
+            batch['name'] = arm.utils.safestr(key[0]) + '_batch' + str(len(self.static_batches))
+            batch['objects'] = [g[1] for g in group]
+            batch['center'] = (bmin + bmax) / 2.0
+            self.static_batches.append(batch)
+
+    def get_batch_structure(self, mesh):
+        # Exported uv layer count, vertex colors and tangents, meshes are only merged with matching vertex arrays
+        uv_count = min(len(mesh.uv_layers), 2) if self.get_export_uvs(mesh) else 0
+        has_col = self.get_export_vcols(mesh) and len(mesh.vertex_colors) > 0
+        return (uv_count, has_col, self.has_tangents(mesh))
+
+    def export_static_batch(self, batch):
+        # Object replacing all objects of batch, placed in batch center
+        bobject = batch['objects'][0]
+        material = bobject.material_slots[0].material
+        bid = batch['name']
+        o = {}
+        o['traits'] = []
+        o['type'] = 'mesh_object'
+        o['name'] = bid
+        o['mobile'] = False
+        if ArmoryExporter.option_mesh_per_file:
+            ext = '.zip' if self.is_compress(bobject.data) else ''
+            o['data_ref'] = 'mesh_' + bid + ext + '/' + bid
+        else:
+            o['data_ref'] = bid
+        o['material_refs'] = []
+        self.export_material_ref(bobject, material, 0, o)
+        o['transform'] = {}
+        o['transform']['values'] = self.write_matrix(Matrix.Translation(batch['center']))
+        o['dimensions'] = [0.0, 0.0, 0.0] # Set once mesh is built
+        if material in self.materialToObjectDict:
+            self.materialToObjectDict[material].append(bobject)
+            self.materialToArmObjectDict[material].append(o)
+        else:
+            self.materialToObjectDict[material] = [bobject]
+            self.materialToArmObjectDict[material] = [o]
+        self.output['objects'].append(o)
+        batch['object'] = o
+
+    def export_static_batch_mesh(self, batch, scene):
+        # Bakes transforms relative to batch center and merges meshes of batch into a single mesh data
+        bid = batch['name']
+        first = batch['objects'][0]
+        fp = self.get_meshes_file_path('mesh_' + bid, compressed=self.is_compress(first.data))
+        if ArmoryExporter.option_mesh_per_file:
+            assets.add(fp)
+        to_center = Matrix.Translation(-batch['center'])
+
+        meshes = []
+        h = hashlib.md5()
+        for bobject in batch['objects']:
+            exportMesh = bobject.to_mesh(scene, True, "RENDER", True, False)
+            if exportMesh == None:
+                continue
+            matrix = to_center * bobject.matrix_world
+            exportMesh.transform(matrix)
+            exportMesh.calc_normals() # Transform leaves vertex normals untouched
+            meshes.append(exportMesh)
+            if ArmoryExporter.option_mesh_per_file:
+                h.update(self.mesh_digest(exportMesh, bobject, None, None).encode('utf-8'))
+                h.update(repr(self.write_matrix(matrix)).encode('utf-8'))
+        digest = h.hexdigest()
+
+        if len(meshes) == 0:
+            return
+
+        # Mesh aabb is needed for object dimensions even if batch is cached
+        aabb_min = numpy.full(3, numpy.inf)
+        aabb_max = numpy.full(3, -numpy.inf)
+        for exportMesh in meshes:
+            co = numpy.zeros(len(exportMesh.vertices) * 3, dtype=numpy.float32)
+            exportMesh.vertices.foreach_get('co', co)
+            if len(co) > 0:
+                co = co.reshape(-1, 3)
+                aabb_min = numpy.minimum(aabb_min, co.min(axis=0))
+                aabb_max = numpy.maximum(aabb_max, co.max(axis=0))
+        if numpy.isinf(aabb_min[0]): # No vertices
+            aabb_min = aabb_max = numpy.zeros(3)
+        batch['object']['dimensions'] = (aabb_max - aabb_min).tolist()
+
+        if ArmoryExporter.option_mesh_per_file and self.mesh_cache.get(os.path.basename(fp)) == digest and os.path.exists(fp):
+            for exportMesh in meshes:
+                bpy.data.meshes.remove(exportMesh)
+            return
+
+        print('Exporting batch ' + bid + ' of ' + str(len(meshes)) + ' meshes')
+        structure = None
+        if ArmoryExporter.option_interleave_mesh:
+            structure = self.get_vertex_structure(meshes[0])
+        parts = []
+        for exportMesh in meshes:
+            part = {}
+            mesh_export.build_mesh_quality(part, self.extract_mesh_quality(exportMesh))
+            parts.append(part)
+        o = mesh_export.merge_meshes(parts)
+        o['name'] = bid
+        if ArmoryExporter.option_vertex_cache:
+            order, acmr = mesh_export.optimize_vertex_order(o, ArmoryExporter.option_cluster_size)
+            self.report_acmr(bid, acmr)
+        self.finish_mesh_data(o, structure)
+        self.write_mesh(first, fp, o)
+        if ArmoryExporter.option_mesh_per_file:
+            self.mesh_cache[os.path.basename(fp)] = digest
 
     def execute(self, context, filepath, scene=None):
         profile_time = time.time()
@@ -2433,6 +2472,9 @@ class ArmoryExporter:
         self.frameTime = 1.0 / (self.scene.render.fps_base * self.scene.render.fps)
 
         self.bobjectArray = {}
+        self.bobjectNames = {} # Name - first registered object or bone
+        self.bobjectTypes = {} # Node type - objects and bones in registration order
+        self.node_lookups = 0
         self.meshArray = {}
         self.lampArray = {}
         self.cameraArray = {}
@@ -2452,7 +2494,8 @@ class ArmoryExporter:
             if self.scene.layers[i] == True:
                 self.active_layers.append(i)
 
-        self.preprocess()
+        with profiler.span('Preprocess'):
+            self.preprocess()
 
         for bobject in self.scene.objects:
             # Map objects to game objects
@@ -2464,6 +2507,8 @@ class ArmoryExporter:
                 self.process_bobject(bobject)
 
         self.process_skinned_meshes()
+        self.collect_instances()
+        self.collect_static_batches()
 
         self.output['name'] = arm.utils.safestr(self.scene.name)
         if self.filepath.endswith('.zip'):
@@ -2497,7 +2542,12 @@ class ArmoryExporter:
         self.output['objects'] = []
         for bo in self.scene.objects:
             if not bo.parent:
-                self.export_object(bo, self.scene)
+                with profiler.span(bo.name, 'object'):
+                    self.export_object(bo, self.scene)
+        for instance_group in self.instance_groups:
+            self.export_instanced_object(instance_group)
+        for batch in self.static_batches:
+            self.export_static_batch(batch)
 
         if len(bpy.data.groups) > 0:
             self.output['groups'] = []
@@ -2517,7 +2567,8 @@ class ArmoryExporter:
                     print('Armory Warning: No camera found in active scene')
 
             self.output['material_datas'] = []
-            self.export_materials()
+            with profiler.span('Materials'):
+                self.export_materials()
 
             # Ensure same vertex structure for object materials
             if not bpy.data.worlds['Arm'].arm_deinterleaved_buffers:
@@ -2549,7 +2600,8 @@ class ArmoryExporter:
 
             self.output['gravity'] = [self.scene.gravity[0], self.scene.gravity[1], self.scene.gravity[2]]
 
-        self.export_objects(self.scene)
+        with profiler.span('Meshes'):
+            self.export_objects(self.scene)
         
         if not self.camera_spawned:
             log.warn('No camera found in active scene layers')
@@ -2580,6 +2632,8 @@ class ArmoryExporter:
                 self.output['embedded_datas'].append(file)
 
         # Write scene file
+        # Only mesh datas are streamed as they are built, see write_mesh. Objects are still modified after
+        # export_object by material export and scene traits, so the scene dict is packed once complete
         arm.utils.write_arm(self.filepath, self.output)
 
         # Remove created material variants
@@ -2590,18 +2644,127 @@ class ArmoryExporter:
         for mat in matvars:
             bpy.data.materials.remove(mat, do_unlink=True)
 
-        print('Scene built in ' + str(time.time() - profile_time))
+        print('Scene built in ' + str(time.time() - profile_time) + ', ' + str(self.node_lookups) + ' object lookups')
         return {'FINISHED'}
 
     # Callbacks
-    def object_is_mesh_cached(self, bobject):
-        if bobject.type == 'FONT' or bobject.type == 'META': # No verts
-            return bobject.data.mesh_cached
-        if bobject.data.mesh_cached_verts != len(bobject.data.vertices):
-            return False
-        if bobject.data.mesh_cached_edges != len(bobject.data.edges):
+    def object_is_mesh_cached(self, bobject, fp, digest):
+        if bobject.data.mesh_cached == False or not os.path.exists(fp):
             return False
-        return bobject.data.mesh_cached
+        return self.mesh_cache.get(os.path.basename(fp)) == digest
+
+    def get_mesh_cache_path(self):
+        return self.get_meshes_file_path('cache').rsplit('.', 1)[0] + '.json'
+
+    def load_mesh_cache(self):
+        # Digests of exported mesh files, persists between builds
+        self.mesh_cache = {}
+        fp = self.get_mesh_cache_path()
+        if os.path.isfile(fp):
+            with open(fp) as f:
+                try:
+                    self.mesh_cache = json.load(f)
+                except ValueError:
+                    log.warn('Mesh cache corrupted, re-exporting meshes')
+
+    def save_mesh_cache(self):
+        if not ArmoryExporter.option_mesh_per_file:
+            return
+        with open(self.get_mesh_cache_path(), 'w') as f:
+            json.dump(self.mesh_cache, f, sort_keys=True)
+
+    def mesh_digest(self, exportMesh, bobject, armature, instance_offsets):
+        # Digest of evaluated mesh buffers and everything else written to the mesh file
+        h = hashlib.md5()
+        options = [ArmoryExporter.option_optimize_mesh, ArmoryExporter.option_minimize, self.is_compress(bobject.data),
+                   self.get_export_tangents(exportMesh), self.get_export_uvs(exportMesh), self.get_export_vcols(exportMesh),
+                   bobject.data.dynamic_usage, bobject.data.sdfgen, instance_offsets,
+                   self.get_vertex_structure(exportMesh) if ArmoryExporter.option_interleave_mesh else None,
+                   ArmoryExporter.option_compress_mesh, ArmoryExporter.option_vertex_cache,
+                   len(bobject.data.my_lodlist) if self.has_generated_lods(bobject) else 0, bpy.data.worlds['Arm'].arm_lod_gen_ratio,
+                   ArmoryExporter.option_cluster_size,
+                   [m.name if m != None else '' for m in exportMesh.materials]]
+        if armature:
+            bone_array = armature.data.bones
+            options.append(self.write_matrix(bobject.matrix_world))
+            options.append([(b.name, self.write_matrix(armature.matrix_world * b.matrix_local)) for b in bone_array])
+            options.append([g.name for g in bobject.vertex_groups])
+        if not ArmoryExporter.option_optimize_mesh:
+            options.append(exportMesh.use_auto_smooth)
+            options.append(exportMesh.auto_smooth_angle)
+        h.update(repr(options).encode('utf-8'))
+        if armature:
+            for values in ArmoryExporter.vertex_group_buffers(bobject.data):
+                h.update(values.tobytes())
+
+        num_verts = len(exportMesh.vertices)
+        buffers = [(exportMesh.vertices, 'co', num_verts * 3, numpy.float32)]
+        if ArmoryExporter.option_optimize_mesh:
+            # Tessfaces read by deindex_mesh_columns
+            num_faces = len(exportMesh.tessfaces)
+            buffers += [(exportMesh.vertices, 'normal', num_verts * 3, numpy.float32),
+                        (exportMesh.tessfaces, 'vertices_raw', num_faces * 4, numpy.int32),
+                        (exportMesh.tessfaces, 'normal', num_faces * 3, numpy.float32),
+                        (exportMesh.tessfaces, 'use_smooth', num_faces, bool),
+                        (exportMesh.tessfaces, 'material_index', num_faces, numpy.int32)]
+            for layer in exportMesh.tessface_uv_textures:
+                buffers.append((layer.data, 'uv_raw', num_faces * 8, numpy.float32))
+            for layer in exportMesh.tessface_vertex_colors:
+                for i in range(4):
+                    buffers.append((layer.data, 'color' + str(i + 1), num_faces * 3, numpy.float32))
+        else:
+            # Loops and split normals read by export_mesh_fast, covers auto smooth and custom normals
+            exportMesh.calc_normals_split()
+            num_loops = len(exportMesh.loops)
+            num_polys = len(exportMesh.polygons)
+            buffers += [(exportMesh.loops, 'vertex_index', num_loops, numpy.int32),
+                        (exportMesh.loops, 'normal', num_loops * 3, numpy.float32),
+                        (exportMesh.polygons, 'loop_start', num_polys, numpy.int32),
+                        (exportMesh.polygons, 'loop_total', num_polys, numpy.int32),
+                        (exportMesh.polygons, 'material_index', num_polys, numpy.int32)]
+            for layer in exportMesh.uv_layers:
+                buffers.append((layer.data, 'uv', num_loops * 2, numpy.float32))
+            for layer in exportMesh.vertex_colors:
+                buffers.append((layer.data, 'color', num_loops * 3, numpy.float32))
+        for collection, prop, count, dtype in buffers:
+            values = numpy.zeros(count, dtype=dtype)
+            collection.foreach_get(prop, values)
+            h.update(values.tobytes())
+        return h.hexdigest()
+
+    @staticmethod
+    def vertex_group_buffers(mesh):
+        # Group count per vertex and flat group indices and weights of all vertices
+        # Read with one foreach_get per vertex, there is no flat access to deform weights
+        num_verts = len(mesh.vertices)
+        counts = numpy.zeros(num_verts, dtype=numpy.int32)
+        groups = numpy.zeros(num_verts * 4, dtype=numpy.int32)
+        weights = numpy.zeros(num_verts * 4, dtype=numpy.float32)
+        pos = 0
+        for i, v in enumerate(mesh.vertices):
+            elements = v.groups
+            n = len(elements)
+            if n == 0:
+                continue
+            if pos + n > len(groups):
+                groups = numpy.resize(groups, (pos + n) * 2)
+                weights = numpy.resize(weights, (pos + n) * 2)
+            elements.foreach_get('group', groups[pos:pos + n])
+            elements.foreach_get('weight', weights[pos:pos + n])
+            counts[i] = n
+            pos += n
+        return counts, groups[:pos], weights[:pos]
+
+    def get_vertex_structure(self, mesh):
+        # Attrib names of the first material vertex structure, as collected by export_materials
+        for m in mesh.materials:
+            if m != None and m.vertex_structure != '':
+                structure = []
+                for name in m.vertex_structure.split(','):
+                    if name not in structure:
+                        structure.append(name)
+                return structure
+        return ['pos', 'nor']
 
     def get_export_tangents(self, mesh):
         for m in mesh.materials:
@@ -2668,11 +2831,21 @@ class ArmoryExporter:
         ArmoryExporter.option_mesh_only = False
         ArmoryExporter.option_mesh_per_file = True
         ArmoryExporter.option_optimize_mesh = bpy.data.worlds['Arm'].arm_optimize_mesh
+        ArmoryExporter.option_parallel_mesh = bpy.data.worlds['Arm'].arm_parallel_mesh
+        ArmoryExporter.option_interleave_mesh = bpy.data.worlds['Arm'].arm_interleaved_buffers and not bpy.data.worlds['Arm'].arm_deinterleaved_buffers
+        ArmoryExporter.option_compress_mesh = bpy.data.worlds['Arm'].arm_compress_vertex_data
+        ArmoryExporter.option_vertex_cache = bpy.data.worlds['Arm'].arm_optimize_vertex_cache
+        ArmoryExporter.option_static_batching = bpy.data.worlds['Arm'].arm_batch_static
+        ArmoryExporter.option_auto_instancing = bpy.data.worlds['Arm'].arm_instancing_auto
+        ArmoryExporter.option_batch_cell_size = bpy.data.worlds['Arm'].arm_batch_cell_size
+        ArmoryExporter.option_cluster_size = bpy.data.worlds['Arm'].arm_mesh_cluster_size if bpy.data.worlds['Arm'].arm_mesh_clusters else 0
         ArmoryExporter.option_export_hide_render = bpy.data.worlds['Arm'].arm_export_hide_render
         ArmoryExporter.option_spawn_all_layers = bpy.data.worlds['Arm'].arm_spawn_all_layers
         ArmoryExporter.option_minimize = bpy.data.worlds['Arm'].arm_minimize
         ArmoryExporter.option_sample_animation = bpy.data.worlds['Arm'].arm_sampled_animation
         ArmoryExporter.sample_animation_flag = ArmoryExporter.option_sample_animation
+        ArmoryExporter.option_compress_animation = bpy.data.worlds['Arm'].arm_compress_animation
+        ArmoryExporter.option_compress_tolerance = bpy.data.worlds['Arm'].arm_compress_animation_tolerance
 
         # Only one render path for scene for now
         # Used for material shader export and khafile
@@ -3013,7 +3186,8 @@ class ArmoryExporter:
                     generate_radiance = False
                 
                 texture_path = '//' + cam.probe_texture
-                cam.probe_num_mips = write_probes.write_probes(texture_path, disable_hdr, cam.probe_num_mips, generate_radiance=generate_radiance)
+                with profiler.span(cam.probe_texture, 'probe'):
+                    cam.probe_num_mips = write_probes.write_probes(texture_path, disable_hdr, cam.probe_num_mips, generate_radiance=generate_radiance)
                 base_name = cam.probe_texture.rsplit('.', 1)[0]
                 po = self.make_probe(cam.name, base_name, base_name, cam.probe_num_mips, cam.probe_strength, cam.probe_blending, volume, volume_center, generate_radiance, generate_irradiance, disable_hdr)
                 o['probes'].append(po)
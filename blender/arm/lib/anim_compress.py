@@ -0,0 +1,156 @@
+# Keyframe reduction and quantization of sampled transform tracks
+# Operates on flat matrix arrays only, no bpy access
+#
+# Compact track layout, written instead of a sampled 'transform' track:
+# {'target': 'transform', 'type': 'compact', 'translation': channel, 'rotation': channel, 'scale': channel}
+# channel: {'times': [key times], 'size': 3 or 4, 'min': [size], 'max': [size], 'values': [packed]}
+# Key values are quantized to 16 bit, q / 65535 maps to min..max per component.
+# Two consecutive quantized components are packed into one int, first one in the high half.
+# Channels whose range is too wide to quantize within tolerance have no 'min' and 'max',
+# their 'values' are the key components as floats.
+# Rotation keys are quaternions (x, y, z, w), to be interpolated with slerp or nlerp.
+import numpy
+
+def decompose(values):
+    # values - flat row major 4x4 matrices as written by write_matrix
+    # Returns translation (n, 3), rotation quaternion (n, 4) and scale (n, 3)
+    m = numpy.asarray(values, dtype=numpy.float64).reshape(-1, 4, 4)
+    translation = m[:, 0:3, 3]
+    basis = m[:, 0:3, 0:3]
+    scale = numpy.sqrt(numpy.einsum('nij,nij->nj', basis, basis))
+    rot = basis / numpy.where(scale > 0.0, scale, 1.0)[:, None, :]
+    # Mirrored basis, keep rotation proper
+    det = numpy.linalg.det(rot)
+    flip = det < 0.0
+    scale[flip, 0] *= -1.0
+    rot[flip, :, 0] *= -1.0
+    return translation, matrix_to_quaternion(rot), scale
+
+def matrix_to_quaternion(rot):
+    n = len(rot)
+    q = numpy.zeros((n, 4))
+    m00, m11, m22 = rot[:, 0, 0], rot[:, 1, 1], rot[:, 2, 2]
+    trace = m00 + m11 + m22
+
+    # Pick the numerically stable branch for each matrix
+    c0 = trace > 0.0
+    c1 = ~c0 & (m00 > m11) & (m00 > m22)
+    c2 = ~c0 & ~c1 & (m11 > m22)
+    c3 = ~c0 & ~c1 & ~c2
+
+    s = numpy.sqrt(numpy.maximum(trace[c0] + 1.0, 1e-12)) * 2.0
+    q[c0, 3] = 0.25 * s
+    q[c0, 0] = (rot[c0, 2, 1] - rot[c0, 1, 2]) / s
+    q[c0, 1] = (rot[c0, 0, 2] - rot[c0, 2, 0]) / s
+    q[c0, 2] = (rot[c0, 1, 0] - rot[c0, 0, 1]) / s
+
+    s = numpy.sqrt(numpy.maximum(1.0 + m00[c1] - m11[c1] - m22[c1], 1e-12)) * 2.0
+    q[c1, 3] = (rot[c1, 2, 1] - rot[c1, 1, 2]) / s
+    q[c1, 0] = 0.25 * s
+    q[c1, 1] = (rot[c1, 0, 1] + rot[c1, 1, 0]) / s
+    q[c1, 2] = (rot[c1, 0, 2] + rot[c1, 2, 0]) / s
+
+    s = numpy.sqrt(numpy.maximum(1.0 + m11[c2] - m00[c2] - m22[c2], 1e-12)) * 2.0
+    q[c2, 3] = (rot[c2, 0, 2] - rot[c2, 2, 0]) / s
+    q[c2, 0] = (rot[c2, 0, 1] + rot[c2, 1, 0]) / s
+    q[c2, 1] = 0.25 * s
+    q[c2, 2] = (rot[c2, 1, 2] + rot[c2, 2, 1]) / s
+
+    s = numpy.sqrt(numpy.maximum(1.0 + m22[c3] - m00[c3] - m11[c3], 1e-12)) * 2.0
+    q[c3, 3] = (rot[c3, 1, 0] - rot[c3, 0, 1]) / s
+    q[c3, 0] = (rot[c3, 0, 2] + rot[c3, 2, 0]) / s
+    q[c3, 1] = (rot[c3, 1, 2] + rot[c3, 2, 1]) / s
+    q[c3, 2] = 0.25 * s
+
+    q /= numpy.linalg.norm(q, axis=1)[:, None]
+
+    # Keep consecutive keys in the same hemisphere for interpolation
+    for i in range(1, n):
+        if numpy.dot(q[i - 1], q[i]) < 0.0:
+            q[i] = -q[i]
+    return q
+
+def segment_fits(times, keys, data, a, b, tolerance, normalize):
+    # True if data between a and b is reconstructed by interpolating keys a and b
+    if b - a < 2:
+        return True
+    span = times[b] - times[a]
+    if span <= 0.0:
+        return False
+    t = (times[a + 1:b] - times[a]) / span
+    interp = keys[a] + (keys[b] - keys[a]) * t[:, None]
+    if normalize:
+        interp /= numpy.linalg.norm(interp, axis=1)[:, None]
+    return numpy.abs(interp - data[a + 1:b]).max() <= tolerance
+
+def reduce_keys(times, data, tolerance, normalize=False, keys=None):
+    # Returns indices of keys to keep, dropped keys are linearly reconstructed within tolerance
+    # keys - values written for kept keys if they differ from data, e.g. dequantized data
+    if keys is None:
+        keys = data
+    n = len(data)
+    if n == 0:
+        return []
+    if numpy.abs(data - keys[0]).max() <= tolerance: # Constant channel
+        return [0]
+    keep = [0]
+    a = 0
+    while a < n - 1:
+        b = a + 1
+        while b + 1 < n and segment_fits(times, keys, data, a, b + 1, tolerance, normalize):
+            b += 1
+        keep.append(b)
+        a = b
+    return keep
+
+def quantize_components(data, lo, hi):
+    # Maps components to 0..65535 over lo..hi range
+    span = numpy.where(hi > lo, hi - lo, 1.0)
+    return numpy.round((data - lo) / span * 65535.0).astype(numpy.uint32)
+
+def dequantize(q, lo, hi):
+    # Component values as decoded by the runtime
+    return lo + q / 65535.0 * (hi - lo)
+
+def quantize(data, lo, hi):
+    # Quantizes components and packs pairs into ints
+    q = quantize_components(data, lo, hi).ravel()
+    if len(q) % 2 == 1:
+        q = numpy.append(q, numpy.uint32(0))
+    packed = (q[0::2] << numpy.uint32(16)) | q[1::2]
+    return packed.view(numpy.int32).tolist()
+
+def make_channel(times, data, tolerance, normalize=False, lo=None, hi=None):
+    if lo == None:
+        lo = data.min(axis=0)
+        hi = data.max(axis=0)
+    lo = numpy.asarray(lo, dtype=numpy.float64)
+    hi = numpy.asarray(hi, dtype=numpy.float64)
+    # Rounding error is half a quantization step, long root motion tracks would exceed tolerance
+    quantized = (hi - lo).max() / 65535.0 / 2.0 <= tolerance
+    # Reduction is checked against the values the runtime decodes, so quantization error is included
+    keys = dequantize(quantize_components(data, lo, hi), lo, hi) if quantized else data
+    kept = reduce_keys(times, data, tolerance, normalize, keys)
+    data = data[kept]
+    channel = {}
+    channel['times'] = times[kept].tolist()
+    channel['size'] = data.shape[1]
+    if not quantized:
+        channel['values'] = data.ravel().tolist()
+        return channel
+    channel['min'] = lo.tolist()
+    channel['max'] = hi.tolist()
+    channel['values'] = quantize(data, lo, hi)
+    return channel
+
+def compact_track(target, times, values, tolerance):
+    # Converts sampled matrix track into a reduced and quantized compact track
+    times = numpy.asarray(times, dtype=numpy.float64)
+    translation, rotation, scale = decompose(values)
+    tracko = {}
+    tracko['target'] = target
+    tracko['type'] = 'compact'
+    tracko['translation'] = make_channel(times, translation, tolerance)
+    tracko['rotation'] = make_channel(times, rotation, tolerance, True, [-1.0, -1.0, -1.0, -1.0], [1.0, 1.0, 1.0, 1.0])
+    tracko['scale'] = make_channel(times, scale, tolerance)
+    return tracko
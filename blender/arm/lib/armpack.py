@@ -22,6 +22,13 @@
 #
 import struct
 import io
+import sys
+import array
+
+_int32_code = 'i' if array.array('i').itemsize == 4 else 'l'
+
+# Typed array markers of numpy element types narrower than 32 bit, same codes as msgpack scalars
+_small_types = { 'i2': (b"\xd1", '>i2'), 'u2': (b"\xcd", '>u2'), 'i1': (b"\xd0", 'i1'), 'u1': (b"\xcc", 'u1') }
 
 def _pack_integer(obj, fp):
     if obj < 0:
@@ -85,45 +92,93 @@ def _pack_binary(obj, fp):
     else:
         raise Exception("huge binary string")
 
-def _pack_array(obj, fp):
-    if len(obj) <= 15:
-        fp.write(struct.pack("B", 0x90 | len(obj)))
-    elif len(obj) <= 2**16 - 1:
-        fp.write(b"\xdc" + struct.pack(">H", len(obj)))
-    elif len(obj) <= 2**32 - 1:
-        fp.write(b"\xdd" + struct.pack(">I", len(obj)))
+def _pack_array_header(length, fp):
+    if length <= 15:
+        fp.write(struct.pack("B", 0x90 | length))
+    elif length <= 2**16 - 1:
+        fp.write(b"\xdc" + struct.pack(">H", length))
+    elif length <= 2**32 - 1:
+        fp.write(b"\xdd" + struct.pack(">I", length))
     else:
         raise Exception("huge array")
 
+def _write_typed(a, fp):
+    # Armory typed arrays are big-endian
+    if sys.byteorder == 'little':
+        a.byteswap()
+    fp.write(a.tobytes())
+
+def _pack_array(obj, fp):
+    _pack_array_header(len(obj), fp)
+
     # Float32
     if len(obj) > 0 and isinstance(obj[0], float):
         fp.write(b"\xca")
-        for e in obj:
-            fp.write(struct.pack(">f", e))
+        _write_typed(array.array('f', obj), fp)
     # Int32
     elif len(obj) > 0 and isinstance(obj[0], int):
         fp.write(b"\xd2")
-        for e in obj:
-            fp.write(struct.pack(">i", e))
+        _write_typed(array.array(_int32_code, obj), fp)
     # Regular
     else:
         for e in obj:
             pack(e, fp)
 
-def _pack_map(obj, fp):
-    if len(obj) <= 15:
-        fp.write(struct.pack("B", 0x80 | len(obj)))
-    elif len(obj) <= 2**16 - 1:
-        fp.write(b"\xde" + struct.pack(">H", len(obj)))
-    elif len(obj) <= 2**32 - 1:
-        fp.write(b"\xdf" + struct.pack(">I", len(obj)))
+def _pack_buffer(obj, fp):
+    # Homogeneous array.array / memoryview / numpy buffer, packed in one pass
+    if isinstance(obj, memoryview):
+        obj = array.array(obj.format, obj.tobytes())
+    if isinstance(obj, array.array):
+        if obj.typecode in 'fd':
+            code = 'f'
+        elif obj.typecode in 'bBhHiIlLqQ':
+            code = _int32_code
+        else:
+            raise Exception("unsupported typecode: %s" % obj.typecode)
+        data = array.array(code, obj) # Copy, byteswap is done in place
+    else: # numpy
+        data = obj.ravel()
+        code = 'f' if data.dtype.kind == 'f' else _int32_code
+        # Quantized data keeps its 16 and 8 bit element type
+        if data.dtype.str[1:] in _small_types:
+            _pack_array_header(len(data), fp)
+            if len(data) > 0:
+                marker, dtype = _small_types[data.dtype.str[1:]]
+                fp.write(marker)
+                fp.write(data.astype(dtype).tobytes())
+            return
+
+    _pack_array_header(len(data), fp)
+    if len(data) == 0:
+        return
+
+    fp.write(b"\xca" if code == 'f' else b"\xd2")
+    if isinstance(data, array.array):
+        _write_typed(data, fp)
+    else:
+        fp.write(data.astype('>f4' if code == 'f' else '>i4').tobytes())
+
+def _pack_map_header(length, fp):
+    if length <= 15:
+        fp.write(struct.pack("B", 0x80 | length))
+    elif length <= 2**16 - 1:
+        fp.write(b"\xde" + struct.pack(">H", length))
+    elif length <= 2**32 - 1:
+        fp.write(b"\xdf" + struct.pack(">I", length))
     else:
         raise Exception("huge array")
 
+def _pack_map(obj, fp):
+    _pack_map_header(len(obj), fp)
+
     for k, v in obj.items():
         pack(k, fp)
         pack(v, fp)
 
+def _is_buffer(obj):
+    return isinstance(obj, array.array) or isinstance(obj, memoryview) or \
+        (hasattr(obj, 'dtype') and getattr(obj, 'ndim', 0) > 0)
+
 def pack(obj, fp):
     if obj is None:
         _pack_nil(obj, fp)
@@ -139,6 +194,8 @@ def pack(obj, fp):
         _pack_binary(obj, fp)
     elif isinstance(obj, list) or isinstance(obj, tuple):
         _pack_array(obj, fp)
+    elif _is_buffer(obj):
+        _pack_buffer(obj, fp)
     elif isinstance(obj, dict):
         _pack_map(obj, fp)
     else:
@@ -148,3 +205,43 @@ def packb(obj):
     fp = io.BytesIO()
     pack(obj, fp)
     return fp.getvalue()
+
+class Packer:
+    # Incremental encoder, writes straight to fp without building the whole object first
+    # Element count of maps and arrays has to be known when they are opened
+    def __init__(self, fp):
+        self.fp = fp
+        self.stack = [] # Remaining elements of open containers
+
+    def _consume(self):
+        if len(self.stack) > 0:
+            if self.stack[-1] == 0:
+                raise Exception("container overflow")
+            self.stack[-1] -= 1
+
+    def begin_map(self, length):
+        self._consume()
+        _pack_map_header(length, self.fp)
+        self.stack.append(length * 2) # Keys and values
+
+    def begin_array(self, length):
+        self._consume()
+        _pack_array_header(length, self.fp)
+        self.stack.append(length)
+
+    def write(self, obj):
+        self._consume()
+        pack(obj, self.fp)
+
+    def write_typed_array(self, values):
+        self._consume()
+        if isinstance(values, list) or isinstance(values, tuple):
+            _pack_array(values, self.fp)
+        else:
+            _pack_buffer(values, self.fp)
+
+    def end(self):
+        if len(self.stack) == 0:
+            raise Exception("no open container")
+        if self.stack.pop() != 0:
+            raise Exception("container not filled")
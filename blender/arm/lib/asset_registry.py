@@ -0,0 +1,103 @@
+# Registry of files referenced by a build, no bpy access
+# Keeps registration order with constant time lookups and records size and content hash per file
+import os
+import json
+import hashlib
+import collections
+
+def file_digest(path):
+    h = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+class AssetRegistry:
+
+    def __init__(self):
+        self.entries = collections.OrderedDict() # Path - [size, mtime, digest] once scanned
+
+    def add(self, path):
+        if path not in self.entries:
+            self.entries[path] = None
+
+    def __contains__(self, path):
+        return path in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def sort(self):
+        self.entries = collections.OrderedDict(sorted(self.entries.items()))
+
+    def scan(self, cache):
+        # Stats registered files, digests of files unchanged since cached manifest are reused
+        for path in self.entries:
+            if not os.path.isfile(path):
+                continue
+            st = os.stat(path)
+            rec = cache.get(path)
+            if rec != None and rec[0] == st.st_size and rec[1] == st.st_mtime:
+                self.entries[path] = rec
+            else:
+                self.entries[path] = [st.st_size, st.st_mtime, file_digest(path)]
+
+    def unique(self):
+        # Returns sorted files with content duplicates removed and list of (duplicate, kept) pairs
+        # Assets are looked up by file name at runtime, only files sharing name and content are merged
+        files = []
+        duplicates = []
+        seen = {}
+        for path in sorted(self.entries):
+            rec = self.entries[path]
+            if rec == None: # Not written, keep reference as is
+                files.append(path)
+                continue
+            key = (os.path.basename(path), rec[2])
+            if key in seen:
+                duplicates.append((path, seen[key]))
+                continue
+            seen[key] = path
+            files.append(path)
+        return files, duplicates
+
+    def same_content(self):
+        # Files with different names but equal content, these can not be merged
+        groups = {}
+        for path, rec in self.entries.items():
+            if rec != None:
+                groups.setdefault(rec[2], set()).add(os.path.basename(path))
+        return [sorted(names) for names in groups.values() if len(names) > 1]
+
+    def manifest(self):
+        m = {}
+        for path, rec in self.entries.items():
+            if rec != None:
+                m[path] = rec
+        return m
+
+def diff(old, new):
+    # Compares two manifests, returns added, removed and changed paths
+    added = sorted([p for p in new if p not in old])
+    removed = sorted([p for p in old if p not in new])
+    changed = sorted([p for p in new if p in old and old[p][2] != new[p][2]])
+    return added, removed, changed
+
+def load_manifest(path):
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        try:
+            return json.load(f)
+        except ValueError:
+            return {}
+
+def save_manifest(path, manifest):
+    d = os.path.dirname(path)
+    if d != '' and not os.path.exists(d):
+        os.makedirs(d)
+    with open(path, 'w') as f:
+        json.dump(manifest, f, sort_keys=True, indent=4)
@@ -0,0 +1,131 @@
+# Image metadata read from file headers only, no pixel data is loaded and no bpy access
+# Supports png, jpg, hdr and tga, returns ImageInfo or None for unknown or broken files
+import os
+import struct
+import collections
+
+ImageInfo = collections.namedtuple('ImageInfo', ['format', 'width', 'height', 'channels', 'bit_depth'])
+
+cache = {} # Path - (mtime, size, info)
+
+def read(path):
+    # Cached by file modification time and size
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    entry = cache.get(path)
+    if entry != None and entry[0] == st.st_mtime and entry[1] == st.st_size:
+        return entry[2]
+    try:
+        with open(path, 'rb') as f:
+            info = read_file(f, path)
+    except (OSError, struct.error, ValueError):
+        info = None
+    cache[path] = (st.st_mtime, st.st_size, info)
+    return info
+
+def read_file(f, path):
+    head = f.read(32)
+    f.seek(0)
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return read_png(f)
+    if head.startswith(b'\xff\xd8'):
+        return read_jpg(f)
+    if head.startswith(b'#?'):
+        return read_hdr(f)
+    if path.lower().endswith('.tga'): # No signature
+        return read_tga(f)
+    return None
+
+png_channels = {0: 1, 2: 3, 3: 3, 4: 2, 6: 4}
+
+def read_png(f):
+    # IHDR is always the first chunk
+    data = f.read(33)
+    if data[12:16] != b'IHDR':
+        return None
+    width, height, bit_depth, color_type = struct.unpack('>IIBB', data[16:26])
+    channels = png_channels.get(color_type)
+    if channels == None:
+        return None
+    # Palette images expand to rgba if a transparency chunk follows
+    if color_type == 3:
+        bit_depth = 8
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                break
+            length, name = struct.unpack('>I4s', chunk)
+            if name == b'tRNS':
+                channels = 4
+                break
+            if name == b'IDAT' or name == b'IEND':
+                break
+            f.seek(length + 4, 1)
+    return ImageInfo('png', width, height, channels, bit_depth)
+
+def read_jpg(f):
+    # Walks marker segments up to the first start of frame
+    f.seek(2)
+    while True:
+        b = f.read(1)
+        if len(b) == 0:
+            return None
+        if b != b'\xff':
+            continue
+        marker = f.read(1)
+        while marker == b'\xff': # Fill bytes
+            marker = f.read(1)
+        if len(marker) == 0:
+            return None
+        m = marker[0]
+        if m == 0xd8 or m == 0x01 or (0xd0 <= m <= 0xd7): # No payload
+            continue
+        if m == 0xd9 or m == 0xda: # End of image or start of scan before frame
+            return None
+        length = struct.unpack('>H', f.read(2))[0]
+        if 0xc0 <= m <= 0xcf and m != 0xc4 and m != 0xc8 and m != 0xcc:
+            bit_depth, height, width, channels = struct.unpack('>BHHB', f.read(6))
+            return ImageInfo('jpg', width, height, channels, bit_depth)
+        f.seek(length - 2, 1)
+
+def read_hdr(f):
+    # Text header terminated by empty line, followed by resolution line like '-Y 512 +X 1024'
+    line = f.readline(256)
+    if not (line.startswith(b'#?RADIANCE') or line.startswith(b'#?RGBE')):
+        return None
+    for i in range(128):
+        line = f.readline(256)
+        if len(line) == 0:
+            return None
+        if line.strip() == b'':
+            break
+    res = f.readline(256).split()
+    if len(res) != 4:
+        return None
+    dims = {res[0][1:2]: int(res[1]), res[2][1:2]: int(res[3])}
+    if b'X' not in dims or b'Y' not in dims:
+        return None
+    return ImageInfo('hdr', dims[b'X'], dims[b'Y'], 3, 32) # Rgbe decodes to float
+
+def read_tga(f):
+    data = f.read(18)
+    if len(data) < 18:
+        return None
+    color_map_type, image_type = data[1], data[2]
+    map_depth = data[7]
+    width, height, pixel_depth = struct.unpack('<HHB', data[12:17])
+    if image_type in (1, 9): # Color mapped
+        if color_map_type != 1:
+            return None
+        channels = 4 if map_depth == 32 else 3
+    elif image_type in (2, 10): # True color
+        channels = 4 if pixel_depth == 32 else 3
+    elif image_type in (3, 11): # Grayscale
+        channels = 2 if pixel_depth == 16 else 1
+    else:
+        return None
+    if width == 0 or height == 0:
+        return None
+    return ImageInfo('tga', width, height, channels, 8)
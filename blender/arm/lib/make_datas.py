@@ -1,7 +1,9 @@
 import os
-import arm.utils
+import json
+import arm.lib.armpack
+import arm.lib.shader_source
 
-def write_data(res, defs, json_data, base_name):
+def write_data(res, defs, json_data, base_name, shader_dir):
     # Define
     sres = {}
     res['shader_datas'].append(sres)
@@ -12,6 +14,7 @@ def write_data(res, defs, json_data, base_name):
 
     sres['name'] = shader_id
     sres['contexts'] = []
+    defs_set = set(defs)
 
     # Parse
     for c in json_data['contexts']:
@@ -64,105 +67,42 @@ def write_data(res, defs, json_data, base_name):
                 con[p] = c[p]
 
         # Parse shaders
-        if 'vertex_shader_path' in c:
-            with open(c['vertex_shader_path']) as f:
-                vert = f.read().splitlines()
-        else:
-            with open(c['vertex_shader']) as f:
-                vert = f.read().splitlines()
-
-        if 'fragment_shader_path' in  c:
-            with open(c['fragment_shader_path']) as f:
-                frag = f.read().splitlines()
-        else:
-            with open(c['fragment_shader']) as f:
-                frag = f.read().splitlines()
-        
-        parse_shader(sres, c, con, defs, vert, True) # Parse attribs for vertex shader
-        parse_shader(sres, c, con, defs, frag, False)
+        vert = arm.lib.shader_source.read(arm.lib.shader_source.stage_path(shader_dir, c, 'vertex_shader'))
+        frag = arm.lib.shader_source.read(arm.lib.shader_source.stage_path(shader_dir, c, 'fragment_shader'))
+        parse_shader(sres, c, con, defs_set, vert, True) # Parse attribs for vertex shader
+        parse_shader(sres, c, con, defs_set, frag, False)
 
         if 'geometry_shader' in c:
-            if 'geometry_shader_path' in c:
-                with open(c['geometry_shader_path']) as f:
-                    geom = f.read().splitlines()
-            else:
-                with open(c['geometry_shader']) as f:
-                    geom = f.read().splitlines()
-            parse_shader(sres, c, con, defs, geom, False)
+            geom = arm.lib.shader_source.read(arm.lib.shader_source.stage_path(shader_dir, c, 'geometry_shader'))
+            parse_shader(sres, c, con, defs_set, geom, False)
 
         if 'tesscontrol_shader' in c:
-            if 'tesscontrol_shader_path' in c:
-                with open(c['tesscontrol_shader_path']) as f:
-                    tesc = f.read().splitlines()
-            else:
-                with open(c['tesscontrol_shader']) as f:
-                    tesc = f.read().splitlines()
-            parse_shader(sres, c, con, defs, tesc, False)
+            tesc = arm.lib.shader_source.read(arm.lib.shader_source.stage_path(shader_dir, c, 'tesscontrol_shader'))
+            parse_shader(sres, c, con, defs_set, tesc, False)
         
         if 'tesseval_shader' in c:
-            if 'tesseval_shader_path' in c:
-                with open(c['tesseval_shader_path']) as f:
-                    tese = f.read().splitlines()
-            else:
-                with open(c['tesseval_shader']) as f:
-                    tese = f.read().splitlines()
-            parse_shader(sres, c, con, defs, tese, False)
-
-def find_def(defs, s):
-    for d in defs:
-        if d == s:
-            return True
-    return False
+            tese = arm.lib.shader_source.read(arm.lib.shader_source.stage_path(shader_dir, c, 'tesseval_shader'))
+            parse_shader(sres, c, con, defs_set, tese, False)
 
-def parse_shader(sres, c, con, defs, lines, parse_attributes):
-    skip_till_endif = 0
-    skip_else = False
+def parse_shader(sres, c, con, defs, source, parse_attributes):
     vertex_structure_parsed = False
     vertex_structure_parsing = False
-    
-    stack = []
 
     if parse_attributes == False:
         vertex_structure_parsed = True
         
-    for line in lines:
-        line = line.lstrip()
-
-        # Preprocessor
-        if line.startswith('#ifdef') or line.startswith('#ifndef'):
-            s = line.split(' ')[1]
-            found = find_def(defs, s)
-            if line.startswith('#ifndef'):
-                found = not found
-            if found == False:
-                stack.append(0)
-            else:
-                stack.append(1)
-            continue
-
-        if line.startswith('#else'):
-            stack[-1] = 1 - stack[-1]
-            continue
-
-        if line.startswith('#endif'):
-            stack.pop()
-            continue
-
-        if len(stack) > 0 and stack[-1] == 0:
-            continue
-
-
-        if vertex_structure_parsed == False and line.startswith('in '):
+    for kind, line in source.active(defs):
+        if vertex_structure_parsed == False and kind == 'in':
             vertex_structure_parsing = True
             vd = {}
             s = line.split(' ')
             vd['size'] = int(s[1][-1:])
             vd['name'] = s[2][:-1]
             con['vertex_structure'].append(vd)
-        if vertex_structure_parsing == True and len(line) > 0 and line.startswith('//') == False and line.startswith('in ') == False:
+        if vertex_structure_parsing == True and kind != 'in' and line.startswith('//') == False:
             vertex_structure_parsed = True
 
-        if line.startswith('uniform ') or line.startswith('//!uniform'): # Uniforms included from header files
+        if kind == 'uniform': # Uniforms included from header files
             s = line.split(' ')
             # uniform sampler2D myname;
             # uniform layout(RGBA8) image3D myname;
@@ -264,23 +204,27 @@ def parse_shader(sres, c, con, defs, lines, parse_attributes):
                             break
                     con['constants'].append(const)
 
-def save_data(path, base_name, subset, res):
+def save_data(path, base_name, subset, res, minimize):
     res_name = base_name
     for s in subset:
         res_name += s
 
     r = {}
     r['shader_datas'] = [res['shader_datas'][-1]]
-    arm.utils.write_arm(path + '/' + res_name + '.arm', r)
-
-def make(base_name, json_data, fp, defs):
+    if minimize:
+        with open(path + '/' + res_name + '.arm', 'wb') as f:
+            arm.lib.armpack.pack(r, f)
+    else:
+        with open(path + '/' + res_name + '.arm', 'w') as f:
+            f.write(json.dumps(r, sort_keys=True, indent=4))
+
+def make(base_name, json_data, fp, defs, shader_dir, minimize):
     
     path = fp + '/compiled/Shaders/' + base_name
-    if not os.path.exists(path):
-        os.makedirs(path)
+    os.makedirs(path, exist_ok=True)
 
     res = {}
     res['shader_datas'] = []
 
-    write_data(res, defs, json_data, base_name)
-    save_data(path, base_name, defs, res)
+    write_data(res, defs, json_data, base_name, shader_dir)
+    save_data(path, base_name, defs, res, minimize)
@@ -1,4 +1,5 @@
 import os
+import arm.lib.shader_source
 
 def write_variant(path, name, defs, lines):
     with open(path + '/' + name, "w") as f:
@@ -11,60 +12,34 @@ def write_variant(path, name, defs, lines):
                     f.write('#define ' + d + '\n')
                 defs_written = True
 
-def make(base_name, json_data, fp, defs):
+def make(base_name, json_data, fp, defs, shader_dir):
     shaders = []
     
     path = fp + '/compiled/Shaders/' + base_name
-    if not os.path.exists(path):
-        os.makedirs(path)
+    os.makedirs(path, exist_ok=True)
 
-    # Go through every context shaders and gather ifdefs
+    # Go through every context shaders, sources are read once per build
     for c in json_data['contexts']:
         shader = {}
         shaders.append(shader)
 
         shader['vert_name'] = c['vertex_shader'].split('.', 1)[0]
-        if 'vertex_shader_path' in c:
-            with open(c['vertex_shader_path']) as f:
-                shader['vert'] = f.read().splitlines()
-        else:
-            with open(c['vertex_shader']) as f:
-                shader['vert'] = f.read().splitlines()
+        shader['vert'] = arm.lib.shader_source.read(arm.lib.shader_source.stage_path(shader_dir, c, 'vertex_shader')).lines
 
         shader['frag_name'] = c['fragment_shader'].split('.', 1)[0]
-        if 'fragment_shader_path' in c:
-            with open(c['fragment_shader_path']) as f:
-                shader['frag'] = f.read().splitlines()
-        else:
-            with open(c['fragment_shader']) as f:
-                shader['frag'] = f.read().splitlines()
+        shader['frag'] = arm.lib.shader_source.read(arm.lib.shader_source.stage_path(shader_dir, c, 'fragment_shader')).lines
 
         if 'geometry_shader' in c:
             shader['geom_name'] = c['geometry_shader'].split('.', 1)[0]
-            if 'geometry_shader_path' in c:
-                with open(c['geometry_shader_path']) as f:
-                    shader['geom'] = f.read().splitlines()
-            else:
-                with open(c['geometry_shader']) as f:
-                    shader['geom'] = f.read().splitlines()
+            shader['geom'] = arm.lib.shader_source.read(arm.lib.shader_source.stage_path(shader_dir, c, 'geometry_shader')).lines
 
         if 'tesscontrol_shader' in c:
             shader['tesc_name'] = c['tesscontrol_shader'].split('.', 1)[0]
-            if 'tesscontrol_shader_path' in c:
-                with open(c['tesscontrol_shader_path']) as f:
-                    shader['tesc'] = f.read().splitlines()
-            else:
-                with open(c['tesscontrol_shader']) as f:
-                    shader['tesc'] = f.read().splitlines()
+            shader['tesc'] = arm.lib.shader_source.read(arm.lib.shader_source.stage_path(shader_dir, c, 'tesscontrol_shader')).lines
 
         if 'tesseval_shader' in c:
             shader['tese_name'] = c['tesseval_shader'].split('.', 1)[0]
-            if 'tesseval_shader_path' in c:
-                with open(c['tesseval_shader_path']) as f:
-                    shader['tese'] = f.read().splitlines()
-            else:
-                with open(c['tesseval_shader']) as f:
-                    shader['tese'] = f.read().splitlines()
+            shader['tese'] = arm.lib.shader_source.read(arm.lib.shader_source.stage_path(shader_dir, c, 'tesseval_shader')).lines
     
     for shader in shaders:
         ext = ''
@@ -0,0 +1,292 @@
+# Mesh data building and writing, runs on the main thread or in a worker process
+# Operates on buffers extracted by the exporter only, no bpy access
+import json
+import numpy
+import zipfile
+import arm.lib.armpack
+import arm.lib.mesh_utils as mesh_utils
+
+def make_va(attrib, size, values):
+    va = {}
+    va['attrib'] = attrib
+    va['size'] = size
+    va['values'] = values
+    return va
+
+def build_mesh_quality(o, job):
+    # Unifies vertices extracted by deindex_mesh_columns and fills vertex and index arrays of o
+    # Returns source vertex index of each exported vertex
+    rows = job['rows']
+    index_table, unified_index = mesh_utils.unify_rows(rows)
+    unified = rows[unified_index]
+
+    # Write the position array
+    o['vertex_arrays'] = []
+    pa = make_va('pos', 3, unified[:, 0:3].ravel().tolist())
+    o['vertex_arrays'].append(pa)
+
+    # Write the normal array
+    na = make_va('nor', 3, unified[:, 3:6].ravel().tolist())
+    o['vertex_arrays'].append(na)
+    column = 6
+
+    # Write the color array if it exists
+    if job['has_col']:
+        if job['export_vcols']:
+            ca = make_va('col', 3, unified[:, column:column + 3].ravel().tolist())
+            o['vertex_arrays'].append(ca)
+        column += 3
+
+    # Write the texcoord arrays
+    if job['export_uvs'] and job['uv_count'] > 0:
+        ta = make_va('tex', 2, unified[:, column:column + 2].ravel().tolist())
+        o['vertex_arrays'].append(ta)
+        if job['uv_count'] > 1:
+            ta2 = make_va('tex1', 2, unified[:, column + 2:column + 4].ravel().tolist())
+            o['vertex_arrays'].append(ta2)
+
+    # Write the index arrays, separate index array for each material
+    o['index_arrays'] = []
+    for m, indices in mesh_utils.split_by_material(index_table, job['material_table']):
+        ia = {}
+        ia['size'] = 3
+        ia['values'] = indices.tolist()
+        ia['material'] = m
+        o['index_arrays'].append(ia)
+
+    # Export tangents
+    if job['export_tangents']:
+        ias = [ia['values'] for ia in o['index_arrays']]
+        tanga_vals = mesh_utils.calc_tangents(pa['values'], na['values'], ta['values'], ias).tolist()
+        tanga = make_va('tang', 3, tanga_vals)
+        o['vertex_arrays'].append(tanga)
+
+    return job['vertex_index'][unified_index].tolist()
+
+def optimize_vertex_order(o, cluster_size=0):
+    # Reorders triangles of each index array for the post-transform cache and vertices for fetch locality
+    # With cluster_size, index arrays are clustered first and triangles are reordered within each cluster
+    # Returns source vertex of each new vertex and index weighted cache miss ratio as (before, after, index count)
+    vertex_count = len(o['vertex_arrays'][0]['values']) // o['vertex_arrays'][0]['size']
+    acmr_before = 0.0
+    acmr_after = 0.0
+    index_count = 0
+    arrays = []
+    for ia in o['index_arrays']:
+        values = ia['values']
+        acmr_before += mesh_utils.calc_acmr(values) * len(values)
+        if cluster_size > 0:
+            values, ranges = cluster_index_array(o, ia, cluster_size)
+            arrays.append(mesh_utils.optimize_cluster_order(values, ranges))
+        else:
+            arrays.append(mesh_utils.optimize_triangle_order(values, vertex_count))
+        index_count += len(values)
+    arrays, order = mesh_utils.optimize_vertex_fetch(arrays, vertex_count)
+
+    for ia, values in zip(o['index_arrays'], arrays):
+        ia['values'] = values.tolist()
+        acmr_after += mesh_utils.calc_acmr(ia['values']) * len(values)
+    for va in o['vertex_arrays']:
+        size = va['size']
+        va['values'] = numpy.asarray(va['values']).reshape(-1, size)[order].ravel().tolist()
+
+    if index_count > 0:
+        acmr_before /= index_count
+        acmr_after /= index_count
+    return order, (acmr_before, acmr_after, index_count)
+
+def cluster_index_array(o, ia, max_triangles):
+    # Returns clustered indices and cluster ranges, stores clusters on index array
+    for va in o['vertex_arrays']:
+        if va['attrib'] == 'pos':
+            positions = va['values']
+    values, ranges, bounds = mesh_utils.build_clusters(positions, ia['values'], max_triangles)
+    clusters = {}
+    clusters['ranges'] = ranges.ravel().tolist()
+    clusters['bounds'] = bounds.ravel().tolist()
+    ia['clusters'] = clusters
+    return values, ranges.tolist()
+
+def cluster_mesh(o, max_triangles):
+    # Partitions each index array into clusters for cluster level culling, triangles are reordered
+    # 'ranges' holds first index and triangle count of each cluster, 'bounds' holds 14 floats each:
+    # aabb min, aabb max, bounding sphere center and radius, normal cone axis and cosine cutoff
+    # Index arrays clustered by optimize_vertex_order are left as is
+    for ia in o['index_arrays']:
+        if 'clusters' in ia:
+            continue
+        values, ranges = cluster_index_array(o, ia, max_triangles)
+        ia['values'] = values.tolist()
+
+def merge_meshes(parts):
+    # Concatenates built mesh datas sharing a material and vertex arrays into a single mesh data
+    attribs = [(va['attrib'], va['size']) for va in parts[0]['vertex_arrays']]
+    values = {}
+    for attrib, size in attribs:
+        values[attrib] = []
+    indices = []
+    offset = 0
+    for part in parts:
+        if [(va['attrib'], va['size']) for va in part['vertex_arrays']] != attribs:
+            raise ValueError('Merged meshes have different vertex arrays')
+        for va in part['vertex_arrays']:
+            values[va['attrib']].append(numpy.asarray(va['values'], dtype=numpy.float64))
+        for ia in part['index_arrays']:
+            indices.append(numpy.asarray(ia['values'], dtype=numpy.int64) + offset)
+        offset += len(part['vertex_arrays'][0]['values']) // 3
+
+    o = {}
+    o['vertex_arrays'] = []
+    for attrib, size in attribs:
+        o['vertex_arrays'].append(make_va(attrib, size, numpy.concatenate(values[attrib]).tolist()))
+    ia = {}
+    ia['size'] = 3
+    ia['values'] = numpy.concatenate(indices).tolist() if len(indices) > 0 else []
+    ia['material'] = 0
+    o['index_arrays'] = [ia]
+    return o
+
+def calc_mesh_aabb(o):
+    # Returns aabb size of the first position array, None if mesh has no positions
+    for va in o['vertex_arrays']:
+        if va['attrib'].startswith('pos'):
+            stride = 0
+            ar = va['attrib'].split('_')
+            for a in ar:
+                if a == 'pos' or a == 'nor' or a == 'col' or a == 'tang':
+                    stride += 3
+                elif a == 'tex' or a == 'tex1':
+                    stride += 2
+                elif a == 'bone' or a == 'weight':
+                    stride += 4
+            return mesh_utils.calc_aabb(va['values'], stride)
+    return None
+
+def compress_mesh(o, minimize, vertex_data=True):
+    # Quantizes vertex arrays and narrows indices, va 'format' tells the runtime how to decode values
+    # short_norm - int16 / 32767 * scale + offset, octahedral for nor and tang
+    # ushort_norm - uint16 / 65535 * scale + offset, byte_norm - uint8 / 255
+    vertex_count = 0
+    for va in o['vertex_arrays']:
+        if va['attrib'] == 'pos':
+            vertex_count = len(va['values']) // 3
+    if vertex_data:
+        for va in o['vertex_arrays']:
+            attrib = va['attrib']
+            if attrib == 'pos':
+                q, va['offset'], va['scale'] = mesh_utils.quantize_norm(va['values'], 3, True, 16)
+                va['format'] = 'short_norm'
+            elif attrib == 'nor' or attrib == 'tang':
+                encoded = mesh_utils.octahedral_encode(va['values'])
+                q = numpy.round(encoded * 32767.0).astype(numpy.int16).ravel()
+                va['size'] = 2
+                va['format'] = 'oct_short_norm'
+            elif attrib == 'tex' or attrib == 'tex1':
+                q, va['offset'], va['scale'] = mesh_utils.quantize_norm(va['values'], 2, False, 16)
+                va['format'] = 'ushort_norm'
+            elif attrib == 'col':
+                col = numpy.clip(numpy.asarray(va['values'], dtype=numpy.float64), 0.0, 1.0)
+                q = numpy.round(col * 255.0).astype(numpy.uint8)
+                va['format'] = 'byte_norm'
+            else:
+                continue
+            va['values'] = q if minimize else q.tolist()
+
+    # 16 bit indices when every vertex is addressable
+    if vertex_count <= 65536:
+        for ia in o['index_arrays']:
+            q = numpy.asarray(ia['values'], dtype=numpy.uint16)
+            ia['values'] = q if minimize else q.tolist()
+
+def interleave_vertex_arrays(o, structure, minimize):
+    # Replaces vertex_arrays of o with a single buffer laid out as structure, a list of attrib names
+    # Attribs missing in structure are appended, attribs missing in the mesh are skipped
+    arrays = {}
+    for va in o['vertex_arrays']:
+        arrays[va['attrib']] = va
+    names = [name for name in structure if name in arrays]
+    names += [va['attrib'] for va in o['vertex_arrays'] if va['attrib'] not in names]
+
+    vertex_count = len(arrays['pos']['values']) // 3
+    stride = 0
+    for name in names:
+        stride += arrays[name]['size']
+    data = numpy.empty((vertex_count, stride), dtype=numpy.float32)
+    vb = {}
+    vb['structure'] = []
+    vb['stride'] = stride
+    offset = 0
+    for name in names:
+        size = arrays[name]['size']
+        data[:, offset:offset + size] = numpy.asarray(arrays[name]['values'], dtype=numpy.float32).reshape(-1, size)
+        elem = {}
+        elem['name'] = name
+        elem['size'] = size
+        vb['structure'].append(elem)
+        offset += size
+    # Packed as a single float32 typed array, upload ready
+    vb['values'] = data.ravel() if minimize else data.ravel().tolist()
+    o['vertex_buffer'] = vb
+    del o['vertex_arrays']
+
+def write_mesh(fp, o, minimize):
+    # One mesh data per file
+    if minimize and not fp.endswith('.zip'):
+        write_mesh_stream(fp, o)
+        return
+    mesh_obj = {}
+    mesh_obj['mesh_datas'] = [o]
+    if fp.endswith('.zip'):
+        with zipfile.ZipFile(fp, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            if minimize:
+                zip_file.writestr('data.arm', arm.lib.armpack.packb(mesh_obj))
+            else:
+                zip_file.writestr('data.arm', json.dumps(mesh_obj, sort_keys=True, indent=4))
+    else:
+        with open(fp, 'w') as f:
+            f.write(json.dumps(mesh_obj, sort_keys=True, indent=4))
+
+def write_mesh_stream(fp, o):
+    # Write mesh data straight to file, o is left intact for callers that keep using it
+    with open(fp, 'wb') as f:
+        packer = arm.lib.armpack.Packer(f)
+        packer.begin_map(1)
+        packer.write('mesh_datas')
+        packer.begin_array(1)
+        packer.begin_map(len(o))
+        for key, value in o.items():
+            packer.write(key)
+            if key != 'vertex_arrays' and key != 'index_arrays':
+                packer.write(value)
+                continue
+            packer.begin_array(len(value))
+            for a in value:
+                packer.begin_map(len(a))
+                for akey, avalue in a.items():
+                    packer.write(akey)
+                    if akey == 'values':
+                        packer.write_typed_array(avalue)
+                    else:
+                        packer.write(avalue)
+                packer.end()
+            packer.end()
+        packer.end()
+        packer.end()
+        packer.end()
+
+def export_mesh_job(fp, o, job, minimize, structure=None, compress=False, optimize_order=False, cluster_size=0):
+    # Worker entry point, builds and writes a single mesh file
+    # Returns aabb size to be stored on the mesh and cache miss ratio if vertex order was optimized
+    build_mesh_quality(o, job)
+    acmr = None
+    if optimize_order:
+        order, acmr = optimize_vertex_order(o, cluster_size)
+    aabb = calc_mesh_aabb(o)
+    if cluster_size > 0:
+        cluster_mesh(o, cluster_size)
+    if compress:
+        compress_mesh(o, minimize, structure == None)
+    if structure != None:
+        interleave_vertex_arrays(o, structure, minimize)
+    write_mesh(fp, o, minimize)
+    return aabb, acmr
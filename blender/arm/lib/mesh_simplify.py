@@ -0,0 +1,302 @@
+# Quadric error metric mesh simplification used to generate lod meshes
+# Operates on built mesh data (vertex_arrays, index_arrays) only, no bpy access
+#
+# Collapse topology is built on position welded vertices, uv and normal seams split in the vertex
+# arrays do not open the surface. Vertices with equal attributes at one position form a wedge.
+# Edges are collapsed onto one of their vertices, so every remaining wedge keeps its own attributes.
+# Edges between different wedges or materials are seams, a seam vertex only moves along its seam.
+# Vertices on open or non-manifold edges are locked. Normals of flat shaded vertices are recomputed
+# for the simplified faces and tangents are rebuilt.
+import heapq
+import numpy
+import arm.lib.mesh_utils as mesh_utils
+
+upper = numpy.triu_indices(4)
+
+def plane_quadrics(planes, weights):
+    # Weighted plane quadrics stored as the 10 upper coefficients of symmetric 4x4 matrices
+    q = planes[:, :, None] * planes[:, None, :] * weights[:, None, None]
+    return q[:, upper[0], upper[1]]
+
+def calc_face_normals(pos, tris):
+    # Unit face normals and doubled triangle areas
+    p0, p1, p2 = pos[tris[:, 0]], pos[tris[:, 1]], pos[tris[:, 2]]
+    n = numpy.cross(p1 - p0, p2 - p0)
+    area2 = numpy.linalg.norm(n, axis=1)
+    return n / numpy.where(area2 > 0.0, area2, 1.0)[:, None], area2
+
+def calc_quadrics(pos, tris, seams):
+    # Area weighted plane quadric accumulated for each vertex
+    # Seam edges add a plane perpendicular to each adjacent face, keeping seam lines in place
+    n, area2 = calc_face_normals(pos, tris)
+    planes = numpy.hstack((n, -(n * pos[tris[:, 0]]).sum(axis=1)[:, None]))
+    q = plane_quadrics(planes, area2 * 0.5)
+    quadrics = numpy.zeros((len(pos), 10))
+    for k in range(3):
+        numpy.add.at(quadrics, tris[:, k], q)
+    if len(seams) > 0:
+        # seams - (edge vertex, edge vertex, triangle) rows
+        p0, p1 = pos[seams[:, 0]], pos[seams[:, 1]]
+        d = p1 - p0
+        length = numpy.linalg.norm(d, axis=1)
+        e = numpy.cross(d, n[seams[:, 2]])
+        e = e / numpy.where(length > 0.0, length * length, 1.0)[:, None]
+        eplanes = numpy.hstack((e, -(e * p0).sum(axis=1)[:, None]))
+        q = plane_quadrics(eplanes, length * length)
+        numpy.add.at(quadrics, seams[:, 0], q)
+        numpy.add.at(quadrics, seams[:, 1], q)
+    return quadrics.tolist()
+
+def calc_edges(tris, corners, materials, vertex_count):
+    # Returns locked vertices, seam edge keys and (a, b, triangle) rows of seam edges
+    # Open and non-manifold edges lock their vertices, a manifold edge is a seam if its
+    # two triangles use different wedges at either end or different materials
+    t = numpy.arange(len(tris))
+    e0 = numpy.concatenate([tris[:, k] for k in range(3)])
+    e1 = numpy.concatenate([tris[:, (k + 1) % 3] for k in range(3)])
+    c0 = numpy.concatenate([corners[:, k] for k in range(3)])
+    c1 = numpy.concatenate([corners[:, (k + 1) % 3] for k in range(3)])
+    et = numpy.concatenate([t, t, t])
+    swap = e0 > e1
+    e0, e1 = numpy.where(swap, e1, e0), numpy.where(swap, e0, e1)
+    c0, c1 = numpy.where(swap, c1, c0), numpy.where(swap, c0, c1)
+    keys = e0 * vertex_count + e1
+    order = numpy.argsort(keys, kind='stable')
+    keys, e0, e1, c0, c1, et = keys[order], e0[order], e1[order], c0[order], c1[order], et[order]
+    unique_keys, first, counts = numpy.unique(keys, return_index=True, return_counts=True)
+
+    locked = numpy.zeros(vertex_count, dtype=bool)
+    bad = first[counts != 2]
+    locked[e0[bad]] = True
+    locked[e1[bad]] = True
+
+    i = first[counts == 2]
+    j = i + 1
+    seam = (c0[i] != c0[j]) | (c1[i] != c1[j]) | (materials[et[i]] != materials[et[j]])
+    i, j = i[seam], j[seam]
+    rows = numpy.vstack((numpy.stack((e0[i], e1[i], et[i]), axis=1), numpy.stack((e0[j], e1[j], et[j]), axis=1)))
+    seam_keys = set(zip(e0[i].tolist(), e1[i].tolist()))
+    return locked, seam_keys, rows
+
+def calc_flat(pos, nor, tris, vertex_count):
+    # Vertices whose normal is the face normal of all their triangles
+    n, area2 = calc_face_normals(pos, tris)
+    flat = numpy.ones(vertex_count, dtype=bool)
+    for k in range(3):
+        d = (nor[tris[:, k]] * n).sum(axis=1)
+        flat[tris[:, k][d < 0.9999]] = False
+    return flat
+
+def face_normal(pos, a, b, c):
+    ax, ay, az = pos[a]
+    ux, uy, uz = pos[b][0] - ax, pos[b][1] - ay, pos[b][2] - az
+    vx, vy, vz = pos[c][0] - ax, pos[c][1] - ay, pos[c][2] - az
+    return (uy * vz - uz * vy, uz * vx - ux * vz, ux * vy - uy * vx)
+
+def dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+def edge_key(a, b):
+    return (a, b) if a < b else (b, a)
+
+class Simplifier:
+
+    def __init__(self, pos, tris, corners, materials):
+        # pos - welded positions, tris - welded vertex and corners - wedge of each triangle corner
+        self.pos = pos.tolist()
+        self.tris = tris.tolist()
+        self.corners = corners.tolist()
+        self.alive = [True] * len(self.tris)
+        self.tri_count = len(self.tris)
+        locked, self.seams, seam_rows = calc_edges(tris, corners, materials, len(pos))
+        self.locked = locked.tolist()
+        self.quadrics = calc_quadrics(pos, tris, seam_rows)
+        self.stamp = [0] * len(pos)
+        self.vtris = [set() for i in range(len(pos))]
+        for t, tri in enumerate(self.tris):
+            for v in tri:
+                self.vtris[v].add(t)
+        self.heap = []
+        for a in range(len(pos)):
+            for b in self.neighbors(a):
+                if a < b:
+                    self.push(a, b)
+
+    def neighbors(self, v):
+        result = set()
+        for t in self.vtris[v]:
+            result.update(self.tris[t])
+        result.discard(v)
+        return result
+
+    def cost(self, a, b):
+        # Error of collapsing a onto b
+        x, y, z = self.pos[b]
+        q = [qa + qb for qa, qb in zip(self.quadrics[a], self.quadrics[b])]
+        return q[0] * x * x + 2.0 * q[1] * x * y + 2.0 * q[2] * x * z + 2.0 * q[3] * x + \
+               q[4] * y * y + 2.0 * q[5] * y * z + 2.0 * q[6] * y + \
+               q[7] * z * z + 2.0 * q[8] * z + q[9]
+
+    def push(self, a, b):
+        best = None
+        if not self.locked[a]:
+            best = (self.cost(a, b), a, b)
+        if not self.locked[b]:
+            c = self.cost(b, a)
+            if best == None or c < best[0]:
+                best = (c, b, a)
+        if best != None:
+            heapq.heappush(self.heap, (best[0], best[1], best[2], self.stamp[best[1]], self.stamp[best[2]]))
+
+    def seam_count(self, a, neighbors):
+        return sum([1 for n in neighbors if edge_key(a, n) in self.seams])
+
+    def wedge_map(self, a, b, shared):
+        # Wedge of b replacing each wedge of a, None if a wedge of a has no counterpart across the collapse
+        remap = {}
+        for t in shared:
+            tri = self.tris[t]
+            corners = self.corners[t]
+            wa = corners[tri.index(a)]
+            wb = corners[tri.index(b)]
+            if remap.get(wa, wb) != wb:
+                return None
+            remap[wa] = wb
+        for t in self.vtris[a]:
+            if self.corners[t][self.tris[t].index(a)] not in remap:
+                return None
+        return remap
+
+    def can_collapse(self, a, b, shared):
+        # Keep the mesh manifold, move seam vertices along their seam only and reject collapses flipping triangles
+        if len(shared) == 0:
+            return None
+        neighbors_a = self.neighbors(a)
+        if len(neighbors_a & self.neighbors(b)) != len(shared):
+            return None
+        seam_count = self.seam_count(a, neighbors_a)
+        if seam_count > 0 and (seam_count != 2 or edge_key(a, b) not in self.seams):
+            return None
+        remap = self.wedge_map(a, b, shared)
+        if remap == None:
+            return None
+        pos = self.pos
+        for t in self.vtris[a]:
+            if t in shared:
+                continue
+            tri = self.tris[t]
+            before = face_normal(pos, tri[0], tri[1], tri[2])
+            moved = [b if v == a else v for v in tri]
+            after = face_normal(pos, moved[0], moved[1], moved[2])
+            if dot(before, after) <= 0.0 or dot(after, after) <= 1e-24:
+                return None
+        return remap
+
+    def collapse(self, a, b, shared, remap):
+        for n in self.neighbors(a):
+            if edge_key(a, n) in self.seams:
+                self.seams.discard(edge_key(a, n))
+                if n != b:
+                    self.seams.add(edge_key(b, n))
+        for t in shared:
+            self.alive[t] = False
+            self.tri_count -= 1
+            for v in self.tris[t]:
+                self.vtris[v].discard(t)
+        for t in self.vtris[a]:
+            tri = self.tris[t]
+            i = tri.index(a)
+            tri[i] = b
+            self.corners[t][i] = remap[self.corners[t][i]]
+            self.vtris[b].add(t)
+        self.vtris[a] = set()
+        self.quadrics[b] = [qa + qb for qa, qb in zip(self.quadrics[a], self.quadrics[b])]
+        self.stamp[a] += 1
+        self.stamp[b] += 1
+        for n in self.neighbors(b):
+            self.push(n, b)
+
+    def run(self, target_count):
+        while self.tri_count > target_count and len(self.heap) > 0:
+            cost, a, b, stamp_a, stamp_b = heapq.heappop(self.heap)
+            if stamp_a != self.stamp[a] or stamp_b != self.stamp[b]:
+                continue
+            shared = self.vtris[a] & self.vtris[b]
+            remap = self.can_collapse(a, b, shared)
+            if remap == None:
+                continue
+            self.collapse(a, b, shared, remap)
+
+def simplify(o, ratio):
+    # Returns copy of mesh data o reduced to about ratio of its triangles
+    arrays = {}
+    for va in o['vertex_arrays']:
+        arrays[va['attrib']] = numpy.asarray(va['values'], dtype=numpy.float64).reshape(-1, va['size'])
+    pos = arrays['pos']
+    parts = [numpy.asarray(ia['values'], dtype=numpy.int64).reshape(-1, 3) for ia in o['index_arrays']]
+    tris = numpy.vstack(parts) if len(parts) > 0 else numpy.zeros((0, 3), dtype=numpy.int64)
+    materials = numpy.repeat(numpy.arange(len(parts)), [len(p) for p in parts])
+
+    # Wedges are told apart by their attributes, tangents are rebuilt and flat normals recomputed
+    flat = calc_flat(pos, arrays['nor'], tris, len(pos)) if 'nor' in arrays else numpy.zeros(len(pos), dtype=bool)
+    columns = []
+    for va in o['vertex_arrays']:
+        if va['attrib'] == 'tang':
+            continue
+        values = arrays[va['attrib']]
+        if va['attrib'] == 'nor':
+            values = numpy.where(flat[:, None], 2.0, values)
+        columns.append(values)
+    wedge_rows, wedge_first, vertex_wedge = numpy.unique(numpy.hstack(columns), axis=0, return_index=True, return_inverse=True)
+    welded_pos, vertex_welded = numpy.unique(pos, axis=0, return_inverse=True)
+    vertex_wedge = vertex_wedge.ravel()
+    vertex_welded = vertex_welded.ravel()
+
+    simplifier = Simplifier(welded_pos, vertex_welded[tris], vertex_wedge[tris], materials)
+    simplifier.run(int(len(tris) * ratio))
+    alive = numpy.asarray(simplifier.alive, dtype=bool)
+    corners = numpy.asarray(simplifier.corners, dtype=numpy.int64).reshape(-1, 3)[alive]
+    materials = materials[alive]
+
+    # Gather attributes of each remaining corner from a vertex of its wedge
+    source = wedge_first[corners.ravel()]
+    values = {}
+    for va in o['vertex_arrays']:
+        values[va['attrib']] = arrays[va['attrib']][source]
+    if 'nor' in values:
+        face, area2 = calc_face_normals(pos[source].reshape(-1, 3), numpy.arange(len(source)).reshape(-1, 3))
+        corner_flat = flat[source]
+        values['nor'][corner_flat] = numpy.repeat(face, 3, axis=0)[corner_flat]
+
+    # Unify corners back into vertices, kept in order of first use
+    rows = numpy.hstack([values[va['attrib']] for va in o['vertex_arrays'] if va['attrib'] != 'tang'])
+    unique_rows, first, index = numpy.unique(rows, axis=0, return_index=True, return_inverse=True)
+    order = numpy.argsort(first)
+    remap = numpy.zeros(len(order), dtype=numpy.int64)
+    remap[order] = numpy.arange(len(order))
+    indices = remap[index.ravel()].reshape(-1, 3)
+    vertices = first[order]
+
+    lod = {}
+    for key in o:
+        if key != 'vertex_arrays' and key != 'index_arrays':
+            lod[key] = o[key]
+    lod['index_arrays'] = []
+    for i, ia in enumerate(o['index_arrays']):
+        part = indices[materials == i]
+        if len(part) == 0:
+            continue
+        lia = dict(ia)
+        lia.pop('clusters', None) # Rebuilt for simplified triangles
+        lia['values'] = part.ravel().tolist()
+        lod['index_arrays'].append(lia)
+    lod['vertex_arrays'] = []
+    for va in o['vertex_arrays']:
+        lva = dict(va)
+        if va['attrib'] == 'tang':
+            ias = [ia['values'] for ia in lod['index_arrays']]
+            lva['values'] = mesh_utils.calc_tangents(values['pos'][vertices], values['nor'][vertices], values['tex'][vertices], ias).ravel().tolist()
+        else:
+            lva['values'] = values[va['attrib']][vertices].ravel().tolist()
+        lod['vertex_arrays'].append(lva)
+    return lod
@@ -0,0 +1,330 @@
+# Array based mesh processing used by the exporter
+# Operates on flat numpy buffers only, no bpy access
+import numpy
+import collections
+
+# Corners of the two triangles making up a tessface, second one used by quads only
+tessface_corners = numpy.array([0, 1, 2, 0, 2, 3], dtype=numpy.int32)
+
+def triangulate_tessfaces(face_vertices):
+    # face_vertices - (n, 4) vertices_raw of tessfaces, v4 == 0 marks a triangle
+    # Returns face and corner slot for each triangle corner, ordered as in deindex_mesh
+    is_quad = face_vertices[:, 3] != 0
+    counts = numpy.where(is_quad, 6, 3)
+    face_of_corner = numpy.repeat(numpy.arange(len(face_vertices), dtype=numpy.int32), counts)
+    starts = numpy.cumsum(counts) - counts
+    slot = numpy.arange(len(face_of_corner)) - numpy.repeat(starts, counts)
+    return face_of_corner, tessface_corners[slot]
+
+def unify_rows(rows):
+    # Looks for identical rows having exactly the same values. Duplicate rows are unified,
+    # unique rows keep the order of their first occurrence.
+    # Returns index table pointing each row to its unified row and the source row of every unified row
+    rows = numpy.ascontiguousarray(rows, dtype=numpy.float64) + 0.0 # -0.0 equals 0.0
+    if len(rows) == 0:
+        return numpy.zeros(0, dtype=numpy.int32), numpy.zeros(0, dtype=numpy.int32)
+    keys = rows.view(numpy.dtype((numpy.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+    _, first, inverse = numpy.unique(keys, return_index=True, return_inverse=True)
+    order = numpy.argsort(first, kind='mergesort')
+    remap = numpy.empty(len(order), dtype=numpy.int32)
+    remap[order] = numpy.arange(len(order), dtype=numpy.int32)
+    return remap[inverse.ravel()], first[order]
+
+def split_by_material(index_table, material_table):
+    # Returns (material, indices) pairs, one for each material used by triangles
+    triangles = index_table.reshape(-1, 3)
+    max_material = int(material_table.max()) if len(material_table) > 0 else 0
+    if max_material == 0:
+        return [(0, index_table)]
+    splits = []
+    for m in range(max_material + 1):
+        mask = material_table == m
+        if mask.any():
+            splits.append((m, triangles[mask].ravel()))
+    return splits
+
+def calc_tangents(positions, normals, uvs, index_arrays, handedness=False):
+    # Per-vertex tangents accumulated over triangles of all index arrays, then
+    # orthogonalized against normals. Optionally appends handedness as fourth component.
+    pos = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, 3)
+    nor = numpy.asarray(normals, dtype=numpy.float64).reshape(-1, 3)
+    uv = numpy.asarray(uvs, dtype=numpy.float64).reshape(-1, 2)
+    vertex_count = len(pos)
+    if len(index_arrays) > 0:
+        tris = numpy.concatenate([numpy.asarray(ia, dtype=numpy.int64) for ia in index_arrays]).reshape(-1, 3)
+    else:
+        tris = numpy.zeros((0, 3), dtype=numpy.int64)
+    i0 = tris[:, 0]
+    i1 = tris[:, 1]
+    i2 = tris[:, 2]
+
+    delta_pos1 = pos[i1] - pos[i0]
+    delta_pos2 = pos[i2] - pos[i0]
+    delta_uv1 = uv[i1] - uv[i0]
+    delta_uv2 = uv[i2] - uv[i0]
+    d = delta_uv1[:, 0] * delta_uv2[:, 1] - delta_uv1[:, 1] * delta_uv2[:, 0]
+    r = numpy.ones(len(d))
+    numpy.divide(1.0, d, out=r, where=d != 0)
+    tangent = (delta_pos1 * delta_uv2[:, 1, None] - delta_pos2 * delta_uv1[:, 1, None]) * r[:, None]
+
+    corners = tris.ravel()
+    t = numpy.empty((vertex_count, 3))
+    for c in range(3):
+        t[:, c] = numpy.bincount(corners, weights=numpy.repeat(tangent[:, c], 3), minlength=vertex_count)
+
+    # Orthogonalize
+    t -= nor * numpy.einsum('ij,ij->i', nor, t)[:, None]
+    length = numpy.sqrt(numpy.einsum('ij,ij->i', t, t))
+    numpy.divide(t, length[:, None], out=t, where=length[:, None] != 0)
+
+    if not handedness:
+        return t.ravel()
+
+    bitangent = (delta_pos2 * delta_uv1[:, 0, None] - delta_pos1 * delta_uv2[:, 0, None]) * r[:, None]
+    b = numpy.empty((vertex_count, 3))
+    for c in range(3):
+        b[:, c] = numpy.bincount(corners, weights=numpy.repeat(bitangent[:, c], 3), minlength=vertex_count)
+    w = numpy.where(numpy.einsum('ij,ij->i', numpy.cross(nor, t), b) < 0.0, -1.0, 1.0)
+    return numpy.hstack((t, w[:, None])).ravel()
+
+def calc_aabb(positions, stride=3):
+    # Returns aabb size of interleaved positions, at least 0.02 on each axis
+    pos = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, stride)[:, 0:3]
+    aabb_min = numpy.array([-0.01, -0.01, -0.01])
+    aabb_max = numpy.array([0.01, 0.01, 0.01])
+    if len(pos) > 0:
+        aabb_min = numpy.minimum(aabb_min, pos.min(axis=0))
+        aabb_max = numpy.maximum(aabb_max, pos.max(axis=0))
+    return (numpy.abs(aabb_min) + numpy.abs(aabb_max)).tolist()
+
+def skin_influences(vertex_of, bone_of, weight_of, vertex_count, max_influences=4):
+    # vertex_of, bone_of, weight_of - one entry per vertex group element, bone -1 for non-bone groups
+    # Returns bone indices and normalized weights, (vertex_count, max_influences) each with highest weights first,
+    # unused slots hold bone 0 and weight 0. Also returns number of vertices which had influences dropped
+    vertex_of = numpy.asarray(vertex_of, dtype=numpy.int64)
+    bone_of = numpy.asarray(bone_of, dtype=numpy.int64)
+    weight_of = numpy.asarray(weight_of, dtype=numpy.float64)
+    used = (bone_of >= 0) & (weight_of != 0.0)
+    vertex_of, bone_of, weight_of = vertex_of[used], bone_of[used], weight_of[used]
+
+    # Sort by vertex, then by descending weight
+    order = numpy.lexsort((-weight_of, vertex_of))
+    vertex_of, bone_of, weight_of = vertex_of[order], bone_of[order], weight_of[order]
+    counts = numpy.bincount(vertex_of, minlength=vertex_count)
+    starts = numpy.cumsum(counts) - counts
+    rank = numpy.arange(len(vertex_of)) - starts[vertex_of]
+    keep = rank < max_influences
+
+    bones = numpy.zeros((vertex_count, max_influences), dtype=numpy.int32)
+    weights = numpy.zeros((vertex_count, max_influences), dtype=numpy.float32)
+    bones[vertex_of[keep], rank[keep]] = bone_of[keep]
+    weights[vertex_of[keep], rank[keep]] = weight_of[keep]
+    total = weights.sum(axis=1)
+    weights /= numpy.where(total > 0.0, total, 1.0)[:, None]
+    return bones, weights, int(numpy.count_nonzero(counts > max_influences))
+
+def octahedral_encode(vectors):
+    # Maps unit vectors (n, 3) onto the octahedron unfolded to a square, returns (n, 2) in -1..1
+    v = numpy.asarray(vectors, dtype=numpy.float64).reshape(-1, 3)
+    l1 = numpy.abs(v).sum(axis=1)
+    v = v / numpy.where(l1 > 0.0, l1, 1.0)[:, None]
+    x, y = v[:, 0].copy(), v[:, 1].copy()
+    lower = v[:, 2] < 0.0
+    sx = numpy.where(x >= 0.0, 1.0, -1.0)
+    sy = numpy.where(y >= 0.0, 1.0, -1.0)
+    x[lower] = ((1.0 - numpy.abs(v[:, 1])) * sx)[lower]
+    y[lower] = ((1.0 - numpy.abs(v[:, 0])) * sy)[lower]
+    return numpy.stack((x, y), axis=1)
+
+def octahedral_decode(encoded):
+    e = numpy.asarray(encoded, dtype=numpy.float64).reshape(-1, 2)
+    z = 1.0 - numpy.abs(e[:, 0]) - numpy.abs(e[:, 1])
+    t = numpy.maximum(-z, 0.0)
+    x = e[:, 0] - numpy.where(e[:, 0] >= 0.0, t, -t)
+    y = e[:, 1] - numpy.where(e[:, 1] >= 0.0, t, -t)
+    v = numpy.stack((x, y, z), axis=1)
+    return v / numpy.linalg.norm(v, axis=1)[:, None]
+
+def quantize_norm(values, size, signed, bits):
+    # Maps components (n, size) onto normalized integers over their range
+    # Returns quantized array, offset and scale, value = q / max * scale + offset
+    v = numpy.asarray(values, dtype=numpy.float64).reshape(-1, size)
+    lo = v.min(axis=0) if len(v) > 0 else numpy.zeros(size)
+    hi = v.max(axis=0) if len(v) > 0 else numpy.zeros(size)
+    if signed:
+        offset = (lo + hi) * 0.5
+        scale = (hi - lo) * 0.5
+        qmax = 2 ** (bits - 1) - 1
+    else:
+        offset = lo
+        scale = hi - lo
+        qmax = 2 ** bits - 1
+    scale = numpy.where(scale > 0.0, scale, 1.0)
+    q = numpy.round((v - offset) / scale * qmax)
+    dtype = {(16, True): numpy.int16, (16, False): numpy.uint16, (8, True): numpy.int8, (8, False): numpy.uint8}[(bits, signed)]
+    return q.astype(dtype).ravel(), offset.tolist(), scale.tolist()
+
+def calc_acmr(indices, cache_size=16):
+    # Average cache miss ratio of a fifo post-transform cache, vertices transformed per triangle
+    cache = []
+    cached = set()
+    misses = 0
+    for v in indices:
+        if v in cached:
+            continue
+        misses += 1
+        cache.append(v)
+        cached.add(v)
+        if len(cache) > cache_size:
+            cached.discard(cache.pop(0))
+    return misses / max(len(indices) // 3, 1)
+
+def optimize_triangle_order(indices, vertex_count, cache_size=16):
+    # Tipsify, reorders triangles to fan around vertices still held by the post-transform cache
+    # Sander et al., Fast Triangle Reordering for Vertex Locality and Reduced Overdraw
+    tris = numpy.asarray(indices, dtype=numpy.int64).reshape(-1, 3)
+    if len(tris) == 0:
+        return numpy.zeros(0, dtype=numpy.int32)
+    corners = tris.ravel()
+    counts = numpy.bincount(corners, minlength=vertex_count)
+    starts = (numpy.cumsum(counts) - counts).tolist()
+    ends = numpy.cumsum(counts).tolist()
+    adjacency = (numpy.argsort(corners, kind='mergesort') // 3).tolist() # Triangles of each vertex
+    live = counts.tolist()
+    tris = tris.tolist()
+    cache_time = [0] * vertex_count
+    emitted = [False] * len(tris)
+    dead_end = []
+    order = []
+    time = cache_size + 1
+    cursor = 0
+    fanning = tris[0][0]
+    while fanning >= 0:
+        candidates = []
+        for t in adjacency[starts[fanning]:ends[fanning]]:
+            if emitted[t]:
+                continue
+            emitted[t] = True
+            order.append(t)
+            for v in tris[t]:
+                dead_end.append(v)
+                candidates.append(v)
+                live[v] -= 1
+                if time - cache_time[v] > cache_size:
+                    cache_time[v] = time
+                    time += 1
+
+        # Next fanning vertex, prefer one which stays in cache while its triangles are emitted
+        fanning = -1
+        best = -1
+        for v in candidates:
+            if live[v] > 0:
+                priority = 0
+                if time - cache_time[v] + 2 * live[v] <= cache_size:
+                    priority = time - cache_time[v]
+                if priority > best:
+                    best = priority
+                    fanning = v
+        if fanning == -1:
+            while len(dead_end) > 0:
+                v = dead_end.pop()
+                if live[v] > 0:
+                    fanning = v
+                    break
+        if fanning == -1:
+            while cursor < vertex_count:
+                if live[cursor] > 0:
+                    fanning = cursor
+                    break
+                cursor += 1
+
+    return numpy.asarray(tris, dtype=numpy.int32)[order].ravel()
+
+def optimize_cluster_order(indices, ranges, cache_size=16):
+    # Tipsify applied within each cluster range, clusters keep their place in the index array
+    indices = numpy.asarray(indices, dtype=numpy.int64)
+    parts = []
+    for start, count in ranges:
+        part = indices[start:start + count * 3]
+        local, inverse = numpy.unique(part, return_inverse=True) # Compact vertex range of cluster
+        parts.append(local[optimize_triangle_order(inverse, len(local), cache_size)])
+    if len(parts) == 0:
+        return numpy.zeros(0, dtype=numpy.int32)
+    return numpy.concatenate(parts).astype(numpy.int32)
+
+def optimize_vertex_fetch(index_arrays, vertex_count):
+    # Renumbers vertices in order of first use, unused vertices are moved to the end
+    # Returns remapped index arrays and source vertex of each new vertex
+    used = numpy.concatenate([numpy.asarray(ia, dtype=numpy.int64) for ia in index_arrays]) if len(index_arrays) > 0 else numpy.zeros(0, dtype=numpy.int64)
+    _, first = numpy.unique(used, return_index=True)
+    order = used[numpy.sort(first)]
+    unused = numpy.setdiff1d(numpy.arange(vertex_count), order)
+    order = numpy.concatenate((order, unused)).astype(numpy.int64)
+    remap = numpy.empty(vertex_count, dtype=numpy.int32)
+    remap[order] = numpy.arange(vertex_count, dtype=numpy.int32)
+    return [remap[numpy.asarray(ia, dtype=numpy.int64)] for ia in index_arrays], order
+
+def build_clusters(positions, indices, max_triangles=128):
+    # Splits triangles into connected clusters of at most max_triangles, grown breadth first
+    # Returns reordered indices with clusters stored contiguously, cluster start and triangle count,
+    # and bounds of each cluster: aabb min, aabb max, sphere center, radius, normal cone axis, cone cutoff
+    pos = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, 3)
+    tris = numpy.asarray(indices, dtype=numpy.int64).reshape(-1, 3)
+    if len(tris) == 0:
+        return numpy.zeros(0, dtype=numpy.int32), numpy.zeros((0, 2), dtype=numpy.int32), numpy.zeros((0, 14))
+    corners = tris.ravel()
+    counts = numpy.bincount(corners, minlength=len(pos))
+    starts = (numpy.cumsum(counts) - counts).tolist()
+    ends = numpy.cumsum(counts).tolist()
+    adjacency = (numpy.argsort(corners, kind='mergesort') // 3).tolist()
+    tris_list = tris.tolist()
+
+    assigned = [False] * len(tris_list)
+    order = []
+    sizes = []
+    for seed in range(len(tris_list)):
+        if assigned[seed]:
+            continue
+        queue = collections.deque([seed])
+        size = 0
+        while len(queue) > 0 and size < max_triangles:
+            t = queue.popleft()
+            if assigned[t]:
+                continue
+            assigned[t] = True
+            order.append(t)
+            size += 1
+            for v in tris_list[t]:
+                for n in adjacency[starts[v]:ends[v]]:
+                    if not assigned[n]:
+                        queue.append(n)
+        sizes.append(size)
+
+    tris = tris[order]
+    sizes = numpy.asarray(sizes, dtype=numpy.int64)
+    offsets = numpy.cumsum(sizes) - sizes
+    ranges = numpy.stack((offsets * 3, sizes), axis=1).astype(numpy.int32)
+
+    # Bounds, reduced over triangles of each cluster
+    p = pos[tris] # (m, 3 corners, 3)
+    tri_min = p.min(axis=1)
+    tri_max = p.max(axis=1)
+    aabb_min = numpy.minimum.reduceat(tri_min, offsets, axis=0)
+    aabb_max = numpy.maximum.reduceat(tri_max, offsets, axis=0)
+    center = (aabb_min + aabb_max) * 0.5
+    cluster_of = numpy.repeat(numpy.arange(len(sizes)), sizes)
+    dist = numpy.linalg.norm(p - center[cluster_of][:, None, :], axis=2).max(axis=1)
+    radius = numpy.maximum.reduceat(dist, offsets)
+
+    # Normal cone, cutoff is the cosine of the widest angle between axis and triangle normals
+    n = numpy.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+    length = numpy.linalg.norm(n, axis=1)
+    n = n / numpy.where(length > 0.0, length, 1.0)[:, None]
+    axis = numpy.add.reduceat(n, offsets, axis=0)
+    axis_length = numpy.linalg.norm(axis, axis=1)
+    axis = axis / numpy.where(axis_length > 0.0, axis_length, 1.0)[:, None]
+    cutoff = numpy.minimum.reduceat((n * axis[cluster_of]).sum(axis=1), offsets)
+    cutoff[axis_length == 0.0] = -1.0
+
+    bounds = numpy.hstack((aabb_min, aabb_max, center, radius[:, None], axis, cutoff[:, None]))
+    return tris.ravel().astype(numpy.int32), ranges, bounds
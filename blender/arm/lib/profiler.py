@@ -0,0 +1,87 @@
+# Phase level build profiler
+# Spans are recorded as complete events of the Chrome trace_event format,
+# open the written trace in chrome://tracing or https://ui.perfetto.dev
+import os
+import json
+import time
+import threading
+import contextlib
+
+enabled = False
+events = []
+start_time = 0.0
+lock = threading.Lock()
+
+def reset(enable=True):
+    global enabled
+    global events
+    global start_time
+    enabled = enable
+    events = []
+    start_time = time.perf_counter()
+
+@contextlib.contextmanager
+def span(name, cat='phase', **args):
+    # Times enclosed block, spans may come from worker threads
+    if not enabled:
+        yield
+        return
+    t = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(name, cat, t, time.perf_counter(), os.getpid(), threading.get_ident(), **args)
+
+def add(name, cat, t, end, pid, tid, **args):
+    # Records span timed elsewhere, perf_counter is system wide so worker process times line up
+    if not enabled:
+        return
+    e = {}
+    e['name'] = name
+    e['cat'] = cat
+    e['ph'] = 'X'
+    e['ts'] = (t - start_time) * 1000000.0
+    e['dur'] = (end - t) * 1000000.0
+    e['pid'] = pid
+    e['tid'] = tid
+    if len(args) > 0:
+        e['args'] = args
+    with lock:
+        events.append(e)
+
+def write_trace(path):
+    if not enabled:
+        return
+    d = os.path.dirname(path)
+    if d != '' and not os.path.exists(d):
+        os.makedirs(d)
+    with lock:
+        trace = {'traceEvents': list(events), 'displayTimeUnit': 'ms'}
+    with open(path, 'w') as f:
+        json.dump(trace, f)
+
+def summary(n=10):
+    # Returns phase spans in start order, total time per item category and n slowest item spans
+    # Phase spans enclose item spans, times are in seconds
+    with lock:
+        spans = list(events)
+    phases = sorted([e for e in spans if e['cat'] == 'phase'], key=lambda e: e['ts'])
+    items = [e for e in spans if e['cat'] != 'phase']
+    totals = {}
+    for e in items:
+        totals[e['cat']] = totals.get(e['cat'], 0.0) + e['dur'] / 1000000.0
+    slowest = sorted(items, key=lambda e: e['dur'], reverse=True)[:n]
+    return [(e['name'], e['dur'] / 1000000.0) for e in phases], totals, [(e['cat'], e['name'], e['dur'] / 1000000.0) for e in slowest]
+
+def print_summary(n=10):
+    if not enabled or len(events) == 0:
+        return
+    phases, totals, slowest = summary(n)
+    print('Build profile:')
+    for name, dur in phases:
+        print('  {0:9.3f}s  {1}'.format(dur, name))
+    for cat in sorted(totals, key=totals.get, reverse=True):
+        print('  {0:9.3f}s  all {1} items'.format(totals[cat], cat))
+    print('Slowest items:')
+    for cat, name, dur in slowest:
+        print('  {0:9.3f}s  {1:<10} {2}'.format(dur, cat, name))
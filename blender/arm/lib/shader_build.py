@@ -0,0 +1,44 @@
+# Shader variant building, no bpy access so variants can be built in worker processes
+# Parsed sources are cached per process by arm.lib.shader_source, workers keep their cache between batches
+import os
+import time
+import threading
+import arm.lib.make_datas
+import arm.lib.make_variants
+import arm.lib.shader_cache
+import arm.lib.shader_source
+
+def compile_shader(raw_shaders_path, shader_name, defs, fp_build, minimize):
+    # Paths are explicit and no bpy data is touched, variants can be compiled concurrently
+    shader_dir = raw_shaders_path + shader_name
+
+    # Open json file
+    json_name = shader_name + '.json'
+    base_name = json_name.split('.', 1)[0]
+    json_data = arm.lib.shader_source.read_json(shader_dir + '/' + json_name)
+
+    arm.lib.make_datas.make(base_name, json_data, fp_build, defs, shader_dir, minimize)
+    arm.lib.make_variants.make(base_name, json_data, fp_build, defs, shader_dir)
+
+def build_variant(raw_shaders_path, shader_name, defs, fp_build, minimize, cache_path, cache_name):
+    # Reuse variant from user level cache if possible
+    if cache_path == None:
+        compile_shader(raw_shaders_path, shader_name, defs, fp_build, minimize)
+        return
+    json_data = arm.lib.shader_source.read_json(raw_shaders_path + shader_name + '/' + shader_name + '.json')
+    files = arm.lib.shader_cache.variant_files(shader_name, json_data, defs)
+    out_dir = fp_build + '/compiled/Shaders/' + shader_name
+    if arm.lib.shader_cache.fetch(cache_path, cache_name, out_dir, files):
+        return
+    compile_shader(raw_shaders_path, shader_name, defs, fp_build, minimize)
+    arm.lib.shader_cache.store(cache_path, cache_name, out_dir, files)
+
+def build_batch(raw_shaders_path, fp_build, minimize, variants):
+    # Worker entry point, variants - list of (shader_name, defs, cache_path, cache_name)
+    # Returns (shader_name, start, end, pid, tid) of each variant for the build profiler
+    timings = []
+    for shader_name, defs, cache_path, cache_name in variants:
+        t = time.perf_counter()
+        build_variant(raw_shaders_path, shader_name, defs, fp_build, minimize, cache_path, cache_name)
+        timings.append((shader_name, t, time.perf_counter(), os.getpid(), threading.get_ident()))
+    return timings
@@ -0,0 +1,74 @@
+# User level cache of compiled shader variants, shared between projects
+# Entries are keyed by variant dependency digest and evicted least recently used first
+import os
+import time
+import shutil
+import hashlib
+
+def entry_name(shader_name, digest, minimize):
+    h = hashlib.md5((digest + str(minimize)).encode('utf-8')).hexdigest()
+    return shader_name + '_' + h
+
+def variant_files(base_name, json_data, defs):
+    # Files written by make_datas and make_variants for a single variant
+    ext = ''
+    for d in defs:
+        ext += d
+    files = [base_name + ext + '.arm']
+    stages = [('vertex_shader', '.vert.glsl'), ('fragment_shader', '.frag.glsl'), ('geometry_shader', '.geom.glsl'), ('tesscontrol_shader', '.tesc.glsl'), ('tesseval_shader', '.tese.glsl')]
+    for c in json_data['contexts']:
+        for stage, suffix in stages:
+            if stage in c:
+                name = c[stage].split('.', 1)[0] + ext + suffix
+                if name not in files:
+                    files.append(name)
+    return files
+
+def fetch(cache_path, name, out_dir, files):
+    # Copies cached variant files to out_dir, returns False on miss
+    entry = cache_path + '/' + name
+    for f in files:
+        if not os.path.isfile(entry + '/' + f):
+            return False
+    os.makedirs(out_dir, exist_ok=True)
+    for f in files:
+        shutil.copy(entry + '/' + f, out_dir + '/' + f)
+    now = time.time()
+    os.utime(entry, (now, now)) # Mark as recently used
+    return True
+
+def store(cache_path, name, out_dir, files):
+    entry = cache_path + '/' + name
+    if os.path.isdir(entry):
+        return
+    # Write into temporary dir first, other Blender instances may read the cache at the same time
+    tmp = entry + '.tmp' + str(os.getpid()) + '_' + str(id(files))
+    os.makedirs(tmp, exist_ok=True)
+    for f in files:
+        shutil.copy(out_dir + '/' + f, tmp + '/' + f)
+    try:
+        os.rename(tmp, entry)
+    except OSError: # Stored meanwhile
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def evict(cache_path, max_size):
+    # Removes least recently used entries until cache fits into max_size bytes
+    if not os.path.isdir(cache_path):
+        return
+    entries = []
+    total = 0
+    for name in os.listdir(cache_path):
+        entry = cache_path + '/' + name
+        if not os.path.isdir(entry) or '.tmp' in name:
+            continue
+        size = 0
+        for f in os.listdir(entry):
+            size += os.path.getsize(entry + '/' + f)
+        entries.append((os.path.getmtime(entry), size, entry))
+        total += size
+    entries.sort()
+    for mtime, size, entry in entries:
+        if total <= max_size:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
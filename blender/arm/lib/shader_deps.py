@@ -0,0 +1,114 @@
+# Dependency graph of shader variants written by make_datas and make_variants
+# A variant is rebuilt only if any of its sources, includes, defs or used compiled.glsl constants changed
+import os
+import re
+import json
+import shutil
+import hashlib
+import arm.lib.shader_source
+
+include_re = re.compile(r'^\s*#include\s+"(.+)"')
+const_re = re.compile(r'^\s*(?:const\s+\w+\s+(\w+)|#define\s+(\w+))')
+word_re = re.compile(r'\w+')
+
+def load(path):
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        try:
+            return json.load(f)
+        except ValueError:
+            return {}
+
+def save(path, graph):
+    with open(path, 'w') as f:
+        json.dump(graph, f, sort_keys=True, indent=4)
+
+def parse_constants(path):
+    # Returns declaration line of each constant and define in compiled.glsl
+    constants = {}
+    if not os.path.isfile(path):
+        return constants
+    with open(path) as f:
+        for line in f.read().splitlines():
+            m = const_re.match(line)
+            if m:
+                constants[m.group(1) or m.group(2)] = line.strip()
+    return constants
+
+def source_paths(shader_dir, json_data):
+    # Raw sources referenced by shader contexts, paths as resolved by make_datas
+    paths = []
+    for c in json_data['contexts']:
+        for stage in ['vertex_shader', 'fragment_shader', 'geometry_shader', 'tesscontrol_shader', 'tesseval_shader']:
+            if stage not in c:
+                continue
+            p = os.path.normpath(arm.lib.shader_source.stage_path(shader_dir, c, stage))
+            if p not in paths:
+                paths.append(p)
+    return paths
+
+def gather(path, files, uses_compiled):
+    # Collects path and all its includes recursively, compiled.glsl is tracked by constants instead
+    if path in files:
+        return
+    text = '\n'.join(arm.lib.shader_source.read(path).lines)
+    files[path] = text
+    for line in text.splitlines():
+        m = include_re.match(line)
+        if m == None:
+            continue
+        inc = m.group(1)
+        if os.path.basename(inc) == 'compiled.glsl':
+            uses_compiled.append(True)
+            continue
+        inc_path = os.path.normpath(os.path.join(os.path.dirname(path), inc))
+        if os.path.isfile(inc_path):
+            gather(inc_path, files, uses_compiled)
+
+def make_node(shader_dir, json_path, json_data, defs, constants):
+    # Returns dependency record of a single variant
+    files = {}
+    uses_compiled = []
+    for p in source_paths(shader_dir, json_data):
+        gather(p, files, uses_compiled)
+
+    used_constants = []
+    if len(uses_compiled) > 0:
+        words = set()
+        for text in files.values():
+            words.update(word_re.findall(text))
+        used_constants = sorted([constants[c] for c in constants if c in words])
+
+    h = hashlib.md5()
+    with open(json_path, 'rb') as f:
+        h.update(f.read())
+    root = os.path.dirname(os.path.normpath(shader_dir))
+    for p in sorted(files):
+        h.update(os.path.relpath(p, root).encode('utf-8')) # Same digest for any sdk location
+        h.update(files[p].encode('utf-8'))
+    h.update(repr(defs).encode('utf-8'))
+    h.update(repr(used_constants).encode('utf-8'))
+
+    node = {}
+    node['digest'] = h.hexdigest()
+    node['sources'] = sorted(files)
+    node['defs'] = defs
+    node['constants'] = used_constants
+    return node
+
+def sync_dir(src, dst):
+    # Copies files of src which are missing or differ in dst
+    if not os.path.isdir(dst):
+        shutil.copytree(src, dst)
+        return
+    for name in os.listdir(src):
+        s = src + '/' + name
+        d = dst + '/' + name
+        if not os.path.isfile(s):
+            continue
+        if os.path.isfile(d):
+            with open(s, 'rb') as f1, open(d, 'rb') as f2:
+                if f1.read() == f2.read():
+                    continue
+        shutil.copy(s, d)
@@ -0,0 +1,90 @@
+# Raw shader sources parsed once and shared by make_datas and make_variants
+# Preprocessor blocks are kept as a tree, evaluating defs does not re-tokenize lines
+import os
+import json
+
+sources = {} # Absolute path - (mtime, size, ShaderSource)
+jsons = {}
+
+class ShaderSource:
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.blocks = parse(lines)
+
+    def active(self, defs):
+        # Yields ('in', line), ('uniform', line) and ('other', line) items enabled by defs set
+        return evaluate(self.blocks, defs, True)
+
+def parse(lines):
+    # Items are ('in', line), ('uniform', line), ('other', line) or ('if', def, negate, items, else_items)
+    root = []
+    current = [root]
+    nodes = []
+    for line in lines:
+        line = line.lstrip()
+
+        if line.startswith('#ifdef') or line.startswith('#ifndef'):
+            node = ('if', line.split(' ')[1], line.startswith('#ifndef'), [], [])
+            current[-1].append(node)
+            nodes.append(node)
+            current.append(node[3])
+            continue
+
+        if line.startswith('#else'):
+            current[-1] = nodes[-1][4]
+            continue
+
+        if line.startswith('#endif'):
+            nodes.pop()
+            current.pop()
+            continue
+
+        if line.startswith('in '):
+            current[-1].append(('in', line))
+        elif line.startswith('uniform ') or line.startswith('//!uniform'):
+            current[-1].append(('uniform', line))
+        elif len(line) > 0 and line.startswith('//') == False:
+            # Only presence matters, consecutive lines are merged
+            items = current[-1]
+            if len(items) == 0 or items[-1][0] != 'other':
+                items.append(('other', line))
+    return root
+
+def evaluate(items, defs, enabled):
+    # Lines are enabled by their innermost block only, matching the original line by line parser
+    for item in items:
+        if item[0] == 'if':
+            found = (item[1] in defs) != item[2]
+            yield from evaluate(item[3], defs, found)
+            yield from evaluate(item[4], defs, not found)
+        elif enabled:
+            yield item
+
+def read(path):
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    cached = sources.get(path)
+    if cached != None and cached[0] == st.st_mtime and cached[1] == st.st_size:
+        return cached[2]
+    with open(path) as f:
+        source = ShaderSource(f.read().splitlines())
+    sources[path] = (st.st_mtime, st.st_size, source)
+    return source
+
+def read_json(path):
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    cached = jsons.get(path)
+    if cached != None and cached[0] == st.st_mtime and cached[1] == st.st_size:
+        return cached[2]
+    with open(path) as f:
+        json_data = json.loads(f.read())
+    jsons[path] = (st.st_mtime, st.st_size, json_data)
+    return json_data
+
+def stage_path(shader_dir, c, stage):
+    # Source file of shader stage in context c
+    if (stage + '_path') in c:
+        return os.path.join(shader_dir, c[stage + '_path'])
+    return os.path.join(shader_dir, c[stage])
@@ -0,0 +1,178 @@
+# Texture conversion stage, images are collected during export and converted afterwards
+# Converted files are validated by source content digest and conversion settings
+#
+# Blender data is not thread safe, pending conversions are split between background blender
+# processes running this file as script: blender -b --factory-startup --python texture_convert.py -- jobs.json
+# Module is standalone when run as script, arm package is not importable there
+import os
+import sys
+import json
+import hashlib
+import subprocess
+import collections
+
+quality = 90
+jobs = collections.OrderedDict() # Output path - job
+
+def reset():
+    global jobs
+    jobs = collections.OrderedDict()
+
+def file_digest(path):
+    h = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def add(image, dst, file_format, source=None, packed_data=None, packed_ext='', settings=None):
+    # image - passed back to in process conversion, source - image file on disk
+    # packed_data - bytes of packed image, saved next to outputs on demand
+    # settings - color management of scene and image, as gathered by arm.utils.image_color_settings
+    if dst in jobs:
+        return
+    job = {}
+    job['image'] = image
+    job['dst'] = dst
+    job['format'] = file_format
+    job['source'] = source
+    job['packed_data'] = packed_data
+    job['packed_ext'] = packed_ext
+    job['settings'] = settings if settings != None else {}
+    jobs[dst] = job
+
+def load_manifest(path):
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        try:
+            return json.load(f)
+        except ValueError:
+            return {}
+
+def job_key(job, digests):
+    # Identifies conversion result, digests of unchanged sources are reused by size and mtime
+    if job['packed_data'] != None:
+        digest = hashlib.md5(job['packed_data']).hexdigest()
+    else:
+        st = os.stat(job['source'])
+        rec = digests.get(job['source'])
+        if rec != None and rec[0] == st.st_size and rec[1] == st.st_mtime:
+            digest = rec[2]
+        else:
+            digest = file_digest(job['source'])
+        digests[job['source']] = [st.st_size, st.st_mtime, digest]
+    h = hashlib.md5(json.dumps(job['settings'], sort_keys=True).encode('utf-8'))
+    return digest + '_' + job['format'] + '_' + str(quality) + '_' + h.hexdigest()
+
+def stale_jobs(manifest):
+    # Returns jobs whose output is missing or was converted from different source or settings
+    result = []
+    digests = manifest.setdefault('sources', {})
+    for dst, job in jobs.items():
+        if job['packed_data'] == None and (job['source'] == None or not os.path.isfile(job['source'])):
+            continue # Missing source is reported by caller
+        job['key'] = job_key(job, digests)
+        if manifest.get('outputs', {}).get(dst) != job['key'] or not os.path.isfile(dst):
+            result.append(job)
+    return result
+
+def write_packed_sources(stale, src_dir):
+    # Workers can not access packed data of this blend, returns written files
+    written = []
+    for job in stale:
+        if job['packed_data'] == None:
+            continue
+        if not os.path.exists(src_dir):
+            os.makedirs(src_dir)
+        job['source'] = src_dir + '/' + job['key'].split('_', 1)[0] + '.' + job['packed_ext']
+        if not os.path.isfile(job['source']):
+            with open(job['source'], 'wb') as f:
+                f.write(job['packed_data'])
+            written.append(job['source'])
+    return written
+
+def run(manifest_path, blender_path, convert_fallback, max_workers=None):
+    # Converts stale jobs, convert_fallback(job) converts in this process
+    # Returns number of converted textures
+    manifest = load_manifest(manifest_path)
+    stale = stale_jobs(manifest)
+    out_dir = os.path.dirname(manifest_path)
+    if len(stale) > 0:
+        for job in stale:
+            d = os.path.dirname(job['dst'])
+            if d != '' and not os.path.exists(d):
+                os.makedirs(d)
+            if os.path.isfile(job['dst']): # Never ship stale conversion
+                os.remove(job['dst'])
+        # Spawning blender outweighs single conversion, curve mapping can not be passed to workers
+        remote = [job for job in stale if not job['settings'].get('use_curve_mapping', False)]
+        if blender_path == '' or len(stale) == 1:
+            remote = []
+        if len(remote) > 0:
+            written = write_packed_sources(remote, out_dir + '/src')
+            run_workers(remote, out_dir, blender_path, max_workers)
+            for path in written:
+                os.remove(path)
+        for job in stale:
+            if not os.path.isfile(job['dst']):
+                convert_fallback(job)
+
+    outputs = manifest.get('outputs', {})
+    for job in stale:
+        if os.path.isfile(job['dst']):
+            outputs[job['dst']] = job['key']
+    manifest['outputs'] = outputs
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, sort_keys=True, indent=4)
+    reset()
+    return len(stale)
+
+def run_workers(stale, out_dir, blender_path, max_workers=None):
+    # Splits jobs between background blender processes
+    if max_workers == None:
+        max_workers = os.cpu_count() or 1
+    count = min(max_workers, len(stale))
+    procs = []
+    for i in range(count):
+        chunk = [[job['source'], job['dst'], job['format'], job['settings']] for job in stale[i::count]]
+        jobs_path = out_dir + '/convert_jobs_' + str(i) + '.json'
+        with open(jobs_path, 'w') as f:
+            json.dump({'quality': quality, 'jobs': chunk}, f)
+        cmd = [blender_path, '--background', '--factory-startup', '--python', os.path.abspath(__file__), '--', jobs_path]
+        procs.append((subprocess.Popen(cmd, stdout=subprocess.DEVNULL), jobs_path))
+    for p, jobs_path in procs:
+        p.wait()
+        os.remove(jobs_path)
+
+def worker_main(jobs_path):
+    import bpy
+    with open(jobs_path) as f:
+        data = json.load(f)
+    scene = bpy.context.scene
+    for source, dst, file_format, settings in data['jobs']:
+        print('Armory Info: Writing ' + dst)
+        try:
+            # Same settings as write_image in exporting blender
+            scene.display_settings.display_device = settings['display_device']
+            scene.view_settings.view_transform = settings['view_transform']
+            scene.view_settings.look = settings['look']
+            scene.view_settings.exposure = settings['exposure']
+            scene.view_settings.gamma = settings['gamma']
+            scene.render.image_settings.color_mode = settings['color_mode']
+            scene.render.image_settings.quality = data['quality']
+            scene.render.image_settings.file_format = file_format
+            image = bpy.data.images.load(source)
+            image.colorspace_settings.name = settings['colorspace']
+            image.use_alpha = settings['use_alpha']
+            image.alpha_mode = settings['alpha_mode']
+            image.save_render(dst, scene)
+            bpy.data.images.remove(image)
+        except Exception as e: # Left to the exporting process, worker stdout is discarded
+            print('Armory Warning: Converting ' + source + ' failed in worker - ' + repr(e), file=sys.stderr)
+            continue
+
+if __name__ == '__main__':
+    worker_main(sys.argv[sys.argv.index('--') + 1])
@@ -18,27 +18,27 @@ import arm.make_state as state
 import arm.path_tracer as path_tracer
 import arm.assets as assets
 import arm.log as log
-import arm.lib.make_datas
-import arm.lib.make_variants
+import arm.lib.shader_deps
+import arm.lib.shader_cache
+import arm.lib.shader_build
+import arm.lib.shader_source
 import arm.lib.server
+import arm.lib.texture_convert
+import arm.lib.profiler as profiler
 from arm.exporter import ArmoryExporter
 
 exporter = ArmoryExporter()
 scripts_mtime = 0 # Monitor source changes
 
-def compile_shader(raw_shaders_path, shader_name, defs):
-    os.chdir(raw_shaders_path + './' + shader_name)
+# Variants are built in worker processes from this count on, forking blender is not measured on multi core machines yet
+# Kept above the 30 to 40 pass variants of a typical project until tools/bench/bench_shader_pool.py is run inside blender
+shader_pool_min_variants = 256
 
-    # Open json file
-    json_name = shader_name + '.json'
-    base_name = json_name.split('.', 1)[0]
-    with open(json_name) as f:
-        json_file = f.read()
-    json_data = json.loads(json_file)
-    
-    fp = arm.utils.get_fp_build()
-    arm.lib.make_datas.make(base_name, json_data, fp, defs)
-    arm.lib.make_variants.make(base_name, json_data, fp, defs)
+def shader_deps_node(raw_shaders_path, shader_name, defs, constants):
+    shader_dir = raw_shaders_path + shader_name
+    json_path = shader_dir + '/' + shader_name + '.json'
+    json_data = arm.lib.shader_source.read_json(json_path)
+    return arm.lib.shader_deps.make_node(shader_dir, json_path, json_data, defs, constants)
 
 def export_data(fp, sdk_path, is_play=False, is_publish=False, in_viewport=False):
     global exporter
@@ -67,21 +67,24 @@ def export_data(fp, sdk_path, is_play=False, is_publish=False, in_viewport=False
     export_navigation = bpy.data.worlds['Arm'].arm_navigation != 'Disabled'
     export_ui = bpy.data.worlds['Arm'].arm_ui != 'Disabled'
     assets.reset()
+    arm.lib.texture_convert.reset()
 
     # Build node trees
     # TODO: cache
-    make_logic.build_node_trees()
-    active_worlds = set()
-    for scene in bpy.data.scenes:
-        if scene.game_export and scene.world != None:
-            active_worlds.add(scene.world)
-    world_outputs = make_world.build_node_trees(active_worlds)
-    make_renderpath.build_node_trees(assets_path)
-    for wout in world_outputs:
-        make_world.write_output(wout)
+    with profiler.span('Logic trees'):
+        make_logic.build_node_trees()
+    with profiler.span('World and render path trees'):
+        active_worlds = set()
+        for scene in bpy.data.scenes:
+            if scene.game_export and scene.world != None:
+                active_worlds.add(scene.world)
+        world_outputs = make_world.build_node_trees(active_worlds)
+        make_renderpath.build_node_trees(assets_path)
+        for wout in world_outputs:
+            make_world.write_output(wout)
 
     # Export scene data
-    assets.embedded_data = sorted(list(set(assets.embedded_data)))
+    assets.embedded_data.sort()
     physics_found = False
     navigation_found = False
     ui_found = False
@@ -91,7 +94,8 @@ def export_data(fp, sdk_path, is_play=False, is_publish=False, in_viewport=False
         if scene.game_export:
             ext = '.zip' if (scene.data_compressed and is_publish) else '.arm'
             asset_path = arm.utils.build_dir() + '/compiled/Assets/' + arm.utils.safestr(scene.name) + ext
-            exporter.execute(bpy.context, asset_path, scene=scene)
+            with profiler.span('Scene ' + scene.name):
+                exporter.execute(bpy.context, asset_path, scene=scene)
             if ArmoryExporter.export_physics:
                 physics_found = True
             if ArmoryExporter.export_navigation:
@@ -99,6 +103,10 @@ def export_data(fp, sdk_path, is_play=False, is_publish=False, in_viewport=False
             if ArmoryExporter.export_ui:
                 ui_found = True
             assets.add(asset_path)
+
+    # Convert textures collected by material export
+    with profiler.span('Texture conversion'):
+        arm.utils.convert_images()
     
     if physics_found == False: # Disable physics if no rigid body is exported
         export_physics = False
@@ -112,40 +120,89 @@ def export_data(fp, sdk_path, is_play=False, is_publish=False, in_viewport=False
     if wrd.arm_ui == 'Enabled':
         export_ui = True
 
+    # Write compiled.glsl, constants are tracked by shader variant dependencies
+    if not os.path.exists(arm.utils.build_dir() + '/compiled/Shaders'):
+        os.makedirs(arm.utils.build_dir() + '/compiled/Shaders')
+    write_data.write_compiledglsl()
+
     # Write referenced shader variants
-    for ref in assets.shader_datas:
-        # Data does not exist yet
-        if not os.path.isfile(fp + '/' + ref):
-            shader_name = ref.split('/')[3] # Extract from 'build/compiled/...'
-            defs = make_utils.def_strings_to_array(wrd.world_defs + wrd.rp_defs)
-            if shader_name.startswith('compositor_pass'):
-                defs += make_utils.def_strings_to_array(wrd.compo_defs)
-            elif shader_name.startswith('grease_pencil'):
-                defs = []
-            compile_shader(raw_shaders_path, shader_name, defs)
-
-    # Reset path
-    os.chdir(fp)
+    with profiler.span('Shader variants'):
+        build_shader_variants(fp, raw_shaders_path, wrd)
 
     # Copy std shaders
-    if not os.path.isdir(arm.utils.build_dir() + '/compiled/Shaders/std'):
-        shutil.copytree(raw_shaders_path + 'std', arm.utils.build_dir() + '/compiled/Shaders/std')
-
-    # Write compiled.glsl
-    write_data.write_compiledglsl()
+    arm.lib.shader_deps.sync_dir(raw_shaders_path + 'std', arm.utils.build_dir() + '/compiled/Shaders/std')
 
     # Write khafile.js
-    enable_dce = is_publish and wrd.arm_dce
-    write_data.write_khafilejs(is_play, export_physics, export_navigation, export_ui, is_publish, enable_dce)
-
-    # Write Main.hx - depends on write_khafilejs for writing number of assets
-    resx, resy = arm.utils.get_render_resolution(arm.utils.get_active_scene())
-    write_data.write_main(resx, resy, is_play, in_viewport, is_publish)
-    if resx != state.last_resx or resy != state.last_resy:
+    with profiler.span('Khafile and Main.hx'):
+        enable_dce = is_publish and wrd.arm_dce
+        write_data.write_khafilejs(is_play, export_physics, export_navigation, export_ui, is_publish, enable_dce)
+
+        # Write Main.hx - depends on write_khafilejs for writing number of assets
+        resx, resy = arm.utils.get_render_resolution(arm.utils.get_active_scene())
+        write_data.write_main(resx, resy, is_play, in_viewport, is_publish)
+    added, removed, changed = assets.asset_diff
+    if resx != state.last_resx or resy != state.last_resy or len(added) > 0 or len(removed) > 0: # Asset count is compiled into Main.hx
         wrd.arm_recompile = True
     state.last_resx = resx
     state.last_resy = resy
 
+def build_shader_variants(fp, raw_shaders_path, wrd):
+    deps_path = arm.utils.build_dir() + '/compiled/Shaders/deps.json'
+    deps = arm.lib.shader_deps.load(deps_path)
+    constants = arm.lib.shader_deps.parse_constants(arm.utils.build_dir() + '/compiled/Shaders/compiled.glsl')
+    jobs = []
+    for ref in sorted(assets.shader_datas):
+        shader_name = ref.split('/')[3] # Extract from 'build/compiled/...'
+        defs = make_utils.def_strings_to_array(wrd.world_defs + wrd.rp_defs)
+        if shader_name.startswith('compositor_pass'):
+            defs += make_utils.def_strings_to_array(wrd.compo_defs)
+        elif shader_name.startswith('grease_pencil'):
+            defs = []
+        node = None
+        if '/compiled/Shaders/' in ref:
+            # Data does not exist yet or its sources changed
+            node = shader_deps_node(raw_shaders_path, shader_name, defs, constants)
+            if ref in deps and deps[ref]['digest'] == node['digest'] and os.path.isfile(fp + '/' + ref):
+                continue
+        elif os.path.isfile(fp + '/' + ref): # Material data is written by make_shader
+            continue
+        jobs.append((ref, shader_name, defs, node))
+
+    # Each variant writes its own files, results are recorded in sorted order
+    fp_build = arm.utils.get_fp_build()
+    cache_path = None
+    if wrd.arm_cache_shaders and wrd.arm_shader_cache_size > 0:
+        cache_path = arm.utils.get_shader_cache_path()
+    variants = []
+    for ref, shader_name, defs, node in jobs:
+        # Pass variants only, material data is not tracked
+        job_cache_path = cache_path if node != None else None
+        cache_name = arm.lib.shader_cache.entry_name(shader_name, node['digest'], wrd.arm_minimize) if node != None else None
+        variants.append((shader_name, defs, job_cache_path, cache_name))
+    workers = os.cpu_count() or 1
+    if len(variants) >= shader_pool_min_variants and workers > 1:
+        # Parsing is pure python, threads would be serialized by the GIL
+        # Refs are sorted so variants of one shader stay in the same batch and reuse its parsed sources
+        batch_size = -(-len(variants) // (workers * 4))
+        with arm.utils.process_pool(workers) as pool:
+            futures = []
+            for i in range(0, len(variants), batch_size):
+                futures.append(pool.submit(arm.lib.shader_build.build_batch, raw_shaders_path, fp_build, wrd.arm_minimize, variants[i:i + batch_size]))
+            for future in futures:
+                for shader_name, t, end, pid, tid in future.result():
+                    profiler.add(shader_name, 'shader', t, end, pid, tid)
+    else:
+        for shader_name, defs, job_cache_path, cache_name in variants:
+            with profiler.span(shader_name, 'shader'):
+                arm.lib.shader_build.build_variant(raw_shaders_path, shader_name, defs, fp_build, wrd.arm_minimize, job_cache_path, cache_name)
+    for ref, shader_name, defs, node in jobs:
+        if node != None:
+            deps[ref] = node
+    if cache_path != None:
+        arm.lib.shader_cache.evict(cache_path, wrd.arm_shader_cache_size * 1024 * 1024)
+
+    arm.lib.shader_deps.save(deps_path, deps)
+
 def compile_project(target_name=None, is_publish=False, watch=False, patch=False):
     wrd = bpy.data.worlds['Arm']
 
@@ -281,7 +338,11 @@ def build_project(is_play=False, is_publish=False, in_viewport=False, target=Non
                 f.write(text.as_string())
 
     # Export data
-    export_data(fp, sdk_path, is_play=is_play, is_publish=is_publish, in_viewport=in_viewport)
+    profiler.reset(wrd.arm_profile_build)
+    with profiler.span('Export data'):
+        export_data(fp, sdk_path, is_play=is_play, is_publish=is_publish, in_viewport=in_viewport)
+    profiler.write_trace(arm.utils.get_fp_build() + '/trace.json')
+    profiler.print_summary()
 
     if state.target == 'html5':
         w, h = arm.utils.get_render_resolution(arm.utils.get_active_scene())
@@ -2,6 +2,7 @@ import os
 import bpy
 import arm.utils
 import arm.log
+import arm.lib.profiler as profiler
 
 parsed_nodes = []
 parsed_labels = dict()
@@ -19,7 +20,8 @@ def build_node_trees():
     for node_group in bpy.data.node_groups:
         if node_group.bl_idname == 'ArmLogicTreeType': # Build only logic trees
             node_group.use_fake_user = True # Keep fake references for now
-            build_node_tree(node_group)
+            with profiler.span(node_group.name, 'logic'):
+                build_node_tree(node_group)
 
 def build_node_tree(node_group):
     global parsed_nodes
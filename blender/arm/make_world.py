@@ -8,6 +8,8 @@ import arm.assets as assets
 import arm.utils
 import arm.nodes as nodes
 import arm.log as log
+import arm.lib.profiler as profiler
+import arm.lib.texture_convert as texture_convert
 
 def build_node_trees(active_worlds):
     s = bpy.data.filepath.split(os.path.sep)
@@ -218,8 +220,7 @@ def parse_color(world, node, context, envmap_strength_const):
             filepath = unpack_filepath
 
             if do_convert:
-                if not os.path.isfile(unpack_filepath):
-                    arm.utils.write_image(image, unpack_filepath, file_format=target_format)
+                texture_convert.add(image, unpack_filepath, target_format, packed_data=image.packed_file.data, packed_ext=ext, settings=arm.utils.image_color_settings(image))
 
             elif os.path.isfile(unpack_filepath) == False or os.path.getsize(unpack_filepath) != image.packed_file.size:
                 with open(unpack_filepath, 'wb') as f:
@@ -230,21 +231,24 @@ def parse_color(world, node, context, envmap_strength_const):
             if do_convert:
                 converted_path = arm.utils.get_fp_build() + '/compiled/Assets/unpacked/' + tex['file']
                 filepath = converted_path
-                # TODO: delete cache when file changes
-                if not os.path.isfile(converted_path):
-                    arm.utils.write_image(image, converted_path, file_format=target_format)
+                texture_convert.add(image, converted_path, target_format, source=arm.utils.asset_path(image.filepath), settings=arm.utils.image_color_settings(image))
                 assets.add(converted_path)
             else:
                 # Link image path to assets
                 assets.add(arm.utils.asset_path(image.filepath))
 
+        # Envmap is read by probe generation right away
+        if do_convert:
+            arm.utils.convert_images()
+
         # Generate prefiltered envmaps
         world.world_envtex_name = tex['file']
         world.world_envtex_irr_name = tex['file'].rsplit('.', 1)[0]
         disable_hdr = target_format == 'JPEG'
         
         mip_count = world.world_envtex_num_mips
-        mip_count = write_probes.write_probes(filepath, disable_hdr, mip_count, generate_radiance=wrd.generate_radiance)
+        with profiler.span(tex['file'], 'probe'):
+            mip_count = write_probes.write_probes(filepath, disable_hdr, mip_count, generate_radiance=wrd.generate_radiance)
         
         world.world_envtex_num_mips = mip_count
         
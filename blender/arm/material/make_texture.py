@@ -5,6 +5,8 @@ import arm.utils
 import arm.assets as assets
 import arm.material.mat_state as mat_state
 import arm.make_state as state
+import arm.lib.image_header as image_header
+import arm.lib.texture_convert as texture_convert
 import shutil
 
 def make(image_node, tex_name, matname=None):
@@ -40,15 +42,24 @@ def make(image_node, tex_name, matname=None):
 
     if image.packed_file != None or not is_ascii(texfile):
         # Extract packed data / copy non-ascii texture
+        if image.packed_file == None and not os.path.isfile(texpath):
+            log.warn('Material ' + matname + '/' + image.name + ' - file not found(' + image.filepath + ')')
+            return None
         unpack_path = arm.utils.get_fp_build() + '/compiled/Assets/unpacked'
         if not os.path.exists(unpack_path):
             os.makedirs(unpack_path)
         unpack_filepath = unpack_path + '/' + tex['file']
         
+        # Header of converted file is not available until conversion stage
+        filepath = None
         if do_convert:
-            if not os.path.isfile(unpack_filepath):
-                arm.utils.write_image(image, unpack_filepath)
+            if image.packed_file != None:
+                texture_convert.add(image, unpack_filepath, 'JPEG', packed_data=image.packed_file.data, packed_ext=ext, settings=arm.utils.image_color_settings(image))
+            else:
+                texture_convert.add(image, unpack_filepath, 'JPEG', source=texpath, settings=arm.utils.image_color_settings(image))
+                filepath = texpath
         else:
+            filepath = unpack_filepath
 
             # Write bytes if size is different or file does not exist yet
             if image.packed_file != None:
@@ -66,12 +77,11 @@ def make(image_node, tex_name, matname=None):
         if not os.path.isfile(arm.utils.asset_path(image.filepath)):
             log.warn('Material ' + matname + '/' + image.name + ' - file not found(' + image.filepath + ')')
             return None
+        filepath = texpath
 
         if do_convert:
             converted_path = arm.utils.get_fp_build() + '/compiled/Assets/unpacked/' + tex['file']
-            # TODO: delete cache when file changes
-            if not os.path.isfile(converted_path):
-                arm.utils.write_image(image, converted_path)
+            texture_convert.add(image, converted_path, 'JPEG', source=texpath, settings=arm.utils.image_color_settings(image))
             assets.add(converted_path)
         else:
             # Link image path to assets
@@ -95,8 +105,10 @@ def make(image_node, tex_name, matname=None):
     elif texfilter == 'Point':
         interpolation = 'Closest'
     
-    # TODO: Blender seems to load full images on size request, cache size instead
-    powimage = is_pow(image.size[0]) and is_pow(image.size[1])
+    # Blender loads full images on size request, read dimensions from file header instead
+    info = image_header.read(filepath) if filepath != None else None
+    size = (info.width, info.height) if info != None else image.size
+    powimage = is_pow(size[0]) and is_pow(size[1])
 
     if state.target == 'html5' and powimage == False and (image_node.interpolation == 'Cubic' or image_node.interpolation == 'Smart'):
         log.warn(matname + '/' + image.name + ' - non power of 2 texture using ' + image_node.interpolation + ' interpolation requires WebGL2')
@@ -57,6 +57,7 @@ def initObjectProperties():
     bpy.types.Mesh.my_lodlist = bpy.props.CollectionProperty(type=ListLodItem)
     bpy.types.Mesh.lodlist_index = bpy.props.IntProperty(name="Index for my_list", default=0)
     bpy.types.Mesh.lod_material = bpy.props.BoolProperty(name="Material Lod", description="Use materials of lod objects", default=False)
+    bpy.types.Mesh.lod_generate = bpy.props.BoolProperty(name="Generated Lod", description="Simplify mesh into lod levels on export instead of using lod objects", default=False)
 
 class LIST_OT_LodNewItem(bpy.types.Operator):
     # Add a new item to the list
@@ -112,30 +113,34 @@ class ArmoryGenerateLodButton(bpy.types.Operator):
         mdata.lodlist_index = 0
         mdata.my_lodlist.clear()
 
-        # Lod levels
+        # Lod meshes are simplified by exporter, each level reduced by arm_lod_gen_ratio
+        # Exporter does not simplify skinned meshes, they get decimated lod objects
+        skinned = obj.find_armature() != None
+        mdata.lod_generate = not skinned
         wrd = bpy.data.worlds['Arm']
         ratio = wrd.arm_lod_gen_ratio
         num_levels = wrd.arm_lod_gen_levels
-        for level in range(0, num_levels):
-            new_obj = obj.copy()
-            for i in range(0, 3):
-                new_obj.location[i] = 0
-                new_obj.rotation_euler[i] = 0
-                new_obj.scale[i] = 1
-            new_obj.data = obj.data.copy()
-            new_obj.name = self.lod_name(obj.name, level)
-            new_obj.parent = obj
-            new_obj.hide = True
-            new_obj.hide_render = True
-            mod = new_obj.modifiers.new('Decimate', 'DECIMATE')
-            mod.ratio = ratio
-            ratio *= wrd.arm_lod_gen_ratio
-            context.scene.objects.link(new_obj)
-            
+        if skinned:
+            for level in range(0, num_levels):
+                new_obj = obj.copy()
+                for i in range(0, 3):
+                    new_obj.location[i] = 0
+                    new_obj.rotation_euler[i] = 0
+                    new_obj.scale[i] = 1
+                new_obj.data = obj.data.copy()
+                new_obj.name = self.lod_name(obj.name, level)
+                new_obj.parent = obj
+                new_obj.hide = True
+                new_obj.hide_render = True
+                mod = new_obj.modifiers.new('Decimate', 'DECIMATE')
+                mod.ratio = ratio
+                ratio *= wrd.arm_lod_gen_ratio
+                context.scene.objects.link(new_obj)
+
         # Screen sizes
         for level in range(0, num_levels):
             mdata.my_lodlist.add()
-            mdata.my_lodlist[-1].name = self.lod_name(obj.name, level)
+            mdata.my_lodlist[-1].name = self.lod_name(obj.name if skinned else mdata.name, level)
             mdata.my_lodlist[-1].screen_size_prop = (1 - (1 / (num_levels + 1)) * level) - (1 / (num_levels + 1))
 
         return{'FINISHED'}
@@ -156,7 +161,9 @@ class ToolsLodPanel(bpy.types.Panel):
             return
 
         mdata = obj.data
-        layout.prop(mdata, "lod_material")
+        row = layout.row()
+        row.prop(mdata, "lod_material")
+        row.prop(mdata, "lod_generate")
 
         rows = 2
         if len(mdata.my_lodlist) > 1:
@@ -170,8 +177,9 @@ class ToolsLodPanel(bpy.types.Panel):
 
         if mdata.lodlist_index >= 0 and len(mdata.my_lodlist) > 0:
             item = mdata.my_lodlist[mdata.lodlist_index]
-            row = layout.row()
-            row.prop_search(item, "name", bpy.data, "objects", "Object")
+            if not mdata.lod_generate:
+                row = layout.row()
+                row.prop_search(item, "name", bpy.data, "objects", "Object")
             row = layout.row()
             row.prop(item, "screen_size_prop")
 
@@ -409,19 +409,39 @@ class ArmoryPlayerPanel(bpy.types.Panel):
             row = layout.row(align=True)
             row.prop(wrd, 'arm_cache_shaders')
             row.prop(wrd, 'arm_cache_compiler')
+            layout.prop(wrd, 'arm_shader_cache_size')
+            layout.prop(wrd, 'arm_profile_build')
             row = layout.row(align=True)
             row.prop(wrd, 'arm_minimize')
             row.prop(wrd, 'arm_optimize_mesh')
+            layout.prop(wrd, 'arm_optimize_vertex_cache')
+            row = layout.row(align=True)
+            row.prop(wrd, 'arm_mesh_clusters')
+            if wrd.arm_mesh_clusters:
+                row.prop(wrd, 'arm_mesh_cluster_size')
             row = layout.row(align=True)
             row.prop(wrd, 'arm_gpu_processing')
             row.prop(wrd, 'arm_sampled_animation')
             row = layout.row(align=True)
+            row.prop(wrd, 'arm_compress_animation')
+            if wrd.arm_compress_animation:
+                row.prop(wrd, 'arm_compress_animation_tolerance')
+            row = layout.row(align=True)
             row.prop(wrd, 'arm_batch_meshes')
             row.prop(wrd, 'arm_batch_materials')
+            layout.prop(wrd, 'arm_instancing_auto')
+            row = layout.row(align=True)
+            row.prop(wrd, 'arm_batch_static')
+            if wrd.arm_batch_static:
+                row.prop(wrd, 'arm_batch_cell_size')
             row = layout.row(align=True)
             row.prop(wrd, 'arm_deinterleaved_buffers')
             row.prop(wrd, 'arm_export_tangents')
+            row = layout.row(align=True)
+            row.prop(wrd, 'arm_interleaved_buffers')
+            row.prop(wrd, 'arm_compress_vertex_data')
             layout.prop(wrd, 'arm_stream_scene')
+            layout.prop(wrd, 'arm_parallel_mesh')
             layout.label('Libraries')
             layout.prop(wrd, 'arm_physics')
             layout.prop(wrd, 'arm_navigation')
@@ -5,10 +5,16 @@ import glob
 import platform
 import zipfile
 import re
+import contextlib
+import multiprocessing
+import multiprocessing.spawn
+import concurrent.futures
 import arm.lib.armpack
+import arm.lib.texture_convert
 
 def write_arm(filepath, output):
     if filepath.endswith('.zip'):
+        # Zip entries can not be written incrementally on Python 3.5
         with zipfile.ZipFile(filepath, 'w', zipfile.ZIP_DEFLATED) as zip_file:
             if bpy.data.worlds['Arm'].arm_minimize:
                 zip_file.writestr('data.arm', arm.lib.armpack.packb(output))
@@ -17,7 +23,7 @@ def write_arm(filepath, output):
     else:
         if bpy.data.worlds['Arm'].arm_minimize:
             with open(filepath, 'wb') as f:
-                f.write(arm.lib.armpack.packb(output))
+                arm.lib.armpack.pack(output, f) # Stream into file, no intermediate buffer
         else:
             with open(filepath, 'w') as f:
                 f.write(json.dumps(output, sort_keys=True, indent=4))
@@ -37,6 +43,29 @@ def write_image(image, path, file_format='JPEG'):
     ren.image_settings.quality = orig_quality
     ren.image_settings.file_format = orig_file_format
 
+def image_color_settings(image):
+    # Color management used by save_render, background conversion workers apply the same settings
+    scene = bpy.context.scene
+    s = {}
+    s['display_device'] = scene.display_settings.display_device
+    s['view_transform'] = scene.view_settings.view_transform
+    s['look'] = scene.view_settings.look
+    s['exposure'] = scene.view_settings.exposure
+    s['gamma'] = scene.view_settings.gamma
+    s['use_curve_mapping'] = scene.view_settings.use_curve_mapping
+    s['color_mode'] = scene.render.image_settings.color_mode
+    s['colorspace'] = image.colorspace_settings.name
+    s['use_alpha'] = image.use_alpha
+    s['alpha_mode'] = image.alpha_mode
+    return s
+
+def convert_images():
+    # Runs texture conversions collected during export, returns number of converted images
+    def convert(job):
+        write_image(job['image'], job['dst'], file_format=job['format'])
+    manifest_path = get_fp_build() + '/compiled/Assets/unpacked/conversions.json'
+    return arm.lib.texture_convert.run(manifest_path, bpy.app.binary_path, convert)
+
 def blend_name():
     return bpy.path.basename(bpy.context.blend_data.filepath).rsplit('.')[0]
 
@@ -51,6 +80,23 @@ def get_fp():
 def get_fp_build():
     return get_fp() + '/' + build_dir()
 
+def get_shader_cache_path():
+    # Shared by all projects of the user
+    return bpy.utils.user_resource('CONFIG', 'armory/shader_cache', create=True)
+
+@contextlib.contextmanager
+def process_pool(max_workers=None):
+    # Spawned workers need a regular interpreter, not the blender executable
+    # Executable is process wide state shared with other addons, restored once the pool is shut down
+    executable = multiprocessing.spawn.get_executable()
+    if bpy.app.binary_path_python != '':
+        multiprocessing.set_executable(bpy.app.binary_path_python)
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers) as pool:
+            yield pool
+    finally:
+        multiprocessing.set_executable(executable)
+
 def get_os():
     s = platform.system()
     if s == 'Windows':
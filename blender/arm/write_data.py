@@ -28,10 +28,10 @@ def write_khafilejs(is_play, export_physics, export_navigation, export_ui, is_pu
 
     sdk_path = arm.utils.get_sdk_path()
     
-    # Merge duplicates and sort
-    shader_references = sorted(list(set(assets.shaders)))
-    shader_data_references = sorted(list(set(assets.shader_datas)))
-    asset_references = sorted(list(set(assets.assets)))
+    # Registries hold unique paths, equal asset files are merged by finalize
+    shader_references = sorted(assets.shaders)
+    shader_data_references = sorted(assets.shader_datas)
+    asset_references = assets.finalize()
     wrd = bpy.data.worlds['Arm']
 
     with open('khafile.js', 'w') as f:
@@ -154,7 +154,7 @@ package ;
 class Main {
     public static inline var projectName = '""" + arm.utils.safestr(wrd.arm_project_name) + """';
     public static inline var projectPackage = '""" + arm.utils.safestr(wrd.arm_project_package) + """';
-    public static inline var projectAssets = """ + str(len(assets.assets)) + """;
+    public static inline var projectAssets = """ + str(len(assets.asset_references)) + """;
     public static var projectWindowMode = kha.WindowMode.""" + str(wrd.arm_winmode) + """;
     static inline var projectWidth = """ + str(resx) + """;
     static inline var projectHeight = """ + str(resy) + """;
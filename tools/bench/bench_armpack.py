@@ -0,0 +1,66 @@
+# Typed array packing throughput of arm.lib.armpack against the per element encoder it replaced
+# Usage: python bench_armpack.py [vertex count]
+import io
+import sys
+import struct
+import numpy
+import bench_common
+bench_common.setup()
+import arm.lib.armpack as armpack
+
+def pack_per_element(obj, fp):
+    # Previous encoder, one struct.pack and write per typed array element
+    if isinstance(obj, dict):
+        armpack._pack_map_header(len(obj), fp)
+        for k, v in obj.items():
+            pack_per_element(k, fp)
+            pack_per_element(v, fp)
+    elif isinstance(obj, list):
+        armpack._pack_array_header(len(obj), fp)
+        if len(obj) > 0 and isinstance(obj[0], float):
+            fp.write(b"\xca")
+            for e in obj:
+                fp.write(struct.pack(">f", e))
+        elif len(obj) > 0 and isinstance(obj[0], int):
+            fp.write(b"\xd2")
+            for e in obj:
+                fp.write(struct.pack(">i", e))
+        else:
+            for e in obj:
+                pack_per_element(e, fp)
+    else:
+        armpack.pack(obj, fp)
+
+def make_mesh(vertex_count, as_numpy):
+    rng = numpy.random.RandomState(0)
+    arrays = [('pos', 3), ('nor', 3), ('tex', 2)]
+    o = {'name': 'bench', 'vertex_arrays': [], 'index_arrays': []}
+    for attrib, size in arrays:
+        values = rng.rand(vertex_count * size).astype(numpy.float32)
+        o['vertex_arrays'].append({'attrib': attrib, 'size': size, 'values': values if as_numpy else values.astype(numpy.float64).tolist()})
+    indices = rng.randint(0, vertex_count, vertex_count * 3).astype(numpy.int32)
+    o['index_arrays'].append({'size': 3, 'material': 0, 'values': indices if as_numpy else indices.tolist()})
+    return {'mesh_datas': [o]}
+
+def packb(fn, obj):
+    fp = io.BytesIO()
+    fn(obj, fp)
+    return fp.getvalue()
+
+def main():
+    vertex_count = int(sys.argv[1]) if len(sys.argv) > 1 else 250000
+    lists = make_mesh(vertex_count, False)
+    buffers = make_mesh(vertex_count, True)
+
+    t_old, old = bench_common.best_time(lambda: packb(pack_per_element, lists), 1)
+    t_new, new = bench_common.best_time(lambda: packb(armpack.pack, lists))
+    t_buf, buf = bench_common.best_time(lambda: packb(armpack.pack, buffers))
+    mb = len(new) / 1e6
+    print('{0} vertices, {1:.1f} MB packed'.format(vertex_count, mb))
+    print('per element  {0:7.3f}s {1:7.1f} MB/s'.format(t_old, mb / t_old))
+    print('lists        {0:7.3f}s {1:7.1f} MB/s'.format(t_new, mb / t_new))
+    print('numpy        {0:7.3f}s {1:7.1f} MB/s'.format(t_buf, mb / t_buf))
+    print('identical output: ' + str(old == new == buf))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+# Shared setup of export benchmarks, run scripts from any directory with plain python
+# Only bpy free modules of arm.lib are imported, the addon itself is not loaded
+import os
+import sys
+import time
+import types
+import numpy
+
+arm_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'blender', 'arm')
+
+def setup():
+    # Package without running arm/__init__.py, which registers the Blender addon
+    if 'arm' not in sys.modules:
+        arm = types.ModuleType('arm')
+        arm.__path__ = [os.path.normpath(arm_path)]
+        sys.modules['arm'] = arm
+
+def best_time(fn, repeat=3):
+    # Best wall time of repeat runs and result of last run
+    best = None
+    for i in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        t = time.perf_counter() - t
+        if best == None or t < best:
+            best = t
+    return best, result
+
+def grid(n, uv=True):
+    # Triangulated n x n quad grid, returns positions, normals, uvs and indices
+    xs, ys = numpy.meshgrid(numpy.arange(n + 1, dtype=numpy.float64), numpy.arange(n + 1, dtype=numpy.float64))
+    pos = numpy.stack((xs.ravel(), ys.ravel(), numpy.sin(xs.ravel() * 0.1)), axis=1)
+    nor = numpy.zeros_like(pos)
+    nor[:, 2] = 1.0
+    uvs = numpy.stack((xs.ravel(), ys.ravel()), axis=1) / n
+    q = (numpy.arange(n)[None, :] + numpy.arange(n)[:, None] * (n + 1)).ravel()
+    tris = numpy.stack((q, q + 1, q + n + 1, q + 1, q + n + 2, q + n + 1), axis=1).reshape(-1, 3)
+    return pos, nor, uvs, tris
@@ -0,0 +1,77 @@
+# Mesh file writing of arm.lib.mesh_export serially and in the process pool used by the exporter
+# Jobs are synthetic grid meshes in the layout extract_mesh_quality gathers from bpy
+# Usage: python bench_mesh_pool.py [mesh count] [grid size]
+import os
+import sys
+import time
+import shutil
+import tempfile
+import concurrent.futures
+import numpy
+import bench_common
+bench_common.setup()
+import arm.lib.mesh_export as mesh_export
+
+def make_job(n, seed):
+    pos, nor, uvs, tris = bench_common.grid(n)
+    pos = pos + seed # Distinct content per mesh
+    corners = tris.ravel()
+    job = {}
+    job['rows'] = numpy.concatenate((pos[corners], nor[corners], uvs[corners]), axis=1)
+    job['vertex_index'] = corners.astype(numpy.int32)
+    job['material_table'] = (numpy.arange(len(tris)) % 2).astype(numpy.int32)
+    job['has_col'] = False
+    job['export_vcols'] = False
+    job['uv_count'] = 1
+    job['export_uvs'] = True
+    job['export_tangents'] = True
+    return job
+
+def make_obj(i):
+    o = {}
+    o['name'] = 'mesh_' + str(i)
+    return o
+
+def run_serial(out_dir, jobs):
+    for i, job in enumerate(jobs):
+        mesh_export.export_mesh_job(out_dir + '/mesh_' + str(i) + '.arm', make_obj(i), job, True, None, False, True)
+
+def run_pool(out_dir, jobs):
+    with concurrent.futures.ProcessPoolExecutor() as pool:
+        futures = []
+        for i, job in enumerate(jobs):
+            futures.append(pool.submit(mesh_export.export_mesh_job, out_dir + '/mesh_' + str(i) + '.arm', make_obj(i), job, True, None, False, True))
+        for future in futures:
+            future.result()
+
+def read_outputs(out_dir, count):
+    data = []
+    for i in range(count):
+        with open(out_dir + '/mesh_' + str(i) + '.arm', 'rb') as f:
+            data.append(f.read())
+    return data
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    jobs = [make_job(n, i) for i in range(count)]
+    serial_dir = tempfile.mkdtemp()
+    pool_dir = tempfile.mkdtemp()
+    try:
+        t = time.perf_counter()
+        run_serial(serial_dir, jobs)
+        t_serial = time.perf_counter() - t
+        t = time.perf_counter()
+        run_pool(pool_dir, jobs)
+        t_pool = time.perf_counter() - t
+        same = read_outputs(serial_dir, count) == read_outputs(pool_dir, count)
+    finally:
+        shutil.rmtree(serial_dir)
+        shutil.rmtree(pool_dir)
+    print('{0} meshes, {1} triangles each, {2} cpus'.format(count, n * n * 2, os.cpu_count()))
+    print('serial {0:7.3f}s'.format(t_serial))
+    print('pool   {0:7.3f}s  {1:.2f}x'.format(t_pool, t_serial / t_pool))
+    print('identical output: ' + str(same))
+
+if __name__ == '__main__':
+    main()
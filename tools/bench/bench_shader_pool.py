@@ -0,0 +1,84 @@
+# Shader variant building of arm.lib.shader_build serially and in a process pool, as make.build_shader_variants does
+# Reports time per variant, pool start-up cost and break-even count for make.shader_pool_min_variants
+# Run inside blender to include the cost of forking it: blender -b --python bench_shader_pool.py -- [workers] [start method]
+# Usage: python bench_shader_pool.py [workers] [start method]
+import os
+import sys
+import time
+import shutil
+import tempfile
+import multiprocessing
+import concurrent.futures
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import bench_common
+bench_common.setup()
+import arm.lib.shader_build
+import arm.lib.shader_source
+
+shaders_path = os.path.normpath(os.path.join(bench_common.arm_path, '..', '..', 'Shaders')) + '/'
+defs = ['_SSAO', '_LDR', '_Veloc', '_Irr', '_Rad', '_Brdf']
+
+def variants():
+    names = []
+    for name in sorted(os.listdir(shaders_path)):
+        if os.path.isfile(shaders_path + name + '/' + name + '.json'):
+            names.append((name, defs, None, None))
+    return names
+
+def run_serial(fp_build, items):
+    arm.lib.shader_source.sources.clear()
+    arm.lib.shader_source.jsons.clear()
+    arm.lib.shader_build.build_batch(shaders_path, fp_build, True, items)
+
+def noop():
+    return os.getpid()
+
+def start_pool(context, workers):
+    # Pool is usable once every worker has started
+    pool = concurrent.futures.ProcessPoolExecutor(workers, mp_context=context)
+    for future in [pool.submit(noop) for i in range(workers)]:
+        future.result()
+    return pool
+
+def run_pool(context, workers, fp_build, items):
+    batch_size = -(-len(items) // (workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(workers, mp_context=context) as pool:
+        futures = []
+        for i in range(0, len(items), batch_size):
+            futures.append(pool.submit(arm.lib.shader_build.build_batch, shaders_path, fp_build, True, items[i:i + batch_size]))
+        for future in futures:
+            future.result()
+
+def main():
+    # Arguments after '--' when run by blender
+    args = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else sys.argv[1:]
+    workers = int(args[0]) if len(args) > 0 else (os.cpu_count() or 1)
+    method = args[1] if len(args) > 1 else multiprocessing.get_start_method()
+    try:
+        import bpy
+        # Spawned workers need a regular interpreter, as in arm.utils.process_pool
+        if bpy.app.binary_path_python != '':
+            multiprocessing.set_executable(bpy.app.binary_path_python)
+    except ImportError:
+        pass
+    context = multiprocessing.get_context(method)
+    items = variants()
+    fp_build = tempfile.mkdtemp()
+    try:
+        t_serial, r = bench_common.best_time(lambda: run_serial(fp_build, items), 5)
+        t_start, pool = bench_common.best_time(lambda: start_pool(context, workers), 5)
+        pool.shutdown()
+        t_pool, r = bench_common.best_time(lambda: run_pool(context, workers, fp_build, items), 5)
+    finally:
+        shutil.rmtree(fp_build)
+    per_variant = t_serial / len(items)
+    print('{0} variants, {1} workers ({2}), {3} cores'.format(len(items), workers, method, os.cpu_count()))
+    print('serial         {0:7.1f} ms, {1:.2f} ms per variant'.format(t_serial * 1000, per_variant * 1000))
+    print('pool start-up  {0:7.1f} ms'.format(t_start * 1000))
+    print('pool total     {0:7.1f} ms'.format(t_pool * 1000))
+    if workers > 1:
+        # Pool pays off once saved work exceeds start-up: n * t * (1 - 1 / workers) > start-up
+        print('break-even     {0:7.0f} variants'.format(t_start / (per_variant * (1.0 - 1.0 / workers))))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# Tangent generation of arm.lib.mesh_utils against the per triangle Vector loop it replaced
+# Uses mathutils when run inside blender (blender -b --python bench_tangents.py), a pure Python vector otherwise
+# Usage: python bench_tangents.py [grid size]
+import sys
+import numpy
+import bench_common
+bench_common.setup()
+import arm.lib.mesh_utils as mesh_utils
+
+try:
+    from mathutils import Vector
+except ImportError:
+    class Vector:
+        __slots__ = ('v',)
+        def __init__(self, v):
+            self.v = tuple(v)
+        x = property(lambda self: self.v[0])
+        y = property(lambda self: self.v[1])
+        z = property(lambda self: self.v[2])
+        def __add__(self, o):
+            return Vector([a + b for a, b in zip(self.v, o.v)])
+        def __sub__(self, o):
+            return Vector([a - b for a, b in zip(self.v, o.v)])
+        def __mul__(self, s):
+            return Vector([a * s for a in self.v])
+        def dot(self, o):
+            return sum([a * b for a, b in zip(self.v, o.v)])
+        def normalize(self):
+            l = self.dot(self) ** 0.5
+            if l > 0.0:
+                self.v = tuple([a / l for a in self.v])
+
+def calc_tangent(v0, v1, v2, uv0, uv1, uv2):
+    deltaPos1 = v1 - v0
+    deltaPos2 = v2 - v0
+    deltaUV1 = uv1 - uv0
+    deltaUV2 = uv2 - uv0
+    d = (deltaUV1.x * deltaUV2.y - deltaUV1.y * deltaUV2.x)
+    r = 1.0 / d if d != 0 else 1.0
+    return (deltaPos1 * deltaUV2.y - deltaPos2 * deltaUV1.y) * r
+
+def calc_tangents_loop(posa, nora, uva, ia):
+    # Previous exporter implementation, first index array only
+    vertex_count = len(posa) // 3
+    tangents = [0] * vertex_count * 3
+    for i in range(len(ia) // 3):
+        i0 = ia[i * 3 + 0]
+        i1 = ia[i * 3 + 1]
+        i2 = ia[i * 3 + 2]
+        v0 = Vector((posa[i0 * 3 + 0], posa[i0 * 3 + 1], posa[i0 * 3 + 2]))
+        v1 = Vector((posa[i1 * 3 + 0], posa[i1 * 3 + 1], posa[i1 * 3 + 2]))
+        v2 = Vector((posa[i2 * 3 + 0], posa[i2 * 3 + 1], posa[i2 * 3 + 2]))
+        uv0 = Vector((uva[i0 * 2 + 0], uva[i0 * 2 + 1]))
+        uv1 = Vector((uva[i1 * 2 + 0], uva[i1 * 2 + 1]))
+        uv2 = Vector((uva[i2 * 2 + 0], uva[i2 * 2 + 1]))
+        tangent = calc_tangent(v0, v1, v2, uv0, uv1, uv2)
+        for k in (i0, i1, i2):
+            tangents[k * 3 + 0] += tangent.x
+            tangents[k * 3 + 1] += tangent.y
+            tangents[k * 3 + 2] += tangent.z
+    for i in range(vertex_count):
+        t = Vector((tangents[i * 3], tangents[i * 3 + 1], tangents[i * 3 + 2]))
+        n = Vector((nora[i * 3], nora[i * 3 + 1], nora[i * 3 + 2]))
+        v = t - n * n.dot(t)
+        v.normalize()
+        tangents[i * 3] = v.x
+        tangents[i * 3 + 1] = v.y
+        tangents[i * 3 + 2] = v.z
+    return tangents
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    pos, nor, uvs, tris = bench_common.grid(n)
+    posa = pos.ravel().tolist()
+    nora = nor.ravel().tolist()
+    uva = uvs.ravel().tolist()
+    ia = tris.ravel().tolist()
+
+    t_old, old = bench_common.best_time(lambda: calc_tangents_loop(posa, nora, uva, ia), 1)
+    t_new, new = bench_common.best_time(lambda: mesh_utils.calc_tangents(posa, nora, uva, [ia]))
+    print('{0} vertices, {1} indices'.format(len(pos), len(ia)))
+    print('vector loop {0:7.3f}s'.format(t_old))
+    print('numpy       {0:7.3f}s'.format(t_new))
+    print('max difference {0:.2e}'.format(numpy.abs(numpy.asarray(old) - numpy.asarray(new).ravel()).max()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+# Vertex deindexing and unification of arm.lib.mesh_utils against the per corner ExportVertex path it replaced
+# Meshes are synthetic tessface grids with mixed flat and smooth faces, several materials and 0 to 2 uv layers
+# Usage: python bench_unify.py [grid size]
+import sys
+import numpy
+import bench_common
+bench_common.setup()
+import arm.lib.mesh_utils as mesh_utils
+
+class TessMesh:
+    # Tessface data as read by foreach_get, quads in every fifth column are split into triangles
+    def __init__(self, n, uv_count, material_count):
+        pos, nor, uvs, tris = bench_common.grid(n)
+        self.co = pos.astype(numpy.float32)
+        vnor = nor + pos * [0.01, 0.02, 0.0]
+        self.vertex_normal = (vnor / numpy.linalg.norm(vnor, axis=1)[:, None]).astype(numpy.float32)
+        faces = []
+        for y in range(n):
+            for x in range(n):
+                q = y * (n + 1) + x
+                if x % 5 == 4:
+                    faces.append((q, q + 1, q + n + 2, 0))
+                    faces.append((q, q + n + 2, q + n + 1, 0))
+                else:
+                    faces.append((q, q + 1, q + n + 2, q + n + 1))
+        self.face_vertices = numpy.array(faces, dtype=numpy.int32)
+        fv = self.face_vertices
+        fn = numpy.cross(pos[fv[:, 1]] - pos[fv[:, 0]], pos[fv[:, 2]] - pos[fv[:, 0]])
+        self.face_normal = (fn / numpy.linalg.norm(fn, axis=1)[:, None]).astype(numpy.float32)
+        face_index = numpy.arange(len(fv))
+        self.smooth = face_index % 3 != 0
+        self.material_index = (face_index % material_count).astype(numpy.int32)
+        # Second layer gets seams, faces of every other row are offset
+        self.uv_layers = []
+        for i in range(uv_count):
+            uv = uvs[fv] * (i + 1)
+            if i == 1:
+                uv = uv + ((face_index // n) % 2 * 0.5)[:, None, None]
+            self.uv_layers.append(uv.astype(numpy.float32))
+
+# Previous implementation, vertex data read per corner into ExportVertex
+
+class ExportVertex:
+    __slots__ = ("hash", "vertex_index", "face_index", "position", "normal", "color", "texcoord0", "texcoord1")
+
+    def __init__(self):
+        self.color = [1.0, 1.0, 1.0]
+        self.texcoord0 = [0.0, 0.0]
+        self.texcoord1 = [0.0, 0.0]
+
+    def __eq__(self, v):
+        if self.hash != v.hash:
+            return False
+        if self.position != v.position:
+            return False
+        if self.normal != v.normal:
+            return False
+        if self.texcoord0 != v.texcoord0:
+            return False
+        if self.color != v.color:
+            return False
+        if self.texcoord1 != v.texcoord1:
+            return False
+        return True
+
+    def Hash(self):
+        h = hash(self.position[0])
+        h = h * 21737 + hash(self.position[1])
+        h = h * 21737 + hash(self.position[2])
+        h = h * 21737 + hash(self.normal[0])
+        h = h * 21737 + hash(self.normal[1])
+        h = h * 21737 + hash(self.normal[2])
+        h = h * 21737 + hash(self.color[0])
+        h = h * 21737 + hash(self.color[1])
+        h = h * 21737 + hash(self.color[2])
+        h = h * 21737 + hash(self.texcoord0[0])
+        h = h * 21737 + hash(self.texcoord0[1])
+        h = h * 21737 + hash(self.texcoord1[0])
+        h = h * 21737 + hash(self.texcoord1[1])
+        self.hash = h
+
+def deindex_mesh(mesh, material_table):
+    # Corners of quads are emitted as triangles (1, 2, 3) and (1, 3, 4)
+    co = mesh.co.tolist()
+    vertex_normal = mesh.vertex_normal.tolist()
+    face_normal = mesh.face_normal.tolist()
+    export_vertex_array = []
+    for face_index, face in enumerate(mesh.face_vertices.tolist()):
+        corners = (0, 1, 2, 0, 2, 3) if face[3] != 0 else (0, 1, 2)
+        for c in corners:
+            exportVertex = ExportVertex()
+            exportVertex.vertex_index = face[c]
+            exportVertex.face_index = face_index
+            exportVertex.position = co[face[c]]
+            exportVertex.normal = vertex_normal[face[c]] if mesh.smooth[face_index] else face_normal[face_index]
+            export_vertex_array.append(exportVertex)
+        for i in range(len(corners) // 3):
+            material_table.append(int(mesh.material_index[face_index]))
+
+    for layer, attrib in zip(mesh.uv_layers, ('texcoord0', 'texcoord1')):
+        uvs = layer.tolist()
+        vertex_index = 0
+        for face_index, face in enumerate(mesh.face_vertices.tolist()):
+            corners = (0, 1, 2, 0, 2, 3) if face[3] != 0 else (0, 1, 2)
+            for c in corners:
+                tf = uvs[face_index][c]
+                setattr(export_vertex_array[vertex_index], attrib, [tf[0], 1.0 - tf[1]]) # Reverse TCY
+                vertex_index += 1
+
+    for ev in export_vertex_array:
+        ev.Hash()
+    return export_vertex_array
+
+def unify_vertices(export_vertex_array, indexTable):
+    bucketCount = len(export_vertex_array) >> 3
+    if bucketCount > 1:
+        # Round down to nearest power of two.
+        while True:
+            count = bucketCount & (bucketCount - 1)
+            if count == 0:
+                break
+            bucketCount = count
+    else:
+        bucketCount = 1
+
+    hashTable = [[] for i in range(bucketCount)]
+    unifiedVA = []
+
+    for i in range(len(export_vertex_array)):
+        ev = export_vertex_array[i]
+        bucket = ev.hash & (bucketCount - 1)
+
+        index = -1
+        for b in hashTable[bucket]:
+            if export_vertex_array[b] == ev:
+                index = b
+                break
+
+        if index < 0:
+            indexTable.append(len(unifiedVA))
+            unifiedVA.append(ev)
+            hashTable[bucket].append(i)
+        else:
+            indexTable.append(indexTable[index])
+
+    return unifiedVA
+
+def unify_old(mesh):
+    material_table = []
+    index_table = []
+    unified = unify_vertices(deindex_mesh(mesh, material_table), index_table)
+    return index_table, material_table, len(unified)
+
+# Current implementation, same steps as ArmoryExporter.deindex_mesh_columns and build_mesh_quality
+
+def unify_new(mesh):
+    face_of_corner, slot = mesh_utils.triangulate_tessfaces(mesh.face_vertices)
+    vertex_index = mesh.face_vertices[face_of_corner, slot]
+    columns = []
+    columns.append(mesh.co[vertex_index])
+    columns.append(numpy.where(mesh.smooth[face_of_corner, None], mesh.vertex_normal[vertex_index], mesh.face_normal[face_of_corner]))
+    for layer in mesh.uv_layers:
+        uv = layer[face_of_corner, slot].astype(numpy.float64)
+        uv[:, 1] = 1.0 - uv[:, 1]
+        columns.append(uv)
+    rows = numpy.hstack(columns).astype(numpy.float64)
+    index_table, unified_index = mesh_utils.unify_rows(rows)
+    return index_table.tolist(), mesh.material_index[face_of_corner[::3]].tolist(), len(unified_index)
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    for uv_count in range(3):
+        mesh = TessMesh(n, uv_count, 3)
+        t_old, old = bench_common.best_time(lambda: unify_old(mesh), 1)
+        t_new, new = bench_common.best_time(lambda: unify_new(mesh))
+        assert old[0] == new[0], 'index tables differ'
+        assert old[1] == new[1], 'material tables differ'
+        print('{0} uv layers, {1} corners -> {2} vertices'.format(uv_count, len(new[0]), new[2]))
+        print('  export vertex {0:7.3f}s'.format(t_old))
+        print('  numpy         {0:7.3f}s  {1:.1f}x'.format(t_new, t_old / t_new))
+
+if __name__ == '__main__':
+    main()
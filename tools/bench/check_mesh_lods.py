@@ -0,0 +1,67 @@
+# Lod export of a minimized mesh, mirrors ArmoryExporter.export_mesh_lods with default options
+# Every level is written through the streaming writer and the next one is simplified from it
+# Usage: python check_mesh_lods.py [lod levels] [grid size]
+import os
+import sys
+import shutil
+import tempfile
+import copy
+import numpy
+import bench_common
+bench_common.setup()
+import arm.lib.armpack
+import arm.lib.mesh_export as mesh_export
+import arm.lib.mesh_simplify as mesh_simplify
+from bench_mesh_pool import make_job
+
+def export_lods(out_dir, o, levels, ratio):
+    lod_o = o
+    counts = []
+    for level in range(levels):
+        lod_o = mesh_simplify.simplify(lod_o, ratio)
+        lod_o['name'] = o['name'] + '_LOD' + str(level + 1)
+        out = copy.deepcopy(lod_o)
+        fp = out_dir + '/mesh_' + lod_o['name'] + '.arm'
+        mesh_export.write_mesh(fp, out, True)
+        # Streamed file matches the packed object and leaves out intact
+        with open(fp, 'rb') as f:
+            assert f.read() == arm.lib.armpack.packb({'mesh_datas': [out]}), 'level ' + str(level + 1)
+        assert out == lod_o, 'level ' + str(level + 1) + ' cleared by writer'
+        counts.append(sum([len(ia['values']) // 3 for ia in lod_o['index_arrays']]))
+    return counts
+
+def check(name, job, levels):
+    o = {}
+    o['name'] = name
+    mesh_export.build_mesh_quality(o, job)
+    base = sum([len(ia['values']) // 3 for ia in o['index_arrays']])
+    out_dir = tempfile.mkdtemp()
+    try:
+        mesh_export.write_mesh(out_dir + '/mesh_' + o['name'] + '.arm', o, True)
+        counts = export_lods(out_dir, o, levels, 0.5)
+    finally:
+        shutil.rmtree(out_dir)
+    print('{0}: {1} triangles, lods {2}'.format(name, base, ', '.join([str(c) for c in counts])))
+    for level, count in enumerate(counts):
+        # Exporter warns when a level misses its target
+        assert count <= int(base * 0.5 ** (level + 1)) + 1, 'lod not reduced'
+
+def main():
+    levels = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    job = make_job(n, 0)
+    job['material_table'][:] = 0 # Material borders are kept by the simplifier
+    check('smooth', job, levels)
+    # Face normals on every corner, each triangle gets its own vertices
+    job = make_job(n, 0)
+    job['material_table'][:] = 0
+    rows = job['rows']
+    p = rows[:, 0:3].reshape(-1, 3, 3)
+    normals = numpy.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])
+    normals /= numpy.linalg.norm(normals, axis=1)[:, None]
+    rows[:, 3:6] = numpy.repeat(normals, 3, axis=0)
+    check('flat', job, levels)
+    print('ok')
+
+if __name__ == '__main__':
+    main()